@@ -1,17 +1,20 @@
 # Oversikt.py
 ##### Imports #####
 import streamlit as st  # Used for Streamlit app elements, page configuration, and session state.
-import pandas as pd  # Used for DataFrame operations and type hints (though type hints are omitted for now).
 from pathlib import Path  # Used for constructing file paths.
 from global_utils.column_mapping import get_display_name  # Used for mapping original column names to display names.
 from mapper_streamlit.landingsside.dashboard import display_dashboard  # Used to display the dashboard component.
 from global_utils.filtering.filter_ui import display_filter_widgets  # Used to display filter UI components.
-from global_utils.filtering.filter_logic import apply_filters  # Used to apply filter logic to data.
+from global_utils.filtering.filter_logic import filter_state_key  # Identifies the filtered data for the table caches.
 from global_utils.session_state_manager import (
     initialize_and_persist_filters,
 )  # Used to manage filter state persistence.
-from global_utils.data_loading import load_and_prepare_data  # Imports the new centralized data loading function.
+from global_utils.data_loading import load_and_prepare_data, load_text_index, load_spatial_index  # Imports the centralized data loading functions.
 from global_utils.filtering.filter_constants import ALIEN_CODES  # Imports constants for alien species filtering.
+from global_utils.status_flags import status_flag_mask  # Vectorized bool mask for status flag columns.
+from global_utils.data_loading import DERIVED_DATE_COLUMNS  # Helper day/year columns, hidden in the tables.
+from global_utils.paginated_table import display_paginated_table  # Paginated tables: only the visible page is sent.
+from global_utils.dataset_manager import register_dataset, filtered_view  # Session-scoped dataset and filter result.
 
 ##### Initialize/Persist Session State #####
 initialize_and_persist_filters()  # Ensures filter state persists across pages. Must be called early.
@@ -30,14 +33,14 @@ st.write(
 
 ##### File Input Logic #####
 # --- Determine File Input Source ---
-taxonomy_file_default_path = Path(__file__).parent / "databehandling_artskart/output/Andøya_fugl_taxonomy.csv"  # Defines the path to a local default CSV file.
+taxonomy_file_default_path = Path(__file__).parent / "databehandling/output/final/Andøya_fugl_taxonomy.csv"  # Defines the path to a local default CSV file. A typed .parquet next to it is loaded instead if present.
 file_input_for_loader = taxonomy_file_default_path  # Initially assumes the local default file will be used.
 
 # --- File Uploader ---
 with st.expander("Last opp datafil"):
     uploaded_file = st.file_uploader(
-        "Velg CSV-fil (Erstatter lokal fil hvis valgt)",  # Label for the file uploader widget.
-        type="csv",  # Restricts file types to CSV.
+        "Velg CSV- eller Parquet-fil (Erstatter lokal fil hvis valgt)",  # Label for the file uploader widget.
+        type=["csv", "parquet"],  # Restricts file types to CSV and the typed Parquet from the databehandling pipeline.
     )
 
 if uploaded_file is not None:  # Checks if a file has been uploaded by the user.
@@ -50,18 +53,24 @@ if uploaded_file is not None:  # Checks if a file has been uploaded by the user.
 innlastet_data = load_and_prepare_data(file_input_for_loader)  # Loads and preprocesses data. Assumes file_input_for_loader is valid.
 
 #### Main Application Logic (Conditional on Data Loaded) #####
-# --- Store Loaded Data in Session State (Simplified) ---
-# This ensures 'loaded_data' in session_state reflects the current data.
-st.session_state["loaded_data"] = innlastet_data  # Updates session state with the loaded data.
+# --- Store Loaded Data in the Session's Dataset Manager ---
+# Keeps the data, its indexes and the last filter result for all pages; also sets 'loaded_data',
+# 'loaded_text_index' (used by apply_filters) and 'loaded_spatial_index' (used by the Kart page) in session_state.
+dataset_manager = register_dataset(
+    innlastet_data,
+    text_index=load_text_index(file_input_for_loader),  # Inverted text-search index, built once per file.
+    spatial_index=load_spatial_index(file_input_for_loader),  # Grid index over the coordinates, built once per file.
+)
+innlastet_data = dataset_manager.data  # The frame the shared filter result was computed from.
 
 # --- Display Filter Widgets in Sidebar ---
 display_filter_widgets(innlastet_data)  # Displays filter widgets. Assumes innlastet_data is a valid DataFrame for populating options.
 
 # --- Apply Filters to Data ---
-data_for_visning = apply_filters(innlastet_data)  # Applies selected filters. Assumes filters are correctly applied to innlastet_data.
+data_for_visning = filtered_view(innlastet_data)  # Applies selected filters; reuses the result while the filters are unchanged (also across pages).
 
 # --- Prepare Data for Dashboard ---
-data_for_dashboard = data_for_visning.copy()  # Creates a copy for dashboard-specific modifications.
+data_for_dashboard = data_for_visning  # display_dashboard does not modify its input, so no copy is needed.
 st.subheader("Nøkkeltall")  # Subheader for the dashboard section.
 
 # --- Define Actual Original Column Names for Dashboard (sourced from column_mapping.py) ---
@@ -92,35 +101,22 @@ display_dashboard(
     original_category_col=actual_original_category_col,
     original_alien_flag_col=actual_original_alien_flag_col,
     original_special_status_cols_list=actual_original_special_status_cols_list,
+    cache_key=filter_state_key(innlastet_data),  # Dataset fingerprint + filter state; dashboard results are cached on it.
+    loaded_data=innlastet_data,  # Unfiltered data: dashboard results come from its partial aggregates when possible.
 )
 
 # --- Define Alien Species Criteria ---
 alien_col = "Fremmede arter"  # Original column name for the dedicated alien flag.
 category_col = "category"  # Original column name for Red List / Alien Risk category.
-alien_identifier = "Yes"  # Value indicating alien species in alien_col.
 category_identifiers = ALIEN_CODES  # Values in category_col indicating alien species risk, from constants.
 
 # --- Separate Alien and Non-Alien Species ---
-# Initialize empty DataFrames with original columns for structure.
-fremmede_arter_filtrert = pd.DataFrame(columns=data_for_visning.columns)  # For alien species.
-ikke_fremmede_arter_filtrert = data_for_visning.copy()  # Default to all data as non-alien, will be overwritten if alien species are found.
-
-# --- Build Alien Species Condition (Happy Path: assumes columns exist) ---
-condition_alien_col_is_yes = (
-    data_for_visning[alien_col].str.upper() == alien_identifier.upper()
-)  # Condition for dedicated alien column. Assumes string comparison.
+# Row masks over data_for_visning; the tables take the rows from it page by page, so no filtered copies are made.
+condition_alien_col_is_yes = status_flag_mask(data_for_visning, alien_col)  # Condition for dedicated alien flag column (bool).
 condition_category_is_alien = data_for_visning[category_col].isin(category_identifiers)  # Condition for category column. Assumes .isin() works.
-combined_alien_condition = condition_alien_col_is_yes | condition_category_is_alien  # Combines conditions with OR.
-
-fremmede_arter_filtrert = data_for_visning[combined_alien_condition]  # Applies combined condition to get alien species.
-ikke_fremmede_arter_filtrert = data_for_visning[~combined_alien_condition]  # Applies inverse condition for non-alien species.
-
-
-# --- Display Section: Main Table (Non-Alien Species) ---
-st.subheader("Hovedoversikt (Ikke-fremmede arter)")  # Subheader for the main table.
-hovedtabell_visning = ikke_fremmede_arter_filtrert.copy()  # Creates a copy for display modifications.
-hovedtabell_visning.columns = [get_display_name(col) for col in hovedtabell_visning.columns]  # Renames columns.
+combined_alien_condition = (condition_alien_col_is_yes | condition_category_is_alien).to_numpy()  # Combines conditions with OR.
 
+# --- Column Order for the Tables ---
 preferred_display_order = [  # Defines the preferred order of columns for display.
     "Taksonomisk Gruppe",
     "Orden",
@@ -139,20 +135,32 @@ preferred_display_order = [  # Defines the preferred order of columns for displa
     "Innsamlingsdato/-tid",
     "Innsamler/Observatør",
 ]
-existing_columns = hovedtabell_visning.columns.tolist()  # Gets list of actual columns after renaming.
-final_display_order = [col for col in preferred_display_order if col in existing_columns]  # Filters preferred order by existing columns.
-extra_columns = [col for col in existing_columns if col not in final_display_order]  # Gets any remaining columns not in preferred list.
-final_display_order.extend(extra_columns)  # Adds extra columns to the end.
+display_rank = {name: rank for rank, name in enumerate(preferred_display_order)}  # Position of each preferred display name.
+table_columns = [col for col in data_for_visning.columns if col not in DERIVED_DATE_COLUMNS]  # Original names, without the helper day/year columns.
+table_columns = sorted(  # Preferred columns first, in preferred order; other columns after them in data order (stable sort).
+    table_columns, key=lambda col: display_rank.get(get_display_name(col), len(preferred_display_order))
+)
+table_cache_key = filter_state_key(innlastet_data)  # Identifies the filtered rows; sorted row orders are reused while it is unchanged.
 
-hovedtabell_visning = hovedtabell_visning[final_display_order]  # Reorders columns. Assumes all columns in final_display_order exist.
-st.dataframe(hovedtabell_visning, height=600, use_container_width=True)  # Displays the main table.
+# --- Display Section: Main Table (Non-Alien Species) ---
+st.subheader("Hovedoversikt (Ikke-fremmede arter)")  # Subheader for the main table.
+display_paginated_table(  # Sends only the current page; sorting and column selection run on the original columns.
+    data_for_visning,
+    table_columns,
+    key="hovedtabell",
+    rows=~combined_alien_condition,
+    cache_key=(table_cache_key, "hovedtabell") if table_cache_key else None,
+    height=600,
+)
 
 # --- Display Section: Alien Species Table ---
 st.subheader(
-    f"Fremmede Arter (Basert på '{get_display_name(alien_col)}'='{alien_identifier}' eller '{get_display_name(category_col)}' i {category_identifiers})"
+    f"Fremmede Arter (Basert på '{get_display_name(alien_col)}' eller '{get_display_name(category_col)}' i {category_identifiers})"
 )  # Subheader for alien species table.
-fremmedart_tabell_visning = fremmede_arter_filtrert.copy()  # Creates a copy for display modifications.
-fremmedart_tabell_visning.columns = [get_display_name(col) for col in fremmedart_tabell_visning.columns]  # Renames columns.
-existing_alien_columns = [col for col in final_display_order if col in fremmedart_tabell_visning.columns]  # Filters display order by existing alien columns.
-fremmedart_tabell_visning = fremmedart_tabell_visning[existing_alien_columns]  # Reorders columns. Assumes columns exist.
-st.dataframe(fremmedart_tabell_visning, use_container_width=True)  # Displays the alien species table.
+display_paginated_table(
+    data_for_visning,
+    table_columns,
+    key="fremmedart_tabell",
+    rows=combined_alien_condition,
+    cache_key=(table_cache_key, "fremmedart_tabell") if table_cache_key else None,
+)
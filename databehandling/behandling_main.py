@@ -10,10 +10,14 @@ script_dir = Path(__file__).parent.resolve()
 module_dir = script_dir / 'data_manipulasjon'
 sys.path.insert(0, str(module_dir.parent))  # Add databehandling parent dir
 
+import pandas as pd # Used to combine the per-chunk missing name counts in chunked mode
+
 # Import the main functions from the sibling modules
 from data_manipulasjon import cleans_columns
 from data_manipulasjon import adds_forvaltningsinteresse
 from data_manipulasjon import api_artsdata
+from data_manipulasjon import taxonomy_cache
+from data_manipulasjon import writes_parquet
 # Import missing values checker
 from data_manipulasjon import missing_values_checker
 
@@ -28,84 +32,248 @@ _DEFAULT_METADATA_DIR = _BASE_DIR / 'metadata_add'
 _DEFAULT_OUTPUT_DIR = _BASE_DIR / 'output'
 _DEFAULT_INTERIM_DIR = _DEFAULT_OUTPUT_DIR / 'interim'
 _DEFAULT_FINAL_DIR = _DEFAULT_OUTPUT_DIR / 'final'
+_DEFAULT_CACHE_DIR = _DEFAULT_OUTPUT_DIR / 'cache'
 _DEFAULT_EXCEL_FILENAME = 'ArtslisteArtnasjonal_2023_01-31.xlsx'
 
 
 ##### Main Processing Logic #####
 
+## Function: _write_interim ##
+def _write_interim(df, path):
+    # Writes a stage's DataFrame as a semicolon CSV. Only called when interim files are kept.
+    df.to_csv(path, index=False, sep=';')
+    print(f"Interim file saved to: {path}")
+
+
+## Function: _append_csv ##
+def _append_csv(df, path, first_chunk):
+    # Writes one chunk to a semicolon CSV: the first chunk creates the file with a header, later chunks append rows.
+    df.to_csv(path, mode='w' if first_chunk else 'a', header=first_chunk, index=False, sep=';')
+
+
+## Function: run_processing_chunked ##
+def run_processing_chunked(
+    input_csv_path,
+    excel_meta_path,
+    interim_dir,
+    final_dir,
+    chunksize,
+    skip_missing_check=False,
+    max_workers=api_artsdata.nortaxa_client.DEFAULT_MAX_WORKERS,
+    requests_per_second=api_artsdata.nortaxa_client.DEFAULT_REQUESTS_PER_SECOND,
+    cache_dir=None,
+    cache_ttl_days=taxonomy_cache.DEFAULT_TTL_DAYS,
+    offline=False,
+    keep_interim=False,
+):
+    # Streaming variant of run_processing for inputs that do not fit in memory.
+    # Pass 1 reads the raw CSV in chunks and only keeps the distinct species IDs and the missing popular names.
+    # After prompting once and fetching the taxonomy once, pass 2 reads the CSV again chunk by chunk, runs
+    # Steps 0-3 on each chunk and appends it to the outputs. Memory is bounded by chunksize (plus the small
+    # criteria and taxonomy tables), whatever the input size. Produces the same files as run_processing.
+
+    # --- Define intermediate/output filenames based on input ---
+    missing_filled_csv_path = interim_dir / f"{input_csv_path.stem}_missing_filled.csv"
+    cleaned_csv_path = interim_dir / f"{input_csv_path.stem}_cleaned.csv"
+    processed_csv_path = interim_dir / f"{input_csv_path.stem}_processed.csv"
+    unmatched_log_path = adds_forvaltningsinteresse.log_path_for(processed_csv_path)
+    final_csv_path = final_dir / f"{input_csv_path.stem}_taxonomy.csv"
+    final_parquet_path = final_csv_path.with_suffix('.parquet')
+
+    # --- Ensure output directories exist ---
+    interim_dir.mkdir(parents=True, exist_ok=True) # Creates dir if not present.
+    final_dir.mkdir(parents=True, exist_ok=True) # Creates dir if not present.
+
+    ## Function: read_chunks ##
+    def read_chunks():
+        # Same reader as run_processing, returning chunks of at most chunksize rows.
+        return cleans_columns.read_raw_csv(input_csv_path, sep=';', encoding='utf-8-sig', chunksize=chunksize)
+
+    # --- Pass 1: Collect IDs and Missing Popular Names ---
+    unique_ids = set()
+    missing_counts_per_chunk = []
+    for chunk in read_chunks():
+        if 'validScientificNameId' not in chunk.columns:
+            return None # Stop processing, as add_taxonomy_columns does.
+        unique_ids.update(chunk['validScientificNameId'].dropna().unique())
+        if not skip_missing_check:
+            missing_cols = [col for col in missing_values_checker.REQUIRED_COLUMNS if col not in chunk.columns]
+            if missing_cols:
+                print(f"Error: Missing required columns: {missing_cols}")
+                return None # Stop processing
+            missing_mask = missing_values_checker.missing_popular_name_mask(chunk)
+            missing_counts_per_chunk.append(chunk.loc[missing_mask, 'validScientificName'].value_counts(sort=False))
+
+    # --- Step 0: Prompt Once for Missing Popular Names ---
+    # Counts are summed over all chunks, so each species is asked for once, in order of first appearance.
+    species_mapping = None
+    if not skip_missing_check:
+        missing_counts = pd.concat(missing_counts_per_chunk).groupby(level=0, sort=False).sum()
+        if missing_counts.empty:
+            print("No missing preferredPopularName values found.")
+        else:
+            species_mapping = missing_values_checker.prompt_popular_names(missing_counts)
+            if species_mapping is None:
+                return None # Stop processing, user cancelled
+
+    # --- Step 2 Setup: Load the Criteria Table Once ---
+    df_criteria_bool, criteria_cols = adds_forvaltningsinteresse.load_criteria(excel_meta_path, cache_dir)
+
+    # --- Step 3 Setup: Fetch the Taxonomy Once ---
+    # The taxonomy table only holds one row per distinct species, so it stays small for national exports.
+    cache = None
+    if cache_dir is not None:
+        cache = taxonomy_cache.TaxonomyCache(
+            cache_dir / taxonomy_cache.DEFAULT_CACHE_FILENAME, ttl_days=cache_ttl_days, offline=offline
+        )
+    try:
+        taxonomy_table = api_artsdata.build_taxonomy_table(*api_artsdata.resolve_taxonomy(
+            sorted(unique_ids), max_workers=max_workers, requests_per_second=requests_per_second, cache=cache
+        ))
+    finally:
+        if cache is not None:
+            print(f"Taxonomy cache: {cache.hits} hits, {cache.misses} misses ({cache.db_path})")
+            cache.close()
+
+    # --- Pass 2: Process and Append Each Chunk ---
+    parquet_writer = writes_parquet.ParquetChunkWriter(final_parquet_path)
+    rows_written = 0
+    names_filled = 0
+    log_rows = 0
+    try:
+        for chunk_number, chunk in enumerate(read_chunks()):
+            first_chunk = chunk_number == 0
+            if species_mapping:
+                names_filled += missing_values_checker.apply_popular_names(chunk, species_mapping)
+            if keep_interim and not skip_missing_check:
+                _append_csv(chunk, missing_filled_csv_path, first_chunk)
+
+            chunk = cleans_columns.clean_dataframe(chunk)
+            if keep_interim:
+                _append_csv(chunk, cleaned_csv_path, first_chunk)
+
+            chunk, chunk_log = adds_forvaltningsinteresse.merge_criteria(chunk, df_criteria_bool, criteria_cols)
+            if not chunk_log.empty:
+                _append_csv(chunk_log, unmatched_log_path, log_rows == 0)
+                log_rows += len(chunk_log)
+            if keep_interim:
+                _append_csv(chunk, processed_csv_path, first_chunk)
+
+            chunk = api_artsdata.map_taxonomy_columns(chunk, taxonomy_table)
+            _append_csv(chunk, final_csv_path, first_chunk)
+            parquet_writer.write(chunk)
+            rows_written += len(chunk)
+    finally:
+        parquet_writer.close()
+
+    if species_mapping:
+        print(f"\nFilled {names_filled} missing popular names.")
+    if log_rows:
+        print(f"Log of {log_rows} unmatched/higher-rank rows saved to: {unmatched_log_path}")
+    else:
+        print("No rows needed to be logged for unmatched/higher-rank status.")
+    print(f"Streamed {rows_written} rows in chunks of {chunksize}.")
+
+    # Return the final output path for potential use by a caller.
+    return final_csv_path
+
+
 ## Function: run_processing ##
-def run_processing(input_csv_path, excel_meta_path, interim_dir, final_dir, skip_missing_check=False):
+def run_processing(
+    input_csv_path,
+    excel_meta_path,
+    interim_dir,
+    final_dir,
+    skip_missing_check=False,
+    max_workers=api_artsdata.nortaxa_client.DEFAULT_MAX_WORKERS,
+    requests_per_second=api_artsdata.nortaxa_client.DEFAULT_REQUESTS_PER_SECOND,
+    cache_dir=None,
+    cache_ttl_days=taxonomy_cache.DEFAULT_TTL_DAYS,
+    offline=False,
+    keep_interim=False,
+):
     # Orchestrates the entire data cleaning and enrichment pipeline.
     # Takes input paths and output directories as arguments.
+    # The raw CSV is read once and each stage passes its DataFrame directly to the next one.
+    # keep_interim=True also writes each stage's result to interim_dir (useful for debugging).
+    # max_workers/requests_per_second control the concurrent taxonomy fetch in Step 3.
+    # cache_dir enables the persistent taxonomy and criteria caches; offline=True serves Step 3 from the cache only.
     # Assumes input files exist and output directories are creatable/writable.
 
     # --- Define intermediate/output filenames based on input --- 
-    missing_filled_csv_filename = f"{input_csv_path.stem}_missing_filled.csv"
-    missing_filled_csv_path = interim_dir / missing_filled_csv_filename
-    cleaned_csv_filename = f"{input_csv_path.stem}_cleaned.csv"
-    cleaned_csv_path = interim_dir / cleaned_csv_filename
-    processed_csv_filename = f"{input_csv_path.stem}_processed.csv"
-    processed_csv_path = interim_dir / processed_csv_filename
-    final_csv_filename = f"{input_csv_path.stem}_taxonomy.csv"
-    final_csv_path = final_dir / final_csv_filename
+    missing_filled_csv_path = interim_dir / f"{input_csv_path.stem}_missing_filled.csv"
+    cleaned_csv_path = interim_dir / f"{input_csv_path.stem}_cleaned.csv"
+    processed_csv_path = interim_dir / f"{input_csv_path.stem}_processed.csv"
+    unmatched_log_path = adds_forvaltningsinteresse.log_path_for(processed_csv_path)
+    final_csv_path = final_dir / f"{input_csv_path.stem}_taxonomy.csv"
+    final_parquet_path = final_csv_path.with_suffix('.parquet')
 
     # --- Ensure output directories exist (Minimal side-effect) ---
     # This is a minimal deviation for usability, as the script must write output.
+    # The interim dir is always needed for the unmatched log, even without --keep-interim.
     interim_dir.mkdir(parents=True, exist_ok=True) # Creates dir if not present.
     final_dir.mkdir(parents=True, exist_ok=True) # Creates dir if not present.
 
+    # --- Load Raw Input Once ---
+    # Only the columns kept by Step 1 are parsed, with explicit dtypes (see cleans_columns.read_raw_csv).
+    # utf-8-sig strips a byte order mark from Excel-exported CSVs. Assumes ';' separator.
+    df = cleans_columns.read_raw_csv(input_csv_path, sep=';', encoding='utf-8-sig')
+
     # --- Step 0: Check Missing Popular Names ---
-    # Calls the main function from missing_values_checker script.
-    # Takes raw CSV path, outputs to intermediate missing_filled path.
-    # Assumes missing_values_checker.main returns the output path on success.
-    if skip_missing_check:
-        # Skip missing values check, use original input
-        current_input_path = input_csv_path
-    else:
-        current_input_path = missing_values_checker.main(input_csv_path, missing_filled_csv_path)
-        # Minimal check: ensure previous step returned a path (didn't fail)
-        if not current_input_path:
+    # Prompts for missing preferredPopularName values and fills them in the frame.
+    # Returns None if required columns are missing or the user quits.
+    if not skip_missing_check:
+        df = missing_values_checker.fill_missing_popular_names(df)
+        # Minimal check: ensure previous step returned a frame (didn't fail)
+        if df is None:
             return None # Stop processing
+        if keep_interim:
+            _write_interim(df, missing_filled_csv_path)
 
     # --- Step 1: Clean Columns ---
-    # Calls the main function from cleans_columns script.
-    # Takes raw CSV path, outputs to intermediate cleaned path.
-    # Assumes cleans_columns.main returns the output path on success.
-    cleaned_path = cleans_columns.main(current_input_path, cleaned_csv_path)
-    # Minimal check: ensure previous step returned a path (didn't fail)
-    if not cleaned_path:
-        # print("Error: Column cleaning step failed.")
-        return None # Stop processing
+    # Drops unneeded columns and fixes individualCount.
+    df = cleans_columns.clean_dataframe(df)
+    if keep_interim:
+        _write_interim(df, cleaned_csv_path)
 
     # --- Step 2: Add Forvaltningsinteresse Columns ---
-    # Calls the main function from adds_forvaltningsinteresse script.
-    # Takes cleaned path and Excel path, outputs to processed path.
-    # Assumes adds_forvaltningsinteresse.main returns the output path on success.
-    processed_path = adds_forvaltningsinteresse.main(
-        cleaned_path,       # Use the path returned by the previous step
-        excel_meta_path,    # Use the provided metadata path
-        processed_csv_path  # Save to intermediate processed path
-    )
-    # Minimal check
-    if not processed_path:
-        # print("Error: Adding forvaltningsinteresse step failed.")
-        return None # Stop processing
+    # Merges the Excel criteria (from the compiled criteria cache when cache_dir is set).
+    # The unmatched/higher-rank log is always saved since it is the only record of those rows.
+    df, df_log = adds_forvaltningsinteresse.add_forvaltning_columns_df(df, excel_meta_path, cache_dir)
+    adds_forvaltningsinteresse.save_log(df_log, unmatched_log_path)
+    if keep_interim:
+        _write_interim(df, processed_csv_path)
 
     # --- Step 3: Add Taxonomy Columns via API ---
-    # Calls the main function from api_artsdata script.
-    # Takes processed path, outputs to final taxonomy path.
-    # Assumes api_artsdata.main returns the output path on success.
-    final_path = api_artsdata.main(
-        processed_path, # Use the path returned by the previous step
-        final_csv_path
-    )
+    # Opens the on-disk taxonomy cache if a cache directory is given.
+    cache = None
+    if cache_dir is not None:
+        cache = taxonomy_cache.TaxonomyCache(
+            cache_dir / taxonomy_cache.DEFAULT_CACHE_FILENAME, ttl_days=cache_ttl_days, offline=offline
+        )
+    try:
+        df = api_artsdata.add_taxonomy_columns(
+            df,
+            max_workers=max_workers, # Number of concurrent API calls
+            requests_per_second=requests_per_second, # Per-host rate limit for the API
+            cache=cache # Persistent taxonomy cache (None disables it)
+        )
+    finally:
+        if cache is not None:
+            print(f"Taxonomy cache: {cache.hits} hits, {cache.misses} misses ({cache.db_path})")
+            cache.close()
     # Minimal check
-    if not final_path:
+    if df is None:
         # print("Error: Adding taxonomy step failed.")
         return None # Stop processing
 
+    # --- Save Final Result ---
+    df.to_csv(final_csv_path, index=False, sep=';')
+    # Typed Parquet copy for the Streamlit app, which loads it instead of re-parsing the CSV.
+    writes_parquet.main(df, final_parquet_path)
+
     # Return the final output path for potential use by a caller.
-    return final_path
+    return final_csv_path
 
 
 ##### Execution Entry Point #####
@@ -133,7 +301,7 @@ if __name__ == "__main__":
         "--interim-dir",
         type=str,
         default=str(_DEFAULT_INTERIM_DIR),
-        help="Directory to save interim files (default: 'output/interim' next to script)"
+        help="Directory for the unmatched log and --keep-interim files (default: 'output/interim' next to script)"
     )
     # Optional final directory argument
     parser.add_argument(
@@ -148,20 +316,108 @@ if __name__ == "__main__":
         action="store_true",
         help="Skip the interactive missing values check step"
     )
+    # Optional concurrency limit for the taxonomy API step
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=api_artsdata.nortaxa_client.DEFAULT_MAX_WORKERS,
+        help="Number of concurrent NorTaxa API calls (default: %(default)s)"
+    )
+    # Optional per-host rate limit for the taxonomy API step
+    parser.add_argument(
+        "--requests-per-second",
+        type=float,
+        default=api_artsdata.nortaxa_client.DEFAULT_REQUESTS_PER_SECOND,
+        help="Max NorTaxa API requests started per second, 0 disables the limit (default: %(default)s)"
+    )
+    # Optional taxonomy cache directory
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=str(_DEFAULT_CACHE_DIR),
+        help="Directory for the persistent taxonomy and criteria caches (default: 'output/cache' next to script)"
+    )
+    # Optional cache time-to-live
+    parser.add_argument(
+        "--cache-ttl-days",
+        type=float,
+        default=taxonomy_cache.DEFAULT_TTL_DAYS,
+        help="Re-fetch cached taxonomy entries older than this many days, 0 never expires (default: %(default)s)"
+    )
+    # Optional: disable the cache
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the taxonomy and criteria caches"
+    )
+    # Optional: offline mode, cache only
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Use only the taxonomy cache and fail fast on IDs that are not cached (no network calls)"
+    )
+    # Optional: write each stage's result to the interim directory
+    parser.add_argument(
+        "--keep-interim",
+        action="store_true",
+        help="Also write the intermediate CSV of every stage to the interim directory"
+    )
+    # Optional: streaming mode for inputs that do not fit in memory
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="Process the input in chunks of this many rows and append them to the outputs (bounded memory)"
+    )
 
     args = parser.parse_args() # Parse the command-line arguments
+    if args.offline and args.no_cache:
+        parser.error("--offline needs the taxonomy cache and cannot be combined with --no-cache")
+    if args.chunksize is not None and args.chunksize < 1:
+        parser.error("--chunksize must be a positive number of rows")
 
     # Convert paths from strings to Path objects
     input_path = Path(args.input_file)
     metadata_path = Path(args.metadata)
     interim_path_dir = Path(args.interim_dir)
     final_path_dir = Path(args.final_dir)
+    cache_path_dir = None if args.no_cache else Path(args.cache_dir)
 
     # --- Run Pipeline --- 
     # This block executes only when the script is run directly.
     # It calls the main orchestration function with parsed arguments.
     # print("Starting data processing pipeline...") # Keep prints minimal
-    final_output_file = run_processing(input_path, metadata_path, interim_path_dir, final_path_dir, args.skip_missing_check)
+    pipeline_options = {
+        "max_workers": args.max_workers,
+        "requests_per_second": args.requests_per_second,
+        "cache_dir": cache_path_dir,
+        "cache_ttl_days": args.cache_ttl_days,
+        "offline": args.offline,
+        "keep_interim": args.keep_interim,
+    }
+    try:
+        if args.chunksize:
+            final_output_file = run_processing_chunked(
+                input_path,
+                metadata_path,
+                interim_path_dir,
+                final_path_dir,
+                args.chunksize,
+                args.skip_missing_check,
+                **pipeline_options,
+            )
+        else:
+            final_output_file = run_processing(
+                input_path,
+                metadata_path,
+                interim_path_dir,
+                final_path_dir,
+                args.skip_missing_check,
+                **pipeline_options,
+            )
+    except taxonomy_cache.OfflineCacheMissError as error:
+        print(f"Offline run stopped: {error}")
+        sys.exit(1)
     
     # Check if the pipeline completed (returned a file path)
     if final_output_file:
@@ -1,3 +1,5 @@
+import hashlib
+import pickle
 import pandas as pd
 from pathlib import Path
 
@@ -15,16 +17,18 @@ CSV_RANK_COL = "scientificNameRank"
 # 0-based index (5th col) in Excel where criteria cols start.
 # Adjust if Excel layout changes.
 CRITERIA_START_COL_INDEX = 4
+# File name of the compiled criteria cache inside the cache directory.
+CRITERIA_CACHE_FILENAME = "forvaltning_criteria_cache.pkl"
+# Bump when the cached content changes, so old cache files are rebuilt.
+CRITERIA_CACHE_VERSION = 1
 
 
-def add_forvaltning_columns(
-    cleaned_csv_path,  # Input CSV path.
-    excel_path,  # Input Excel path.
-    output_path,  # Output CSV path.
-):
-    # --- Load data (Happy Path Only) ---
+## Function: read_criteria_excel ##
+def read_criteria_excel(excel_path):
+    # Parses the Excel metadata and returns (df_criteria_bool, criteria_cols).
+    # df_criteria_bool is indexed by EXCEL_ID_COL and holds one boolean column per Kriterium column
+    # (True where the cell is marked "X").
     df_excel = pd.read_excel(excel_path)
-    df_csv_cleaned = pd.read_csv(cleaned_csv_path, sep=";")
 
     # ----------------------------------------
     # Identify and Prepare Criteria Columns from Excel
@@ -39,10 +43,85 @@ def add_forvaltning_columns(
     for col in criteria_cols:
         if col in df_excel_indexed.columns:
             is_x = df_excel_indexed[col].astype(str).str.strip().str.upper()
-            df_criteria_bool[col] = is_x.eq("X").map({True: "Yes", False: "No"})
+            df_criteria_bool[col] = is_x.eq("X")
         else:
-            # If a Kriterium col is expected but missing, fill with No for all species in Excel
-            df_criteria_bool[col] = "No"
+            # If a Kriterium col is expected but missing, fill with False for all species in Excel
+            df_criteria_bool[col] = False
+
+    return df_criteria_bool, criteria_cols
+
+
+## Function: _file_sha256 ##
+def _file_sha256(file_path):
+    # Returns the hex SHA-256 of a file, read in 1 MB blocks.
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+## Function: _write_criteria_cache ##
+def _write_criteria_cache(cache_path, cache_entry):
+    # Writes the cache to a temporary file first, so an interrupted run never leaves a half-written cache.
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = cache_path.with_suffix(".tmp")
+    with open(temporary_path, "wb") as file:
+        pickle.dump(cache_entry, file, protocol=pickle.HIGHEST_PROTOCOL)
+    temporary_path.replace(cache_path)
+
+
+## Function: load_criteria ##
+def load_criteria(excel_path, cache_dir=None):
+    # Returns (df_criteria_bool, criteria_cols) like read_criteria_excel, using a compiled cache in cache_dir.
+    # The cache is fresh if the Excel file's mtime and size are unchanged. If only those changed (e.g. the file
+    # was copied), the SHA-256 of the file is compared before re-parsing. cache_dir=None always parses the Excel.
+    if cache_dir is None:
+        return read_criteria_excel(excel_path)
+
+    cache_path = Path(cache_dir) / CRITERIA_CACHE_FILENAME
+    excel_stat = Path(excel_path).stat()
+    file_key = (excel_stat.st_mtime_ns, excel_stat.st_size)
+
+    cache_entry = None
+    if cache_path.exists():
+        try:
+            with open(cache_path, "rb") as file:
+                cache_entry = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            cache_entry = None  # Unreadable cache, rebuilt below.
+    if cache_entry is not None and cache_entry.get("version") != CRITERIA_CACHE_VERSION:
+        cache_entry = None
+
+    # --- Fresh by mtime and size ---
+    if cache_entry is not None and cache_entry["file_key"] == file_key:
+        return cache_entry["criteria"], cache_entry["criteria_cols"]
+
+    # --- Same content under a new mtime ---
+    excel_sha256 = _file_sha256(excel_path)
+    if cache_entry is not None and cache_entry["sha256"] == excel_sha256:
+        cache_entry["file_key"] = file_key  # Skip the hash next time.
+        _write_criteria_cache(cache_path, cache_entry)
+        return cache_entry["criteria"], cache_entry["criteria_cols"]
+
+    # --- Stale or missing: parse the Excel and store it ---
+    df_criteria_bool, criteria_cols = read_criteria_excel(excel_path)
+    _write_criteria_cache(cache_path, {
+        "version": CRITERIA_CACHE_VERSION,
+        "file_key": file_key,
+        "sha256": excel_sha256,
+        "criteria": df_criteria_bool,
+        "criteria_cols": criteria_cols,
+    })
+    print(f"Criteria cache rebuilt from {excel_path}: {cache_path}")
+    return df_criteria_bool, criteria_cols
+
+
+## Function: merge_criteria ##
+def merge_criteria(df_csv_cleaned, df_criteria_bool, criteria_cols):
+    # Left-merges the criteria onto the observations.
+    # Returns (df_main_output, df_log_data): all rows with criteria columns, and the
+    # higher-rank/unmatched rows with a log_reason column.
 
     # ----------------------------------------
     #   Merge DataFrames
@@ -60,7 +139,7 @@ def add_forvaltning_columns(
     )
 
     # ----------------------------------------
-    #   Logging and Output
+    #   Logging
     # ----------------------------------------
 
     ranks_to_match = ["species", "subspecies"]
@@ -75,12 +154,13 @@ def add_forvaltning_columns(
     df_processing.loc[is_unmatched_species_subspecies, "log_reason"] = "Species/subspecies ID not found in Excel"
 
     # ----------------------------------------
-    # Process and Save Data
+    # Process Data
     # ----------------------------------------
 
-    # Fill NaNs in the original criteria columns (from Excel) with "No".
+    # Fill NaNs in the original criteria columns (from Excel) with False, keeping them as bool flag columns.
     # This handles higher ranks and unmatched species/subspecies.
-    df_processing[criteria_cols] = df_processing[criteria_cols].fillna("No")
+    for col in criteria_cols:
+        df_processing[col] = df_processing[col].eq(True)  # NaN (no match) is not True.
 
     rename_mapping = {
         col: col.replace("Kriterium_", "", 1).replace("_", " ")
@@ -91,31 +171,57 @@ def add_forvaltning_columns(
     df_processing.rename(columns=rename_mapping, inplace=True)
 
     # Prepare the final main output DataFrame by dropping the merge indicator and log_reason
-    df_main_output_to_save = df_processing.drop(columns=["_merge", "log_reason"])
+    df_main_output = df_processing.drop(columns=["_merge", "log_reason"])
 
-    # Save the main processed file (contains all original rows)
-    df_main_output_to_save.to_csv(output_path, index=False, sep=";")
-    print(f"Processed data (all rows) saved to: {output_path}")
+    # Select the rows to be logged from the fully processed DataFrame (df_processing, which includes log_reason)
+    # using the log_mask. Drop the _merge column from the log data, keep log_reason.
+    df_log_data = df_processing[log_mask].drop(columns=["_merge"])
 
-    # ----------------------------------------
-    # Process and Save Log Data
-    # ----------------------------------------
+    return df_main_output, df_log_data
 
-    # Select the rows to be logged from the fully processed DataFrame (df_processing, which includes log_reason)
-    # using the log_mask.
-    df_log_data = df_processing[log_mask].copy()
 
+## Function: save_log ##
+def save_log(df_log_data, log_output_path):
+    # Saves the unmatched/higher-rank rows, or prints that there were none.
     if not df_log_data.empty:
-        # Drop the _merge column from the log data, keep log_reason
-        df_log_data = df_log_data.drop(columns=["_merge"])
-
-        log_file_name = Path(output_path).stem + "_unmatched_log.csv"
-        log_output_path = Path(output_path).parent / log_file_name
         df_log_data.to_csv(log_output_path, index=False, sep=";")
         print(f"Log of {len(df_log_data)} unmatched/higher-rank rows saved to: {log_output_path}")
     else:
         print("No rows needed to be logged for unmatched/higher-rank status.")
 
+
+## Function: log_path_for ##
+def log_path_for(output_path):
+    # Returns the log file path that belongs to a processed output path.
+    return Path(output_path).parent / (Path(output_path).stem + "_unmatched_log.csv")
+
+
+## Function: add_forvaltning_columns_df ##
+def add_forvaltning_columns_df(df_csv_cleaned, excel_path, cache_dir=None):
+    # DataFrame-in/DataFrame-out variant: returns (df_main_output, df_log_data) without writing files.
+    # cache_dir enables the compiled criteria cache (see load_criteria).
+    df_criteria_bool, criteria_cols = load_criteria(excel_path, cache_dir)
+    return merge_criteria(df_csv_cleaned, df_criteria_bool, criteria_cols)
+
+
+def add_forvaltning_columns(
+    cleaned_csv_path,  # Input CSV path.
+    excel_path,  # Input Excel path.
+    output_path,  # Output CSV path.
+):
+    # --- Load data (Happy Path Only) ---
+    df_csv_cleaned = pd.read_csv(cleaned_csv_path, sep=";")
+
+    # --- Merge criteria and split out the log rows ---
+    df_main_output_to_save, df_log_data = add_forvaltning_columns_df(df_csv_cleaned, excel_path)
+
+    # Save the main processed file (contains all original rows)
+    df_main_output_to_save.to_csv(output_path, index=False, sep=";")
+    print(f"Processed data (all rows) saved to: {output_path}")
+
+    # Save the log of unmatched/higher-rank rows next to the output
+    save_log(df_log_data, log_path_for(output_path))
+
     return output_path
 
 
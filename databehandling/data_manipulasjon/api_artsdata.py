@@ -1,19 +1,32 @@
 import pandas as pd
 import requests  # External library for making HTTP requests
-from tqdm import tqdm  # Import tqdm for progress bar
+
+from . import nortaxa_client  # Pooled session, rate limiter and thread pool helpers.
+from .taxonomy_cache import OfflineCacheMissError  # Raised when offline mode meets uncached IDs.
 
 # Base URL for the NorTaxa API.
 NORTAXA_API_BASE_URL = "https://nortaxa.artsdatabanken.no/api/v1/TaxonName"
+# Taxonomic ranks extracted from the API and added as columns, in output column order.
+TAXONOMY_RANK_COLUMNS = ["Kingdom", "Phylum", "Class", "Order", "Family", "Genus"]
 
 # ----------------------------------------
 # Fetches taxon data for a given scientificNameId from the NorTaxa API.
 # ----------------------------------------
 
 
-def fetch_taxon_data(scientific_name_id):
-    api_url = f"{NORTAXA_API_BASE_URL}/ByScientificNameId/{scientific_name_id}"
+def fetch_taxon_data(scientific_name_id, session=None, rate_limiter=None, base_url=NORTAXA_API_BASE_URL):
+    api_url = f"{base_url}/ByScientificNameId/{scientific_name_id}"
+    # Use the pooled session when given, otherwise a one-off request via the requests module.
+    http = session if session is not None else requests
+    # Wait for a free slot for this host if a shared rate limiter is used.
+    if rate_limiter is not None:
+        rate_limiter.wait(api_url)
     # Make a GET request to the API with a timeout of 10 seconds.
-    response = requests.get(api_url, timeout=10)
+    try:
+        response = http.get(api_url, timeout=10)
+    except requests.RequestException:
+        # A network error for one ID should not abort a run over thousands of IDs.
+        return None
 
     # Minimal: Assumes a 200 OK response and valid JSON.
     # Does not check response.status_code or handle non-JSON responses.
@@ -32,8 +45,8 @@ def extract_hierarchy(api_data):
     hierarchy = {}  # Dictionary to store ranks: {RankName: ScientificName}.
     family_id = None  # Variable to store the scientificNameId of the Family rank.
     order_id = None  # Variable to store the scientificNameId of the Order rank.
-    # Define the desired ranks to extract. Modify if other ranks are needed.
-    desired_ranks = ["Kingdom", "Phylum", "Class", "Order", "Family", "Genus"]
+    # Define the desired ranks to extract. Modify TAXONOMY_RANK_COLUMNS if other ranks are needed.
+    desired_ranks = TAXONOMY_RANK_COLUMNS
 
     # Check if 'higherClassification' key exists in the data.
     if api_data and "higherClassification" in api_data:
@@ -78,18 +91,120 @@ def extract_norwegian_vernacular_name(rank_api_data):
     return None  # Indicate failure to find a Norwegian name.
 
 
+## Function: _fetch_with_cache ##
+def _fetch_with_cache(taxon_ids, fetch_one, cache, max_workers, desc):
+    # Returns {id: api_data or None}. Serves IDs from the cache when possible and fetches the rest.
+    # Successful fetches are written back to the cache; failed ones are retried on the next run.
+    cached = cache.get_many(taxon_ids) if cache is not None else {}
+    missing_ids = [taxon_id for taxon_id in taxon_ids if taxon_id not in cached]
+    if missing_ids and cache is not None and cache.offline:
+        # Fail fast: no network calls in offline mode.
+        raise OfflineCacheMissError(
+            f"{len(missing_ids)} scientificNameId(s) not in the taxonomy cache (offline mode), e.g. {missing_ids[:5]}"
+        )
+    fetched = nortaxa_client.fetch_concurrently(fetch_one, missing_ids, max_workers=max_workers, desc=desc, unit="ID")
+    if cache is not None:
+        cache.put_many({taxon_id: api_data for taxon_id, api_data in fetched.items() if api_data})
+    return {**cached, **fetched}
+
+
+## Function: resolve_taxonomy ##
+def resolve_taxonomy(
+    species_ids,
+    max_workers=nortaxa_client.DEFAULT_MAX_WORKERS,
+    requests_per_second=nortaxa_client.DEFAULT_REQUESTS_PER_SECOND,
+    base_url=NORTAXA_API_BASE_URL,
+    cache=None,
+):
+    # Fetches hierarchy and Norwegian family/order names for every species ID in two phases.
+    # Phase 1 fetches each species once; phase 2 fetches each distinct family/order ID once and
+    # broadcasts the names back to the species. Both phases run concurrently over one pooled session.
+    # If a TaxonomyCache is given, cached raw API data is used and only missing IDs are fetched.
+    # Returns (taxonomy_data, family_names_data, order_names_data), all keyed by integer species ID.
+    session = nortaxa_client.create_session(pool_size=max_workers)  # Keeps connections alive between calls.
+    rate_limiter = nortaxa_client.HostRateLimiter(requests_per_second)  # Shared by all threads.
+
+    ## Function: fetch_one ##
+    def fetch_one(taxon_id):
+        # Runs in a worker thread; binds the shared session, limiter and base URL.
+        return fetch_taxon_data(taxon_id, session, rate_limiter, base_url)
+
+    # --- Keep only IDs that can be converted to integers ---
+    valid_ids = []
+    for species_id in species_ids:
+        try:
+            valid_ids.append(int(species_id))  # Ensure ID is integer type for API call.
+        except ValueError:
+            continue  # Skip if ID is not a valid integer. Robust version would log this.
+
+    try:
+        # --- Phase 1: Fetch every species once ---
+        print("Fetching taxonomy data from API...")  # Add context print before bar
+        species_results = _fetch_with_cache(valid_ids, fetch_one, cache, max_workers, desc="Fetching Taxonomy")
+        taxonomy_data = {}  # Stores {species_id: {'Kingdom': '...', ...}}
+        species_rank_ids = {}  # Stores {species_id: (family_id, order_id)} for the broadcast in phase 2.
+        for current_id, species_data in species_results.items():
+            if not species_data:
+                continue  # Species fetch failed; leave all columns empty for this ID.
+            hierarchy, family_id, order_id = extract_hierarchy(species_data)  # Extract the hierarchy, Family ID, and Order ID.
+            taxonomy_data[current_id] = hierarchy  # Store the extracted hierarchy keyed by the species ID.
+            species_rank_ids[current_id] = (family_id, order_id)
+
+        # --- Phase 2: Fetch every distinct family and order once ---
+        # A few hundred families/orders cover the whole dataset, so this is far fewer calls than one per species.
+        higher_rank_ids = sorted({rank_id for ids in species_rank_ids.values() for rank_id in ids if rank_id})
+        rank_results = _fetch_with_cache(higher_rank_ids, fetch_one, cache, max_workers, desc="Fetching Families/Orders")
+    finally:
+        session.close()  # Release pooled connections, also when a fetch raises (e.g. OfflineCacheMissError).
+    # Only successful fetches get a name entry (which may itself be None if no Norwegian name exists).
+    rank_names = {
+        rank_id: extract_norwegian_vernacular_name(rank_data) for rank_id, rank_data in rank_results.items() if rank_data
+    }
+
+    # --- Broadcast family/order names back to the species ---
+    family_names_data = {}  # Stores {species_id: 'Norwegian Family Name'}
+    order_names_data = {}  # Stores {species_id: 'Norwegian Order Name'}
+    for current_id, (family_id, order_id) in species_rank_ids.items():
+        if family_id in rank_names:
+            family_names_data[current_id] = rank_names[family_id]
+        if order_id in rank_names:
+            order_names_data[current_id] = rank_names[order_id]
+
+    return taxonomy_data, family_names_data, order_names_data
+
+
 ##### Main Logic #####
 
 
-## Function: main ##
-def main(input_csv_path, output_csv_path):
-    # Main function to add taxonomy columns to the CSV.
-    # Reads input, fetches data from API, merges, and saves output.
-    # Assumes input CSV exists and contains 'validScientificNameId'.
+## Function: build_taxonomy_table ##
+def build_taxonomy_table(taxonomy_data, family_names_data, order_names_data):
+    # Builds one small DataFrame from the dicts returned by resolve_taxonomy: one row per species ID
+    # (the index) and one column per rank plus FamilieNavn/OrdenNavn. Missing ranks/names are NaN.
+    taxonomy_table = pd.DataFrame.from_dict(taxonomy_data, orient="index", columns=TAXONOMY_RANK_COLUMNS)
+    taxonomy_table["FamilieNavn"] = pd.Series(family_names_data, dtype=object)
+    taxonomy_table["OrdenNavn"] = pd.Series(order_names_data, dtype=object)
+    taxonomy_table.index = taxonomy_table.index.astype("int64")  # Keeps the join key numeric even when empty.
+    return taxonomy_table
 
-    # --- Load Input Data ---
-    # Load the CSV file processed by previous steps. Assumes ';' separator.
-    df = pd.read_csv(input_csv_path, sep=";")
+
+## Function: map_taxonomy_columns ##
+def map_taxonomy_columns(df, taxonomy_table):
+    # Adds the rank and Norwegian name columns by joining the per-ID taxonomy table (build_taxonomy_table)
+    # onto the observations in one vectorized join. Keeps the row order and index of df.
+    # Does no API calls, so the streaming pipeline can apply one prefetched table to every chunk.
+    df = df.drop(columns=list(taxonomy_table.columns), errors="ignore")  # Re-running replaces old columns.
+    return df.join(taxonomy_table, on="validScientificNameId")
+
+
+## Function: add_taxonomy_columns ##
+def add_taxonomy_columns(
+    df,
+    max_workers=nortaxa_client.DEFAULT_MAX_WORKERS,
+    requests_per_second=nortaxa_client.DEFAULT_REQUESTS_PER_SECOND,
+    cache=None,
+):
+    # DataFrame-in/DataFrame-out variant of main: fetches taxonomy and adds the rank/name columns.
+    # Returns None if 'validScientificNameId' is missing.
     # Ensure the required ID column exists (minimal check).
     if "validScientificNameId" not in df.columns:
         # Minimal error indication. Robust version would raise/log.
@@ -100,68 +215,37 @@ def main(input_csv_path, output_csv_path):
     unique_ids = df["validScientificNameId"].dropna().unique()
 
     # --- Fetch Data from API (for unique IDs) ---
-    # Dictionaries to store fetched data, keyed by species scientificNameId.
-    taxonomy_data = {}  # Stores {species_id: {'Kingdom': '...', ...}}
-    family_names_data = {}  # Stores {species_id: 'Norwegian Family Name'}
-    order_names_data = {}  # Stores {species_id: 'Norwegian Order Name'}
-
-    # --- Loop through IDs with Progress Bar ---
-    # Wrap the unique_ids iterable with tqdm for a progress bar.
-    # `desc` sets the label, `unit` clarifies what each iteration represents.
-    print("Fetching taxonomy data from API...")  # Add context print before bar
-    for species_id in tqdm(unique_ids, desc="Fetching Taxonomy", unit="ID"):
-        # Convert ID to integer if necessary, handle potential errors minimally.
-        try:
-            current_id = int(species_id)  # Ensure ID is integer type for API call.
-        except ValueError:
-            # Skip if ID is not a valid integer. Robust version would log this.
-            continue  # Move to the next ID.
-
-        # Fetch the main taxon data for the species ID.
-        species_data = fetch_taxon_data(current_id)
-        # Process the species data if the fetch was successful.
-        if species_data:
-            # Extract the hierarchy, Family ID, and Order ID.
-            hierarchy, family_id, order_id = extract_hierarchy(species_data)
-            # Store the extracted hierarchy keyed by the species ID.
-            taxonomy_data[current_id] = hierarchy
-
-            # If a valid family ID was found, fetch the family's data.
-            if family_id:
-                family_data = fetch_taxon_data(family_id)
-                # If family data fetched successfully, extract the Norwegian name.
-                if family_data:
-                    norwegian_family_name = extract_norwegian_vernacular_name(family_data)
-                    # Store the Norwegian name keyed by the original species ID.
-                    family_names_data[current_id] = norwegian_family_name
-
-            # If a valid order ID was found, fetch the order's data.
-            if order_id:
-                order_data = fetch_taxon_data(order_id)
-                # If order data fetched successfully, extract the Norwegian name.
-                if order_data:
-                    norwegian_order_name = extract_norwegian_vernacular_name(order_data)
-                    # Store the Norwegian name keyed by the original species ID.
-                    order_names_data[current_id] = norwegian_order_name
+    # max_workers sets how many calls run at once; requests_per_second caps the load on the API host.
+    taxonomy_data, family_names_data, order_names_data = resolve_taxonomy(
+        unique_ids, max_workers=max_workers, requests_per_second=requests_per_second, cache=cache
+    )
 
     # --- Merge API Data into DataFrame ---
-    # Map the fetched hierarchy data to the corresponding rows using species ID.
-    # Creates a temporary column containing the hierarchy dictionaries.
-    df["temp_hierarchy"] = df["validScientificNameId"].map(taxonomy_data)
-
-    # Extract each taxonomic rank into its own new column.
-    # Define the ranks we expect to extract from the hierarchy dict.
-    ranks_to_extract = ["Kingdom", "Phylum", "Class", "Order", "Family", "Genus"]
-    for rank in ranks_to_extract:
-        # Apply a function to get the rank value from the dict, handle missing data.
-        df[rank] = df["temp_hierarchy"].apply(lambda x: x.get(rank, None) if isinstance(x, dict) else None)
-
-    # Map the fetched Norwegian family and order names.
-    df["FamilieNavn"] = df["validScientificNameId"].map(family_names_data)
-    df["OrdenNavn"] = df["validScientificNameId"].map(order_names_data)
-
-    # Remove the temporary hierarchy dictionary column.
-    df = df.drop(columns=["temp_hierarchy"])
+    # Joins a per-ID table instead of expanding a dict per row, so the cost is one join regardless of row count.
+    taxonomy_table = build_taxonomy_table(taxonomy_data, family_names_data, order_names_data)
+    return map_taxonomy_columns(df, taxonomy_table)
+
+
+## Function: main ##
+def main(
+    input_csv_path,
+    output_csv_path,
+    max_workers=nortaxa_client.DEFAULT_MAX_WORKERS,
+    requests_per_second=nortaxa_client.DEFAULT_REQUESTS_PER_SECOND,
+    cache=None,
+):
+    # Main function to add taxonomy columns to the CSV.
+    # Reads input, fetches data from API concurrently, merges, and saves output.
+    # Assumes input CSV exists and contains 'validScientificNameId'.
+
+    # --- Load Input Data ---
+    # Load the CSV file processed by previous steps. Assumes ';' separator.
+    df = pd.read_csv(input_csv_path, sep=";")
+
+    # --- Add Taxonomy Columns ---
+    df = add_taxonomy_columns(df, max_workers=max_workers, requests_per_second=requests_per_second, cache=cache)
+    if df is None:
+        return None  # Stop processing if essential column is missing.
 
     # --- Save Result ---
     # Saves the enriched DataFrame to the specified output path.
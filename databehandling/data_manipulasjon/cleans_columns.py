@@ -2,87 +2,122 @@ import pandas as pd
 from pathlib import Path
 #
 
+##### Constants #####
+
+# List of column names to be removed. Modify this list to change which
+# columns are kept/removed.
+# Adding a name removes it, removing a name keeps it.
+COLUMNS_TO_DELETE = [
+    # Identifiers and internal system data
+    'proxyId',
+    'nodeId',
+    'institutionCode',
+    'collectionCode',
+    'datasetId',
+    'occurrenceId',
+    'catalogNumber',
+    'otherCatalogNumbers',
+    'relatedResourceId',
+    'relationshipOfResource',
+    'associatedReferences',
+    'institution',
+    'collection',
+    'datasetName',
+    'basisOfRecord',
+    # Redundant coordinates
+    'east',
+    'north',
+    # Database/metadata dates
+    'dateLastModified',
+    'dateLastIdentified',
+    # Data quality/system flags
+    'hasErrors',
+    'blocked',
+    'qualityIssue',
+    'validated',
+    # Complex/redundant fields
+    'dynamicProperties',
+    'popularNames',
+    # Less commonly needed taxonomic/observation details
+    'validScientificNameAuthorship',
+    'identifiedBy',
+    'unspontaneus',
+    'unsureIdentification',
+    'hasImage',
+    'absent',
+    'notRecovered',
+    'habitat',
+    'collectingMethod',
+    'recordNumber',
+    'fieldNumber',
+    'measurementMethod',
+    'georeferenceRemarks',
+    'preparations',
+    'typeStatus',
+    'eventTime',
+    'maximumElevationInMeters',
+    'minimumElevationInMeters',
+    'verbatimDepth',
+]
+
+# Explicit dtypes for kept columns, passed to the CSV reader so it does not have to infer them.
+# Low-cardinality text columns are read as categoricals (one copy of each distinct value).
+# Only columns that later steps never assign new values to belong here.
+# Free-text and numeric columns are declared too, so every chunk gets the same dtype whether or not
+# it happens to contain missing values (see --chunksize in behandling_main).
+RAW_COLUMN_DTYPES = {
+    'category': 'category',
+    'scientificNameRank': 'category',
+    'taxonGroupName': 'category',
+    'municipality': 'category',
+    'county': 'category',
+    'sex': 'category',
+    'behavior': 'category',
+    'validScientificName': 'str',
+    'preferredPopularName': 'str',
+    'collector': 'str',
+    'dateTimeCollected': 'str',
+    'locality': 'str',
+    'latitude': 'str',  # Comma decimals, converted later by the app/Parquet step.
+    'longitude': 'str',
+    'geometry': 'str',
+    'notes': 'str',
+    'coordinateUncertaintyInMeters': 'float64',  # Would be int in chunks without missing values otherwise.
+}
+
+
 ##### Helper Functions #####
 
+## Function: read_raw_csv ##
+def read_raw_csv(raw_csv_path, sep=';', encoding=None, chunksize=None):
+    # Reads only the columns that survive cleaning, with RAW_COLUMN_DTYPES applied while parsing.
+    # The header is read first to find the kept columns, so deleted columns are never parsed or held in memory.
+    # Returns the same columns (in file order) as reading everything and calling clean_csv_columns.
+    # With chunksize set, returns an iterator of DataFrames of at most chunksize rows instead.
+    header = pd.read_csv(raw_csv_path, sep=sep, encoding=encoding, nrows=0).columns
+    kept_columns = [col for col in header if col not in COLUMNS_TO_DELETE]
+    column_dtypes = {col: dtype for col, dtype in RAW_COLUMN_DTYPES.items() if col in kept_columns}
+    return pd.read_csv(
+        raw_csv_path, sep=sep, encoding=encoding, usecols=kept_columns, dtype=column_dtypes, chunksize=chunksize
+    )
+
+
 ## Function: clean_csv_columns ##
 def clean_csv_columns(df):
     # Minimal function: Removes columns based on a predefined list.
     # Input `df` is expected to be a pandas DataFrame.
     """Removes unnecessary columns from the DataFrame."""
-    # List of column names to be removed. Modify this list to change which
-    # columns are kept/removed.
-    # Adding a name removes it, removing a name keeps it.
-    columns_to_delete = [
-        # Identifiers and internal system data
-        'proxyId',
-        'nodeId',
-        'institutionCode',
-        'collectionCode',
-        'datasetId',
-        'occurrenceId',
-        'catalogNumber',
-        'otherCatalogNumbers',
-        'relatedResourceId',
-        'relationshipOfResource',
-        'associatedReferences',
-        'institution',
-        'collection',
-        'datasetName',
-        'basisOfRecord',
-        # Redundant coordinates
-        'east',
-        'north',
-        # Database/metadata dates
-        'dateLastModified',
-        'dateLastIdentified',
-        # Data quality/system flags
-        'hasErrors',
-        'blocked',
-        'qualityIssue',
-        'validated',
-        # Complex/redundant fields
-        'dynamicProperties',
-        'popularNames',
-        # Less commonly needed taxonomic/observation details
-        'validScientificNameAuthorship',
-        'identifiedBy',
-        'unspontaneus',
-        'unsureIdentification',
-        'hasImage',
-        'absent',
-        'notRecovered',
-        'habitat',
-        'collectingMethod',
-        'recordNumber',
-        'fieldNumber',
-        'measurementMethod',
-        'georeferenceRemarks',
-        'preparations',
-        'typeStatus',
-        'eventTime',
-        'maximumElevationInMeters',
-        'minimumElevationInMeters',
-        'verbatimDepth',
-    ]
-
-    # Drops the specified columns. errors='ignore' means it won't fail if
-    # a column in the list doesn't exist in the input DataFrame `df`.
+    # Drops the columns in COLUMNS_TO_DELETE. errors='ignore' means it won't fail if
+    # a column in the list doesn't exist in the input DataFrame `df`
+    # (e.g. when it was already skipped by read_raw_csv).
     # Change to errors='raise' to get an error for non-existent columns.
-    return df.drop(columns=columns_to_delete, errors='ignore')
+    return df.drop(columns=COLUMNS_TO_DELETE, errors='ignore')
 
 
-##### Main Logic #####
-
-## Function: main ##
-def main(raw_csv_path, cleaned_csv_path):
-    # Minimal function: Reads CSV, cleans columns, writes new CSV.
-    # Assumes `raw_csv_path` points to an existing CSV file.
-    # Assumes `cleaned_csv_path` is a valid path for writing.
-
-    # --- Load Data (Happy Path Only) ---
-    # Reads the CSV. Assumes ';' separator.
-    # Modifying sep=';' changes delimiter. Assumes file exists and is readable.
-    df_raw = pd.read_csv(raw_csv_path, sep=';')
+## Function: clean_dataframe ##
+def clean_dataframe(df_raw):
+    # DataFrame-in/DataFrame-out variant of main: drops unneeded columns and fixes individualCount.
+    # Used by behandling_main to pass frames between stages without writing CSVs.
 
     # --- Clean Columns ---
     # Calls the helper function to remove columns based on the hardcoded list.
@@ -99,6 +134,25 @@ def main(raw_csv_path, cleaned_csv_path):
     # though fillna(1) should prevent them in this specific case.
     cleaned_df['individualCount'] = cleaned_df['individualCount'].astype('Int64')
 
+    return cleaned_df
+
+
+##### Main Logic #####
+
+## Function: main ##
+def main(raw_csv_path, cleaned_csv_path):
+    # Minimal function: Reads CSV, cleans columns, writes new CSV.
+    # Assumes `raw_csv_path` points to an existing CSV file.
+    # Assumes `cleaned_csv_path` is a valid path for writing.
+
+    # --- Load Data (Happy Path Only) ---
+    # Reads the kept columns of the CSV. Assumes ';' separator.
+    # Modifying sep=';' changes delimiter. Assumes file exists and is readable.
+    df_raw = read_raw_csv(raw_csv_path, sep=';')
+
+    # --- Clean Columns and individualCount ---
+    cleaned_df = clean_dataframe(df_raw)
+
     # --- Save Result ---
     # Saves cleaned data to the specified path. Assumes path is valid/writable.
     # index=False prevents writing the DataFrame index as a column in the CSV.
@@ -114,4 +168,4 @@ def main(raw_csv_path, cleaned_csv_path):
 
 if __name__ == "__main__":
     # Minimal block, no default action for direct run.
-    pass  # Keeping pass as no default action is defined for direct run.
\ No newline at end of file
+    pass  # Keeping pass as no default action is defined for direct run.
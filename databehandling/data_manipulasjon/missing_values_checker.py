@@ -3,19 +3,114 @@ Missing Values Checker for Species Data
 Checks for missing preferredPopularName values and prompts user to fill them interactively.
 """
 
+from __future__ import annotations
+
 import pandas as pd
 import sys
 from pathlib import Path
-from typing import Optional, Tuple
 
-def check_missing_popular_names(input_csv_path: Path, output_csv_path: Path) -> Optional[Path]:
+REQUIRED_COLUMNS = ['preferredPopularName', 'validScientificName']
+
+
+def missing_popular_name_mask(df: pd.DataFrame) -> pd.Series:
+    """Return a boolean mask of rows with a missing or blank preferredPopularName."""
+    return df['preferredPopularName'].isna() | (df['preferredPopularName'].str.strip() == '')
+
+
+def prompt_popular_names(missing_counts: pd.Series) -> dict | None:
+    """
+    Prompt the user for a popular name for each species missing one.
+
+    Args:
+        missing_counts: Number of rows missing a popular name, indexed by validScientificName
+
+    Returns:
+        Mapping {validScientificName: popular name or None if skipped}, None if cancelled
+    """
+    print(f"\nFound {int(missing_counts.sum())} rows with missing preferredPopularName values.")
+    print(f"Found {len(missing_counts)} unique species missing popular names.")
+    print("Please provide popular names for the following species:")
+    print("Commands: Enter name, 's' to skip, 'q' to quit\n")
+
+    species_mapping = {}  # Store user responses for each species
+    for scientific_name, count in missing_counts.items():
+        while True:
+            response = input(f"Scientific name: '{scientific_name}' ({count} rows) - Enter popular name (or 's'/'q'): ").strip()
+
+            if response.lower() == 'q':
+                print("Operation cancelled by user.")
+                return None
+            elif response.lower() == 's':
+                print("Skipped.")
+                species_mapping[scientific_name] = None  # Mark as skipped
+                break
+            elif response:
+                species_mapping[scientific_name] = response
+                print(f"Will apply '{response}' to {count} rows")
+                break
+            else:
+                print("Please enter a valid name, 's' to skip, or 'q' to quit.")
+    return species_mapping
+
+
+def apply_popular_names(df: pd.DataFrame, species_mapping: dict) -> int:
+    """
+    Fill missing preferredPopularName values in place from a {validScientificName: name} mapping.
+
+    Returns:
+        Number of rows changed
+    """
+    missing_mask = missing_popular_name_mask(df)
+    changes_made = 0
+    for scientific_name, popular_name in species_mapping.items():
+        if popular_name is not None:  # Skip if user chose to skip this species
+            missing_matching_rows = (df['validScientificName'] == scientific_name) & missing_mask
+            df.loc[missing_matching_rows, 'preferredPopularName'] = popular_name
+            changes_made += int(missing_matching_rows.sum())
+    return changes_made
+
+
+def fill_missing_popular_names(df: pd.DataFrame) -> pd.DataFrame | None:
+    """
+    DataFrame-in/DataFrame-out variant of the check: prompt for missing names and fill them.
+
+    Args:
+        df: Observation data with preferredPopularName and validScientificName columns
+
+    Returns:
+        The same DataFrame with names filled in, None if columns are missing or the user cancelled
+    """
+    # Check if required columns exist
+    missing_cols = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing_cols:
+        print(f"Error: Missing required columns: {missing_cols}")
+        return None
+
+    # Find rows with missing preferredPopularName
+    missing_mask = missing_popular_name_mask(df)
+    if not missing_mask.any():
+        print("No missing preferredPopularName values found.")
+        return df
+
+    # Group missing rows by scientific name to avoid duplicate prompts
+    missing_counts = df.loc[missing_mask, 'validScientificName'].value_counts(sort=False)
+    species_mapping = prompt_popular_names(missing_counts)
+    if species_mapping is None:
+        return None
+
+    changes_made = apply_popular_names(df, species_mapping)
+    print(f"\nFilled {changes_made} missing popular names.")
+    return df
+
+
+def check_missing_popular_names(input_csv_path: Path, output_csv_path: Path) -> Path | None:
     """
     Check for missing preferredPopularName values and prompt user to fill them.
-    
+
     Args:
         input_csv_path: Path to input CSV file
         output_csv_path: Path where the updated CSV should be saved
-        
+
     Returns:
         Path to output file if successful, None if failed or cancelled
     """
@@ -23,105 +118,52 @@ def check_missing_popular_names(input_csv_path: Path, output_csv_path: Path) ->
         # Read CSV with semicolon delimiter
         print(f"Reading CSV file: {input_csv_path}")
         df = pd.read_csv(input_csv_path, sep=';', encoding='utf-8-sig')
-        
-        # Check if required columns exist
-        required_columns = ['preferredPopularName', 'validScientificName']
-        missing_cols = [col for col in required_columns if col not in df.columns]
-        if missing_cols:
-            print(f"Error: Missing required columns: {missing_cols}")
+
+        df = fill_missing_popular_names(df)
+        if df is None:
             return None
-            
-        # Find rows with missing preferredPopularName
-        missing_mask = df['preferredPopularName'].isna() | (df['preferredPopularName'].str.strip() == '')
-        missing_rows = df[missing_mask].copy()
-        
-        if len(missing_rows) == 0:
-            print("No missing preferredPopularName values found. Copying file to output location.")
-            # Copy file to output location even if no changes needed
-            df.to_csv(output_csv_path, sep=';', index=False, encoding='utf-8-sig')
-            return output_csv_path
-            
-        # Group missing rows by scientific name to avoid duplicate prompts
-        unique_missing_species = missing_rows['validScientificName'].unique()
-        
-        print(f"\nFound {len(missing_rows)} rows with missing preferredPopularName values.")
-        print(f"Found {len(unique_missing_species)} unique species missing popular names.")
-        print("Please provide popular names for the following species:")
-        print("Commands: Enter name, 's' to skip, 'q' to quit\n")
-        
-        changes_made = 0
-        species_mapping = {}  # Store user responses for each species
-        
-        # First, collect popular names for each unique species
-        for scientific_name in unique_missing_species:
-            count = len(missing_rows[missing_rows['validScientificName'] == scientific_name])
-            
-            while True:
-                response = input(f"Scientific name: '{scientific_name}' ({count} rows) - Enter popular name (or 's'/'q'): ").strip()
-                
-                if response.lower() == 'q':
-                    print("Operation cancelled by user.")
-                    return None
-                elif response.lower() == 's':
-                    print("Skipped.")
-                    species_mapping[scientific_name] = None  # Mark as skipped
-                    break
-                elif response:
-                    species_mapping[scientific_name] = response
-                    print(f"Will apply '{response}' to {count} rows")
-                    break
-                else:
-                    print("Please enter a valid name, 's' to skip, or 'q' to quit.")
-        
-        # Apply the collected popular names to all matching rows
-        for scientific_name, popular_name in species_mapping.items():
-            if popular_name is not None:  # Skip if user chose to skip this species
-                matching_rows = df['validScientificName'] == scientific_name
-                missing_matching_rows = matching_rows & missing_mask
-                df.loc[missing_matching_rows, 'preferredPopularName'] = popular_name
-                changes_made += len(df[missing_matching_rows])
-        
+
         # Save the updated dataframe
-        print(f"\nSaving updated CSV with {changes_made} changes to: {output_csv_path}")
+        print(f"Saving updated CSV to: {output_csv_path}")
         df.to_csv(output_csv_path, sep=';', index=False, encoding='utf-8-sig')
-        
+
         return output_csv_path
-        
+
     except Exception as e:
         print(f"Error processing CSV file: {e}")
         return None
 
-def main(input_csv_path: Path, output_csv_path: Path) -> Optional[Path]:
+def main(input_csv_path: Path, output_csv_path: Path) -> Path | None:
     """
     Main function to check and fill missing popular names.
-    
+
     Args:
         input_csv_path: Path to input CSV file
         output_csv_path: Path where the updated CSV should be saved
-        
+
     Returns:
         Path to output file if successful, None if failed
     """
     # Ensure output directory exists
     output_csv_path.parent.mkdir(parents=True, exist_ok=True)
-    
+
     return check_missing_popular_names(input_csv_path, output_csv_path)
 
 if __name__ == "__main__":
     if len(sys.argv) != 3:
         print("Usage: python missing_values_checker.py <input_csv> <output_csv>")
         sys.exit(1)
-        
+
     input_path = Path(sys.argv[1])
     output_path = Path(sys.argv[2])
-    
+
     if not input_path.exists():
         print(f"Error: Input file '{input_path}' does not exist.")
         sys.exit(1)
-        
+
     result = main(input_path, output_path)
     if result:
         print(f"Success: Updated file saved to {result}")
     else:
         print("Failed to process file.")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
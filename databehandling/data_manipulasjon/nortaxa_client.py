@@ -0,0 +1,61 @@
+##### Imports #####
+import threading  # Used to guard the shared rate limiter state across worker threads.
+import time  # Used for monotonic timestamps and sleeping between requests.
+from concurrent.futures import ThreadPoolExecutor  # Bounded thread pool for concurrent API calls.
+from urllib.parse import urlparse  # Used to find the host part of a request URL.
+
+import requests  # External library for making HTTP requests.
+from requests.adapters import HTTPAdapter  # Connection pool configuration for requests.Session.
+from tqdm import tqdm  # Progress bar for long-running fetch loops.
+
+##### Constants #####
+DEFAULT_MAX_WORKERS = 8  # Number of concurrent API calls. Increasing speeds up fetching but loads the API more.
+DEFAULT_REQUESTS_PER_SECOND = 20.0  # Max requests started per second per host. 0 or None disables rate limiting.
+
+
+##### Rate Limiting #####
+
+## Class: HostRateLimiter ##
+class HostRateLimiter:
+    # Spaces out request start times per host so at most `requests_per_second` requests start each second.
+    # Shared by all worker threads; each call to wait() reserves the next free slot for that host.
+    def __init__(self, requests_per_second=DEFAULT_REQUESTS_PER_SECOND):
+        self.min_interval = 1.0 / requests_per_second if requests_per_second else 0.0  # Seconds between two requests to one host.
+        self._next_slot = {}  # Stores {host: monotonic time when the next request may start}.
+        self._lock = threading.Lock()  # Protects _next_slot when several threads reserve slots at once.
+
+    def wait(self, url):
+        # Blocks the calling thread until the host of `url` has a free request slot.
+        if not self.min_interval:
+            return  # Rate limiting disabled.
+        host = urlparse(url).netloc  # Rate limit is tracked separately for each host.
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))  # Earliest time this request may start.
+            self._next_slot[host] = slot + self.min_interval  # Reserve the slot; the next caller starts one interval later.
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)  # Sleep outside the lock so other hosts are not blocked.
+
+
+##### Session and Concurrency Helpers #####
+
+## Function: create_session ##
+def create_session(pool_size=DEFAULT_MAX_WORKERS):
+    # Creates a requests.Session whose connection pool can hold one kept-alive connection per worker.
+    # Reusing connections avoids a new TCP/TLS handshake for every API call.
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)  # pool_maxsize should be >= number of workers.
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+## Function: fetch_concurrently ##
+def fetch_concurrently(fetch_function, items, max_workers=DEFAULT_MAX_WORKERS, desc="Fetching", unit="ID"):
+    # Calls fetch_function(item) for every item in a bounded thread pool and shows a progress bar.
+    # Returns {item: result}. Exceptions raised by fetch_function propagate to the caller.
+    items = list(items)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(tqdm(executor.map(fetch_function, items), total=len(items), desc=desc, unit=unit))
+    return dict(zip(items, results))
@@ -0,0 +1,73 @@
+##### Imports #####
+import json  # Used to store the raw API payloads as text.
+import sqlite3  # Standard library on-disk key/value store.
+import time  # Used for fetch timestamps and TTL checks.
+from pathlib import Path  # Used for the cache file location.
+
+##### Constants #####
+DEFAULT_CACHE_FILENAME = "nortaxa_taxonomy_cache.sqlite"  # File name inside the cache directory.
+DEFAULT_TTL_DAYS = 30  # Entries older than this are fetched again. Taxonomy rarely changes between weekly runs.
+SQLITE_MAX_VARIABLES = 900  # Max IDs per "IN (...)" query. SQLite's default limit is 999.
+
+
+##### Exceptions #####
+
+## Class: OfflineCacheMissError ##
+class OfflineCacheMissError(LookupError):
+    # Raised in offline mode when IDs are not in the cache, before any network call is made.
+    pass
+
+
+##### Cache #####
+
+## Class: TaxonomyCache ##
+class TaxonomyCache:
+    # Persistent cache of raw fetch_taxon_data JSON keyed by scientificNameId, stored in one SQLite file.
+    # hits/misses count lookups since the cache was opened.
+    # In offline mode expired entries are still returned, since no network is available to refresh them.
+    def __init__(self, db_path, ttl_days=DEFAULT_TTL_DAYS, offline=False):
+        self.db_path = Path(db_path)
+        self.ttl_seconds = ttl_days * 24 * 3600 if ttl_days else None  # None or 0 means entries never expire.
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)  # Creates the cache dir if not present.
+        self._connection = sqlite3.connect(str(self.db_path))
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS taxon_json ("
+            "scientific_name_id INTEGER PRIMARY KEY, "
+            "payload TEXT NOT NULL, "
+            "fetched_at REAL NOT NULL)"
+        )
+        self._connection.commit()
+
+    def get_many(self, scientific_name_ids):
+        # Returns {id: api_data} for all IDs found (and not expired). Updates the hit/miss counters.
+        ids = [int(taxon_id) for taxon_id in scientific_name_ids]
+        oldest_allowed = time.time() - self.ttl_seconds if self.ttl_seconds and not self.offline else None
+        found = {}
+        for start in range(0, len(ids), SQLITE_MAX_VARIABLES):  # Query in batches to stay below SQLite's variable limit.
+            batch = ids[start:start + SQLITE_MAX_VARIABLES]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._connection.execute(
+                f"SELECT scientific_name_id, payload, fetched_at FROM taxon_json WHERE scientific_name_id IN ({placeholders})",
+                batch,
+            )
+            for taxon_id, payload, fetched_at in rows:
+                if oldest_allowed is None or fetched_at >= oldest_allowed:
+                    found[taxon_id] = json.loads(payload)
+        self.hits += len(found)
+        self.misses += len(ids) - len(found)
+        return found
+
+    def put_many(self, api_data_by_id):
+        # Stores {id: api_data} with the current time. Existing entries are replaced.
+        now = time.time()
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO taxon_json (scientific_name_id, payload, fetched_at) VALUES (?, ?, ?)",
+            [(int(taxon_id), json.dumps(api_data), now) for taxon_id, api_data in api_data_by_id.items()],
+        )
+        self._connection.commit()
+
+    def close(self):
+        self._connection.close()
@@ -0,0 +1,139 @@
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+##### Constants #####
+
+# Columns with comma decimals in the Artskart export. Converted to float (individualCount to Int64).
+# Keep in sync with NUMERIC_COLUMNS in global_utils/data_loading.py.
+NUMERIC_COLUMNS = [
+    'individualCount',
+    'latitude',
+    'longitude',
+    'coordinateUncertaintyInMeters',
+]
+
+# Date columns and their format in the export.
+# Keep in sync with DATE_COLUMNS_FORMATS in global_utils/data_loading.py.
+DATE_COLUMNS_FORMATS = {
+    'dateTimeCollected': '%d.%m.%Y %H:%M:%S',
+}
+
+# Low-cardinality text columns stored as categoricals (one copy of each distinct value).
+# Adding a name stores it as a categorical, removing a name keeps it as plain text.
+CATEGORICAL_COLUMNS = [
+    'taxonGroupName',
+    'scientificNameRank',
+    'county',
+    'municipality',
+    'sex',
+    'Kingdom',
+    'Phylum',
+    'Class',
+    'Order',
+    'Family',
+    'Genus',
+    'OrdenNavn',
+]
+
+
+##### Helper Functions #####
+
+## Function: prepare_typed_frame ##
+def prepare_typed_frame(df):
+    # Returns a typed copy of the final frame, matching what global_utils/data_loading.py builds from the CSV:
+    # numeric columns as float/Int64, dates as datetime64, stripped text and categoricals for CATEGORICAL_COLUMNS.
+    typed_df = df.copy()
+
+    # --- Numeric Columns ---
+    # Replaces comma decimals and coerces unparseable values to NaN.
+    for col in NUMERIC_COLUMNS:
+        if col not in typed_df.columns:
+            continue
+        if not pd.api.types.is_numeric_dtype(typed_df[col]):
+            typed_df[col] = pd.to_numeric(
+                typed_df[col].astype(str).str.replace(',', '.', regex=False), errors='coerce'
+            )
+        typed_df[col] = typed_df[col].astype('Int64' if col == 'individualCount' else 'float64')
+
+    # --- Date Columns ---
+    for col, fmt in DATE_COLUMNS_FORMATS.items():
+        if col in typed_df.columns and not pd.api.types.is_datetime64_any_dtype(typed_df[col]):
+            typed_df[col] = pd.to_datetime(typed_df[col].astype(str), format=fmt, errors='coerce')
+
+    # --- Text Columns ---
+    # Strips whitespace. Columns mixing text and numbers are stored as text, as a CSV round trip would do.
+    # Columns already read as categoricals (cleans_columns.RAW_COLUMN_DTYPES) are stripped and kept categorical.
+    for col in typed_df.select_dtypes(include=['category']).columns:
+        if typed_df[col].cat.categories.inferred_type == 'string':  # Skips empty columns (no categories).
+            typed_df[col] = typed_df[col].astype(object).str.strip().astype('category')
+    for col in typed_df.select_dtypes(include=['object']).columns:
+        inferred = pd.api.types.infer_dtype(typed_df[col], skipna=True)
+        if inferred == 'empty':
+            continue  # All values missing, nothing to strip.
+        if inferred != 'string':
+            typed_df[col] = typed_df[col].where(typed_df[col].isna(), typed_df[col].astype(str))
+        typed_df[col] = typed_df[col].str.strip()
+
+    # --- Categorical Columns ---
+    for col in CATEGORICAL_COLUMNS:
+        if col in typed_df.columns:
+            typed_df[col] = typed_df[col].astype('category')
+
+    return typed_df
+
+
+## Function: _stable_schema ##
+def _stable_schema(schema):
+    # Returns the schema of the first chunk with the types that can differ between chunks pinned down:
+    # all-missing columns (null type) become string, and categoricals use int32 codes with string values.
+    fields = []
+    for field in schema:
+        if pa.types.is_null(field.type):
+            field = field.with_type(pa.string())
+        elif pa.types.is_dictionary(field.type):
+            field = field.with_type(pa.dictionary(pa.int32(), pa.string()))
+        fields.append(field)
+    return pa.schema(fields, metadata=schema.metadata)
+
+
+## Class: ParquetChunkWriter ##
+class ParquetChunkWriter:
+    # Appends typed chunks to one Parquet file (one row group per chunk), for the --chunksize pipeline.
+    # Every chunk is cast to the schema of the first one, so the file reads back as a single typed table.
+    def __init__(self, parquet_path):
+        self.parquet_path = Path(parquet_path)
+        self._schema = None
+        self._writer = None
+
+    def write(self, df):
+        table = pa.Table.from_pandas(prepare_typed_frame(df), preserve_index=False)
+        if self._writer is None:
+            self._schema = _stable_schema(table.schema)
+            self._writer = pq.ParquetWriter(self.parquet_path, self._schema)
+        self._writer.write_table(table.cast(self._schema))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            print(f"Typed Parquet saved to: {self.parquet_path}")
+
+
+##### Main Logic #####
+
+## Function: main ##
+def main(df, parquet_path):
+    # Writes the typed final frame as Parquet. The Streamlit loader prefers this file over the CSV next to it.
+    typed_df = prepare_typed_frame(df)
+    typed_df.to_parquet(parquet_path, index=False)  # Needs pyarrow.
+    print(f"Typed Parquet saved to: {parquet_path}")
+    return Path(parquet_path)
+
+
+##### Execution Entry Point #####
+
+if __name__ == "__main__":
+    # Minimal block, no default action for direct run.
+    pass
@@ -0,0 +1,93 @@
+##### Imports #####
+import argparse  # Command-line options for row/species counts.
+import sys  # Used to make the data_manipulasjon package importable when run as a script.
+import time  # Wall-clock timing of both implementations.
+from pathlib import Path  # Used to locate the databehandling directory.
+
+import numpy as np  # Random synthetic IDs.
+import pandas as pd  # DataFrame operations.
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # Add databehandling dir, as behandling_main does.
+from data_manipulasjon.api_artsdata import TAXONOMY_RANK_COLUMNS, build_taxonomy_table, map_taxonomy_columns
+
+# Micro-benchmark for the taxonomy step's column expansion (no API calls).
+# Compares the old per-row dict expansion (six .apply passes) with the per-ID table join in map_taxonomy_columns.
+# Run from the project root:
+#   uv run -- python databehandling/test_databehandling/bench_taxonomy_join.py --rows 5000000
+
+
+##### Synthetic Data #####
+
+## Function: make_lookups ##
+def make_lookups(species_count):
+    # Builds resolve_taxonomy-shaped dicts for species_count species spread over ~species_count/10 families.
+    taxonomy_data, family_names_data, order_names_data = {}, {}, {}
+    for species_id in range(1, species_count + 1):
+        family_number, order_number = species_id % max(species_count // 10, 1), species_id % 25
+        taxonomy_data[species_id] = {
+            "Kingdom": "Animalia",
+            "Phylum": "Chordata",
+            "Class": "Aves",
+            "Order": f"Order{order_number}",
+            "Family": f"Family{family_number}",
+            "Genus": f"Genus{species_id % 500}",
+        }
+        family_names_data[species_id] = f"familie{family_number}"
+        order_names_data[species_id] = f"orden{order_number}"
+    return taxonomy_data, family_names_data, order_names_data
+
+
+## Function: make_observations ##
+def make_observations(row_count, species_count, seed=0):
+    # Builds row_count observations. About 2% use IDs without taxonomy (failed fetches).
+    rng = np.random.default_rng(seed)
+    ids = rng.integers(1, int(species_count * 1.02) + 1, size=row_count)
+    return pd.DataFrame({"validScientificNameId": ids, "individualCount": rng.integers(1, 20, size=row_count)})
+
+
+##### Implementations #####
+
+## Function: legacy_map_taxonomy_columns ##
+def legacy_map_taxonomy_columns(df, taxonomy_data, family_names_data, order_names_data):
+    # The previous implementation: map a dict per row, then one Python-level .apply per rank.
+    df["temp_hierarchy"] = df["validScientificNameId"].map(taxonomy_data)
+    for rank in TAXONOMY_RANK_COLUMNS:
+        df[rank] = df["temp_hierarchy"].apply(lambda x, rank=rank: x.get(rank, None) if isinstance(x, dict) else None)
+    df["FamilieNavn"] = df["validScientificNameId"].map(family_names_data)
+    df["OrdenNavn"] = df["validScientificNameId"].map(order_names_data)
+    return df.drop(columns=["temp_hierarchy"])
+
+
+## Function: _timed ##
+def _timed(function, *args):
+    # Returns (result, seconds).
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+##### Execution Entry Point #####
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the taxonomy column expansion.")
+    parser.add_argument("--rows", type=int, default=5_000_000, help="Observation rows (default: %(default)s)")
+    parser.add_argument("--species", type=int, default=2_000, help="Distinct species IDs (default: %(default)s)")
+    args = parser.parse_args()
+
+    lookups = make_lookups(args.species)
+    observations = make_observations(args.rows, args.species)
+    print(f"{args.rows:,} rows, {args.species:,} species")
+
+    legacy_result, legacy_seconds = _timed(legacy_map_taxonomy_columns, observations.copy(), *lookups)
+    print(f"Per-row apply (old):      {legacy_seconds:8.2f} s")
+
+    joined_result, join_seconds = _timed(
+        lambda df: map_taxonomy_columns(df, build_taxonomy_table(*lookups)), observations.copy()
+    )
+    print(f"Per-ID table join (new):  {join_seconds:8.2f} s  ({legacy_seconds / join_seconds:.1f}x faster)")
+
+    # Both must give the same values (None and NaN both count as missing).
+    pd.testing.assert_frame_equal(
+        legacy_result.fillna(np.nan).astype(object), joined_result.fillna(np.nan).astype(object)
+    )
+    print("Results identical.")
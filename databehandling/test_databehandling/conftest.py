@@ -0,0 +1,74 @@
+##### Imports #####
+import json  # Used to serialize the stub API responses.
+import threading  # Runs the stub server in a background thread.
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # Minimal local HTTP server.
+
+import pytest  # Import pytest for fixtures.
+
+##### Stub NorTaxa Data #####
+# Minimal NorTaxa-like payloads keyed by scientificNameId.
+# Species 1 and 2 share family 100; all species share order 200.
+STUB_TAXA = {
+    1: {
+        "scientificNameId": 1,
+        "higherClassification": [
+            {"taxonRank": "Kingdom", "scientificName": "Animalia", "scientificNameId": 10},
+            {"taxonRank": "Order", "scientificName": "Charadriiformes", "scientificNameId": 200},
+            {"taxonRank": "Family", "scientificName": "Haematopodidae", "scientificNameId": 100},
+            {"taxonRank": "Genus", "scientificName": "Haematopus", "scientificNameId": 1000},
+        ],
+    },
+    2: {
+        "scientificNameId": 2,
+        "higherClassification": [
+            {"taxonRank": "Kingdom", "scientificName": "Animalia", "scientificNameId": 10},
+            {"taxonRank": "Order", "scientificName": "Charadriiformes", "scientificNameId": 200},
+            {"taxonRank": "Family", "scientificName": "Haematopodidae", "scientificNameId": 100},
+            {"taxonRank": "Genus", "scientificName": "Haematopus", "scientificNameId": 1000},
+        ],
+    },
+    3: {
+        "scientificNameId": 3,
+        "higherClassification": [
+            {"taxonRank": "Kingdom", "scientificName": "Animalia", "scientificNameId": 10},
+            {"taxonRank": "Order", "scientificName": "Charadriiformes", "scientificNameId": 200},
+            {"taxonRank": "Family", "scientificName": "Laridae", "scientificNameId": 101},
+            {"taxonRank": "Genus", "scientificName": "Larus", "scientificNameId": 1001},
+        ],
+    },
+    100: {"scientificNameId": 100, "vernacularNames": [{"languageIsoCode": "nb", "vernacularName": "tjeldfamilien"}]},
+    101: {"scientificNameId": 101, "vernacularNames": [{"languageIsoCode": "nn", "vernacularName": "måkefamilien"}]},
+    200: {"scientificNameId": 200, "vernacularNames": [{"languageIsoCode": "nb", "vernacularName": "vade-, måke- og alkefugler"}]},
+}
+
+
+##### Fixtures #####
+
+# --- Fixture: stub_nortaxa_server ---
+# Starts a local HTTP server answering /ByScientificNameId/<id> from STUB_TAXA (404 for unknown IDs).
+# Yields a dict with the base_url to pass to the fetch functions and the list of requested IDs.
+@pytest.fixture
+def stub_nortaxa_server():
+    requested_ids = []  # Every ID requested, in arrival order. Used to count API traffic.
+    lock = threading.Lock()  # The server handles requests on several threads.
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            taxon_id = int(self.path.rsplit("/", 1)[-1])
+            with lock:
+                requested_ids.append(taxon_id)
+            payload = STUB_TAXA.get(taxon_id)
+            self.send_response(200 if payload else 404)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(json.dumps(payload or {}).encode("utf-8"))
+
+        def log_message(self, format, *args):
+            pass  # Keep test output quiet.
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)  # Port 0 picks a free port.
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield {"base_url": f"http://127.0.0.1:{server.server_port}", "requested_ids": requested_ids}
+    server.shutdown()
+    server.server_close()
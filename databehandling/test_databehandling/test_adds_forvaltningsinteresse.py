@@ -0,0 +1,78 @@
+##### Imports #####
+import os  # Used to change the Excel file's mtime.
+
+import pandas as pd  # Import pandas for building the Excel fixture.
+import pytest  # Import pytest for testing framework features.
+
+# --- Module under test ---
+from databehandling.data_manipulasjon import adds_forvaltningsinteresse
+from databehandling.data_manipulasjon.adds_forvaltningsinteresse import load_criteria, merge_criteria
+
+##### Fixtures #####
+
+# --- Fixture: criteria_excel ---
+# Writes a small criteria sheet laid out like ArtslisteArtnasjonal (criteria columns from the 5th column).
+@pytest.fixture
+def criteria_excel(tmp_path):
+    excel_path = tmp_path / "criteria.xlsx"
+    pd.DataFrame({
+        "ValidScientificNameId": [3561, 3562],
+        "Vitenskapelig_Navn": ["Haematopus ostralegus", "Larus canus"],
+        "Norsk_Navn": ["tjeld", "fiskemåke"],
+        "Kategori": ["NT", "LC"],
+        "Kriterium_Ansvarsarter": ["X", None],
+        "Kriterium_Prioriterte_arter": [" x ", ""],
+    }).to_excel(excel_path, index=False)
+    return excel_path
+
+
+# --- Fixture: excel_reads ---
+# Counts how often the Excel file is actually parsed.
+@pytest.fixture
+def excel_reads(mocker):
+    return mocker.spy(adds_forvaltningsinteresse, "read_criteria_excel")
+
+##### Test Cases: load_criteria #####
+
+# --- Test: Criteria are booleans, and a fresh cache skips the Excel parse --- #
+def test_load_criteria_uses_fresh_cache(criteria_excel, tmp_path, excel_reads):
+    first, criteria_cols = load_criteria(criteria_excel, tmp_path / "cache")
+    second, _ = load_criteria(criteria_excel, tmp_path / "cache")
+    # Assert
+    assert criteria_cols == ["Kriterium_Ansvarsarter", "Kriterium_Prioriterte_arter"]
+    assert first.dtypes.eq(bool).all()
+    assert first.loc[3561].tolist() == [True, True] and first.loc[3562].tolist() == [False, False]
+    pd.testing.assert_frame_equal(first, second)
+    assert excel_reads.call_count == 1
+
+
+# --- Test: A new mtime with the same content is resolved by hash, changed content is re-parsed --- #
+def test_load_criteria_checks_hash_then_content(criteria_excel, tmp_path, excel_reads):
+    load_criteria(criteria_excel, tmp_path / "cache")
+    os.utime(criteria_excel, ns=(0, 10**9))  # Same bytes, different mtime.
+    load_criteria(criteria_excel, tmp_path / "cache")
+    assert excel_reads.call_count == 1
+    # Act: change the content.
+    pd.DataFrame({
+        "ValidScientificNameId": [3561], "a": [1], "b": [1], "c": [1], "Kriterium_Ansvarsarter": [None],
+    }).to_excel(criteria_excel, index=False)
+    criteria, _ = load_criteria(criteria_excel, tmp_path / "cache")
+    # Assert
+    assert excel_reads.call_count == 2
+    assert criteria.loc[3561].tolist() == [False]
+
+##### Test Cases: merge_criteria #####
+
+# --- Test: Criteria columns are bool flags; unmatched and higher-rank rows are False and logged --- #
+def test_merge_criteria_writes_bool_flags(criteria_excel):
+    criteria, criteria_cols = load_criteria(criteria_excel)
+    observations = pd.DataFrame({
+        "validScientificNameId": [3561, 3562, 9999, 4000],
+        "scientificNameRank": ["species", "species", "species", "genus"],
+    })
+    # Act
+    output, log = merge_criteria(observations, criteria, criteria_cols)
+    # Assert
+    assert output["Ansvarsarter"].dtype == bool
+    assert output["Ansvarsarter"].tolist() == [True, False, False, False]
+    assert log["log_reason"].tolist() == ["Species/subspecies ID not found in Excel", "Higher taxonomic rank"]
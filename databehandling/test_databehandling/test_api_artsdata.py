@@ -0,0 +1,106 @@
+##### Imports #####
+import pandas as pd  # Import pandas for building observation frames.
+import pytest  # Import pytest for testing framework features.
+
+# --- Module under test ---
+from databehandling.data_manipulasjon.api_artsdata import build_taxonomy_table, map_taxonomy_columns, resolve_taxonomy
+from databehandling.data_manipulasjon.nortaxa_client import HostRateLimiter
+
+##### Test Cases: resolve_taxonomy #####
+
+# --- Test: Happy Path against the local stub server --- #
+@pytest.mark.parametrize("max_workers", [1, 4], ids=["sequential", "concurrent"])
+def test_resolve_taxonomy_returns_expected_mappings(stub_nortaxa_server, max_workers):
+    # Act
+    taxonomy_data, family_names_data, order_names_data = resolve_taxonomy(
+        [1, 2, 3], max_workers=max_workers, requests_per_second=0, base_url=stub_nortaxa_server["base_url"]
+    )
+    # Assert: hierarchy per species
+    assert taxonomy_data[1] == {
+        "Kingdom": "Animalia", "Order": "Charadriiformes", "Family": "Haematopodidae", "Genus": "Haematopus"
+    }
+    assert taxonomy_data[3]["Family"] == "Laridae"
+    # Assert: vernacular names, including the Nynorsk fallback for family 101
+    assert family_names_data == {1: "tjeldfamilien", 2: "tjeldfamilien", 3: "måkefamilien"}
+    assert order_names_data == {1: "vade-, måke- og alkefugler", 2: "vade-, måke- og alkefugler", 3: "vade-, måke- og alkefugler"}
+
+
+# --- Test: Failed and invalid IDs are skipped --- #
+def test_resolve_taxonomy_skips_unknown_and_invalid_ids(stub_nortaxa_server):
+    # Act: 999 returns 404 from the stub, 'abc' is not an integer ID.
+    taxonomy_data, family_names_data, order_names_data = resolve_taxonomy(
+        [1, 999, "abc"], requests_per_second=0, base_url=stub_nortaxa_server["base_url"]
+    )
+    # Assert
+    assert set(taxonomy_data) == {1}
+    assert set(family_names_data) == {1}
+    assert set(order_names_data) == {1}
+
+
+# --- Test: Float IDs (from a CSV column with NaNs) map to integer keys --- #
+def test_resolve_taxonomy_accepts_float_ids(stub_nortaxa_server):
+    taxonomy_data, _, _ = resolve_taxonomy([1.0, 3.0], requests_per_second=0, base_url=stub_nortaxa_server["base_url"])
+    assert set(taxonomy_data) == {1, 3}
+
+
+# --- Test: Each family/order is fetched only once --- #
+def test_resolve_taxonomy_fetches_each_higher_rank_once(stub_nortaxa_server):
+    # Act: three species sharing two families and one order.
+    resolve_taxonomy([1, 2, 3], max_workers=4, requests_per_second=0, base_url=stub_nortaxa_server["base_url"])
+    # Assert: 3 species + families 100/101 + order 200, each requested exactly once.
+    assert sorted(stub_nortaxa_server["requested_ids"]) == [1, 2, 3, 100, 101, 200]
+
+##### Test Cases: map_taxonomy_columns #####
+
+# --- Test: Per-ID table is joined onto every observation, keeping order and index --- #
+def test_map_taxonomy_columns_joins_per_id_table():
+    taxonomy_table = build_taxonomy_table(
+        {1: {"Kingdom": "Animalia", "Family": "Haematopodidae"}, 3: {"Kingdom": "Animalia", "Family": "Laridae"}},
+        {1: "tjeldfamilien", 3: "måkefamilien"},
+        {1: None},  # Species 1 has an order without a Norwegian name; species 3 has no order entry.
+    )
+    observations = pd.DataFrame(
+        {"validScientificNameId": [3, 1, 999, 3], "individualCount": [1, 2, 3, 4]}, index=[10, 11, 12, 13]
+    )
+    # Act
+    result = map_taxonomy_columns(observations, taxonomy_table)
+    # Assert
+    assert list(result.index) == [10, 11, 12, 13]
+    assert list(result.columns) == [
+        "validScientificNameId", "individualCount", "Kingdom", "Phylum", "Class", "Order", "Family", "Genus",
+        "FamilieNavn", "OrdenNavn",
+    ]
+    assert result["Family"].tolist()[:2] == ["Laridae", "Haematopodidae"]
+    assert result["FamilieNavn"].tolist()[:2] == ["måkefamilien", "tjeldfamilien"]
+    assert result.loc[12, ["Kingdom", "FamilieNavn", "OrdenNavn"]].isna().all()  # Unknown ID gets empty columns.
+
+
+# --- Test: Empty lookups still add the columns --- #
+def test_map_taxonomy_columns_with_no_fetched_taxa():
+    observations = pd.DataFrame({"validScientificNameId": [1.0, None]})  # Float IDs, as read from a column with NaNs.
+    result = map_taxonomy_columns(observations, build_taxonomy_table({}, {}, {}))
+    assert result[["Kingdom", "Genus", "FamilieNavn", "OrdenNavn"]].isna().all().all()
+
+##### Test Cases: HostRateLimiter #####
+
+# --- Test: Slots are spaced per host, not globally --- #
+def test_host_rate_limiter_spaces_requests_per_host(mocker):
+    # Arrange: freeze the clock and record sleeps instead of sleeping.
+    mocker.patch("databehandling.data_manipulasjon.nortaxa_client.time.monotonic", return_value=100.0)
+    sleep_mock = mocker.patch("databehandling.data_manipulasjon.nortaxa_client.time.sleep")
+    limiter = HostRateLimiter(requests_per_second=10)
+    # Act
+    limiter.wait("https://host-a/x")
+    limiter.wait("https://host-a/y")
+    limiter.wait("https://host-b/z")
+    # Assert: only the second call to host-a waits one interval (0.1 s).
+    assert [call.args[0] for call in sleep_mock.call_args_list] == [pytest.approx(0.1)]
+
+
+# --- Test: Disabled limiter never sleeps --- #
+def test_host_rate_limiter_disabled(mocker):
+    sleep_mock = mocker.patch("databehandling.data_manipulasjon.nortaxa_client.time.sleep")
+    limiter = HostRateLimiter(requests_per_second=0)
+    for _ in range(5):
+        limiter.wait("https://host-a/x")
+    sleep_mock.assert_not_called()
@@ -0,0 +1,25 @@
+##### Imports #####
+import pandas as pd  # Import pandas for reading the comparison frame.
+
+# --- Module under test ---
+from databehandling.data_manipulasjon.cleans_columns import clean_csv_columns, read_raw_csv
+
+##### Test Cases #####
+
+# --- Test: Pruned read returns the cleaned columns with declared dtypes --- #
+def test_read_raw_csv_matches_full_read(tmp_path):
+    raw_csv_path = tmp_path / "raw.csv"
+    raw_csv_path.write_text(
+        "proxyId;category;validScientificNameId;scientificNameRank;hasErrors;individualCount\n"
+        "1;LC;3561;species;False;2\n"
+        "2;NT;3562;genus;False;\n",
+        encoding="utf-8",
+    )
+    # Act
+    pruned = read_raw_csv(raw_csv_path)
+    # Assert
+    expected = clean_csv_columns(pd.read_csv(raw_csv_path, sep=";"))
+    assert list(pruned.columns) == list(expected.columns)
+    assert isinstance(pruned["category"].dtype, pd.CategoricalDtype)
+    assert isinstance(pruned["scientificNameRank"].dtype, pd.CategoricalDtype)
+    assert pruned["category"].astype(object).tolist() == expected["category"].tolist()
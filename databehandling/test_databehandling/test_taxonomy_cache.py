@@ -0,0 +1,79 @@
+##### Imports #####
+import pytest  # Import pytest for testing framework features.
+import requests  # Import requests to watch the pooled session being closed.
+
+# --- Module under test ---
+from databehandling.data_manipulasjon.api_artsdata import resolve_taxonomy
+from databehandling.data_manipulasjon.taxonomy_cache import OfflineCacheMissError, TaxonomyCache
+
+##### Fixtures #####
+
+# --- Fixture: cache_path ---
+# Provides a fresh SQLite cache file location per test.
+@pytest.fixture
+def cache_path(tmp_path):
+    return tmp_path / "cache" / "taxonomy.sqlite"
+
+##### Test Cases: TaxonomyCache #####
+
+# --- Test: Stored payloads are returned and counted as hits --- #
+def test_cache_round_trip_and_counters(cache_path):
+    cache = TaxonomyCache(cache_path)
+    cache.put_many({1: {"scientificNameId": 1}, 2: {"scientificNameId": 2}})
+    # Act
+    found = cache.get_many([1, 2, 3])
+    # Assert
+    assert found == {1: {"scientificNameId": 1}, 2: {"scientificNameId": 2}}
+    assert (cache.hits, cache.misses) == (2, 1)
+    cache.close()
+
+
+# --- Test: Entries persist across cache instances --- #
+def test_cache_persists_on_disk(cache_path):
+    first = TaxonomyCache(cache_path)
+    first.put_many({1: {"a": 1}})
+    first.close()
+    second = TaxonomyCache(cache_path)
+    assert second.get_many([1]) == {1: {"a": 1}}
+    second.close()
+
+
+# --- Test: Expired entries are misses, except in offline mode --- #
+def test_cache_ttl_expiry(cache_path, mocker):
+    time_mock = mocker.patch("databehandling.data_manipulasjon.taxonomy_cache.time.time", return_value=1_000_000.0)
+    cache = TaxonomyCache(cache_path, ttl_days=1)
+    cache.put_many({1: {"a": 1}})
+    # Act: two days later.
+    time_mock.return_value = 1_000_000.0 + 2 * 24 * 3600
+    # Assert
+    assert cache.get_many([1]) == {}
+    cache.close()
+    offline_cache = TaxonomyCache(cache_path, ttl_days=1, offline=True)
+    assert offline_cache.get_many([1]) == {1: {"a": 1}}
+    offline_cache.close()
+
+##### Test Cases: resolve_taxonomy with cache #####
+
+# --- Test: A second run is served from the cache without API calls --- #
+def test_resolve_taxonomy_rerun_uses_cache(stub_nortaxa_server, cache_path):
+    base_url = stub_nortaxa_server["base_url"]
+    cache = TaxonomyCache(cache_path)
+    first_result = resolve_taxonomy([1, 2, 3], requests_per_second=0, base_url=base_url, cache=cache)
+    requests_after_first_run = len(stub_nortaxa_server["requested_ids"])
+    # Act
+    second_result = resolve_taxonomy([1, 2, 3], requests_per_second=0, base_url=base_url, cache=cache)
+    # Assert
+    assert second_result == first_result
+    assert len(stub_nortaxa_server["requested_ids"]) == requests_after_first_run
+    cache.close()
+
+
+# --- Test: Offline mode fails fast on uncached IDs, still closing the pooled session --- #
+def test_resolve_taxonomy_offline_miss_raises(stub_nortaxa_server, cache_path, mocker):
+    close_spy = mocker.spy(requests.Session, "close")
+    cache = TaxonomyCache(cache_path, offline=True)
+    with pytest.raises(OfflineCacheMissError, match="not in the taxonomy cache"):
+        resolve_taxonomy([1], requests_per_second=0, base_url=stub_nortaxa_server["base_url"], cache=cache)
+    assert stub_nortaxa_server["requested_ids"] == []  # No network calls were made.
+    assert close_spy.call_count == 1
+    cache.close()
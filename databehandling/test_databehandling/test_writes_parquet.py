@@ -0,0 +1,65 @@
+##### Imports #####
+import pandas as pd  # Import pandas for building test frames.
+
+# --- Module under test ---
+from databehandling.data_manipulasjon.writes_parquet import ParquetChunkWriter, main, prepare_typed_frame
+
+##### Fixtures #####
+
+# --- Helper: _final_frame ---
+# Builds a small frame shaped like the pipeline's final taxonomy output (comma decimals, string dates).
+def _final_frame():
+    return pd.DataFrame({
+        "individualCount": pd.array([2, 1], dtype="Int64"),
+        "latitude": ["69,307254", "69,1"],
+        "longitude": ["16,0", "nan"],
+        "coordinateUncertaintyInMeters": [25.0, None],
+        "dateTimeCollected": ["01.05.2023 00:00:00", "ikke en dato"],
+        "preferredPopularName": [" kjøttmeis ", "blåmeis"],
+        "OrdenNavn": ["spurvefugler", "spurvefugler"],
+        "Prioriterte arter": ["Yes", None],
+        "locality": ["Andenes", 123],
+    })
+
+##### Test Cases #####
+
+# --- Test: Numbers, dates, text and categoricals get their final dtypes --- #
+def test_prepare_typed_frame_dtypes():
+    typed = prepare_typed_frame(_final_frame())
+    # Assert
+    assert typed["latitude"].tolist() == [69.307254, 69.1]
+    assert typed["longitude"].isna().tolist() == [False, True]
+    assert str(typed["individualCount"].dtype) == "Int64"
+    assert pd.api.types.is_datetime64_any_dtype(typed["dateTimeCollected"])
+    assert typed["dateTimeCollected"].isna().tolist() == [False, True]
+    assert typed["preferredPopularName"].tolist() == ["kjøttmeis", "blåmeis"]
+    assert isinstance(typed["OrdenNavn"].dtype, pd.CategoricalDtype)
+    assert typed["locality"].tolist() == ["Andenes", "123"]  # Mixed column stored as text.
+
+
+# --- Test: Parquet file restores the typed columns --- #
+def test_main_round_trip(tmp_path):
+    parquet_path = main(_final_frame(), tmp_path / "final_taxonomy.parquet")
+    # Act
+    loaded = pd.read_parquet(parquet_path)
+    # Assert
+    pd.testing.assert_frame_equal(loaded, prepare_typed_frame(_final_frame()))
+
+
+# --- Test: Chunks with differing inferred types append to one readable file --- #
+def test_chunk_writer_unifies_chunk_schemas(tmp_path):
+    parquet_path = tmp_path / "chunked.parquet"
+    first, second = _final_frame(), _final_frame()
+    first["FamilieNavn"] = None  # All missing in the first chunk (null type).
+    second["FamilieNavn"] = ["meiser", "meiser"]
+    second["OrdenNavn"] = ["spurvefugler", "hønsefugler"]  # Different categories than the first chunk.
+    writer = ParquetChunkWriter(parquet_path)
+    # Act
+    writer.write(first)
+    writer.write(second)
+    writer.close()
+    loaded = pd.read_parquet(parquet_path)
+    # Assert
+    assert len(loaded) == 4
+    assert loaded["FamilieNavn"].tolist()[2:] == ["meiser", "meiser"]
+    assert loaded["OrdenNavn"].astype(object).tolist() == ["spurvefugler"] * 3 + ["hønsefugler"]
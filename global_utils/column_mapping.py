@@ -27,6 +27,8 @@ COLUMN_NAME_MAPPING = {
     # Event & Recording
     "eventDate": "Dato",  # Ikke bruk
     "dateTimeCollected": "Innsamlingsdato/-tid",
+    "dateTimeCollectedYear": "År",  # Derived at load time (global_utils/date_columns.py).
+    "dateTimeCollectedMonth": "Måned",  # Derived by the pivot cube (mapper_streamlit/Pivot_Tabell/pivot_kube.py).
     "recordedBy": "Registrert Av",
     "collector": "Innsamler/Observatør",
     "basisOfRecord": "Basis for Registrering",
@@ -2,7 +2,13 @@
 ##### Imports #####
 import streamlit as st  # Used for caching decorator.
 import pandas as pd  # Used for DataFrame creation and manipulation.
-# import numpy as np # Not needed if using errors='coerce'
+import hashlib  # Used to fingerprint uploaded file contents.
+import numpy as np  # Used to remap categorical codes.
+from pathlib import Path  # Used to find the typed Parquet file next to a CSV path.
+from global_utils.status_flags import convert_status_flag_columns  # Converts status flag columns to bool.
+from global_utils.date_columns import add_date_part_columns, date_day_column, date_year_column  # Adds the int64 day/year columns for each date column.
+from global_utils.filtering.text_index import build_text_index  # Builds the inverted index for the text search.
+from global_utils.spatial_index import build_spatial_index  # Builds the grid index over the coordinates.
 
 ##### Constants #####
 # Define columns expected to be numeric, based ONLY on fuglsortland_taxonomy.csv header.
@@ -20,24 +26,108 @@ DATE_COLUMNS_FORMATS = {
     "dateTimeCollected": "%d.%m.%Y %H:%M:%S",  # This column name is present in the CSV header. Expected format DD.MM.YYYY HH:MM:SS.
 }
 
+# Text columns with at most this fraction of distinct values (relative to the row count) are converted to 'category'.
+# Species, family, order, collector, municipality, category codes etc. are far below it; free text (notes) is not.
+CATEGORY_MAX_UNIQUE_FRACTION = 0.5
+
+# int64 day/year columns added for each date column at load time (see global_utils/date_columns.py).
+DERIVED_DATE_COLUMNS = [
+    derived for col in DATE_COLUMNS_FORMATS for derived in (date_day_column(col), date_year_column(col))
+]
+
+
+##### Helper Functions #####
+
+# --- Function: _typed_parquet_source ---
+# Returns the Parquet file to read instead of file_input, or None to read file_input as CSV.
+# Uploaded .parquet files are used directly. For a CSV path, the sibling *.parquet written by the
+# databehandling pipeline is used if it exists and is not older than the CSV (an edited CSV wins).
+def _typed_parquet_source(file_input):
+    if isinstance(file_input, (str, Path)):  # Local file path.
+        file_path = Path(file_input)
+        if file_path.suffix == ".parquet":
+            return file_path
+        parquet_path = file_path.with_suffix(".parquet")  # Pipeline writes X_taxonomy.parquet next to X_taxonomy.csv.
+        if parquet_path.exists() and (not file_path.exists() or parquet_path.stat().st_mtime >= file_path.stat().st_mtime):
+            return parquet_path
+        return None
+    if getattr(file_input, "name", "").endswith(".parquet"):  # Uploaded file buffer.
+        return file_input
+    return None
+
+
+# --- Function: _dataset_fingerprint ---
+# Returns a short string identifying the loaded dataset. Stored in df.attrs["dataset_fingerprint"], so per-session
+# caches (e.g. filter masks) can tell datasets apart without hashing the DataFrame on every rerun.
+# Local files: path, mtime and size of the file actually read. Uploaded buffers: SHA-1 of the contents.
+def _dataset_fingerprint(file_input, parquet_source):
+    source = parquet_source if parquet_source is not None else file_input
+    if isinstance(source, (str, Path)):
+        stat = Path(source).stat()
+        return f"{Path(source).resolve()}:{stat.st_mtime_ns}:{stat.st_size}"
+    return hashlib.sha1(source.getvalue()).hexdigest()  # Uploaded files (BytesIO-like) hold their bytes in memory.
+
+
+# --- Function: _comma_decimal_to_numeric ---
+# Converts a text column with comma or period decimals to numbers (NaN where unparseable). Works on the distinct
+# values only (factorize once), like _strip_and_categorize: coordinates repeat for every observation at a locality,
+# so the string replace and parse run once per locality instead of once per row.
+def _comma_decimal_to_numeric(series):
+    codes, uniques = pd.factorize(series)  # codes == -1 for missing values.
+    numbers = pd.to_numeric(pd.Series(uniques, dtype=object).astype(str).str.replace(",", ".", regex=False), errors="coerce")
+    values = numbers.to_numpy()[codes]  # Keeps int64 when every value is an integer, as before.
+    if (codes == -1).any():
+        values = np.where(codes == -1, np.nan, values.astype(float))  # Missing values stay missing.
+    return pd.Series(values, index=series.index, name=series.name)
+
+
+# --- Function: _strip_and_categorize ---
+# Returns the object column 'series' with whitespace stripped from its strings (if strip) and converted to
+# 'category' if its distinct-value count is within CATEGORY_MAX_UNIQUE_FRACTION of the rows.
+# Works on the distinct values only: factorize once (hash pass, codes == -1 for missing), strip the uniques
+# in one vectorized call, then rebuild the column from the codes. As before, non-string values in a column
+# that contains strings become missing when stripped.
+def _strip_and_categorize(series, strip):
+    codes, uniques = pd.factorize(series)
+    uniques = pd.Series(uniques, dtype=object)
+    if strip and uniques.map(type).eq(str).any():  # Check if strings present before strip.
+        uniques = uniques.str.strip()  # One vectorized strip over the distinct values.
+    if len(uniques) > CATEGORY_MAX_UNIQUE_FRACTION * len(series):
+        values = pd.Series(uniques.to_numpy()[codes], index=series.index, name=series.name, dtype=object)  # One entry per row.
+        return values.where(codes != -1)  # Missing values (code -1) stay missing.
+    categories = pd.Index(uniques.dropna().unique())  # Stripping may merge values ("a " and "a").
+    # Old code -> new code (-1 where the stripped value is missing). The appended -1 maps code -1 (missing) to missing.
+    category_codes = np.append(categories.get_indexer(uniques), -1)
+    new_codes = category_codes[codes]
+    return pd.Series(pd.Categorical.from_codes(new_codes, categories), index=series.index, name=series.name)
+
 
 ##### Functions #####
 @st.cache_data  # Caches the output. Re-runs use cached data if input is unchanged. Improves performance for repeated loads of the same file.
-def load_and_prepare_data(file_input):  # Loads data from CSV and performs minimal preprocessing. Assumes file_input is valid path/buffer and columns exist.
+def load_and_prepare_data(file_input):  # Loads data from Parquet or CSV and performs minimal preprocessing. Assumes file_input is valid path/buffer and columns exist.
     # --- Load Data ---
-    # Reads the CSV file using the provided path or buffer. Assumes ';' delimiter and that the file loads successfully.
-    df = pd.read_csv(file_input, delimiter=";")  # Loads data into a pandas DataFrame. Failure here will raise an exception.
+    # Prefers the typed Parquet file from the pipeline: numbers, dates and stripped text are already stored with
+    # their final dtypes, so the conversion steps below are skipped for those columns.
+    parquet_source = _typed_parquet_source(file_input)
+    if parquet_source is not None:
+        df = pd.read_parquet(parquet_source)  # Needs pyarrow. Categorical and datetime64 dtypes are restored from the file.
+    else:
+        # Reads the CSV file using the provided path or buffer. Assumes ';' delimiter and that the file loads successfully.
+        df = pd.read_csv(file_input, delimiter=";")  # Loads data into a pandas DataFrame. Failure here will raise an exception.
 
     # --- Perform Minimal Preprocessing Steps ---
 
     # --- Convert Numeric Columns ---
     # Iterates through the columns listed in NUMERIC_COLUMNS. Assumes each column exists in df.
     for col in NUMERIC_COLUMNS:  # Loop through the predefined numeric column names.
-        # Convert column to string, replace comma decimal with period, then convert to numeric.
-        # *** ADDED errors='coerce' *** Handles non-numeric strings (like "nan") by converting them to NaN.
-        numeric_series = pd.to_numeric(
-            df[col].astype(str).str.replace(",", ".", regex=False), errors="coerce"
-        )  # Replaces ',' with '.', converts, coerces errors to NaN.
+        if pd.api.types.is_numeric_dtype(df[col]):
+            if parquet_source is not None:
+                continue  # Already typed by the pipeline.
+            numeric_series = df[col]  # read_csv already parsed it (period decimals); no string round trip needed.
+        else:
+            # Replace comma decimal with period, then convert to numeric, on the distinct values only.
+            # Non-numeric strings (like "nan") become NaN.
+            numeric_series = _comma_decimal_to_numeric(df[col])
         df[col] = numeric_series  # Assign the converted series (potentially with NaNs) back to the DataFrame column.
 
         if col == "individualCount":  # Specific handling for 'individualCount'. Assumes it exists.
@@ -51,18 +141,47 @@ def load_and_prepare_data(file_input):  # Loads data from CSV and performs minim
     # --- Convert Date/Time Columns ---
     # Iterates through the date columns listed in DATE_COLUMNS_FORMATS. Assumes each column exists in df.
     for col, fmt in DATE_COLUMNS_FORMATS.items():  # Loop through the predefined date column names and their formats.
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            continue  # Already parsed (typed Parquet).
         # Converts the column to datetime objects using the specified format. Assumes data matches the format; mismatches will raise an error.
         # *** Consider adding errors='coerce' here too for robustness ***
         df[col] = pd.to_datetime(df[col].astype(str), format=fmt, errors="coerce")  # Converts first to string, then to datetime. Coerce date errors.
 
-    # --- Strip Whitespace from Object (String) Columns ---
-    # Iterates through all columns identified by pandas as 'object' dtype (usually strings).
-    for col_name in df.select_dtypes(include=["object"]).columns:  # Select columns likely containing strings.
-        # Removes leading/trailing whitespace from string data in the column. Assumes the column contains string-like data amenable to .str accessor.
-        if isinstance(df[col_name].dtype, pd.StringDtype) or df[col_name].apply(type).eq(str).any():  # Check if strings present before strip
-            df[col_name] = df[col_name].str.strip()  # Applies string strip operation.
+    # --- Add Day/Year Columns ---
+    # The canonical datetime64 column above is parsed once here. Filters and dashboards use it, or the int64
+    # <col>Day / <col>Year columns added below, instead of parsing the dates again on every rerun.
+    for col in DATE_COLUMNS_FORMATS:
+        add_date_part_columns(df, col)
+
+    # --- Convert Status Flag Columns ---
+    # Stores each status flag as a bool column (older files hold "Yes"/"No" strings), so filters and
+    # dashboard counts use vectorized boolean masks. No-op for files that already store bools.
+    convert_status_flag_columns(df)
+
+    # --- Strip Whitespace and Convert Text Columns to Categorical ---
+    # Every object (text) column is stripped (the CSV path; the typed Parquet file is already stripped) and, when it
+    # has few distinct values, stored as 'category': one string per distinct value plus small integer codes, instead
+    # of one Python string per row. This also speeds up isin/groupby/value_counts in filters and the dashboard.
+    for col_name in df.select_dtypes(include=["object"]).columns:
+        df[col_name] = _strip_and_categorize(df[col_name], strip=parquet_source is None)
 
     # --- Geometry Parsing (Placeholder) ---
     # No geometry parsing implemented in this minimal version. Column 'geometry' remains as read from CSV.
 
+    # --- Dataset Fingerprint ---
+    # Kept through pickling (st.cache_data) and row filtering, so downstream caches can key on it.
+    df.attrs["dataset_fingerprint"] = _dataset_fingerprint(file_input, parquet_source)
+
     return df  # Returns the preprocessed DataFrame, now with NaN for unparseable numbers.
+
+
+@st.cache_resource  # Caches the built index object itself (not a pickled copy), keyed by file_input like load_and_prepare_data.
+def load_text_index(file_input):  # Builds the inverted text-search index for the data loaded from file_input, once per file.
+    # Uses the cached DataFrame from load_and_prepare_data, so the index row labels match the loaded data.
+    return build_text_index(load_and_prepare_data(file_input))
+
+
+@st.cache_resource  # Caches the built index object itself, keyed by file_input like load_text_index.
+def load_spatial_index(file_input):  # Builds the grid index over latitude/longitude for the data loaded from file_input, once per file.
+    # Uses the cached DataFrame from load_and_prepare_data, so the index row labels match the loaded data.
+    return build_spatial_index(load_and_prepare_data(file_input))
@@ -0,0 +1,90 @@
+# global_utils/dataset_manager.py
+##### Imports #####
+import streamlit as st  # Used for session state.
+
+from global_utils.filtering.filter_logic import apply_filters, filter_state_key  # Filtering and its cache key.
+
+##### Constants #####
+DATASET_MANAGER_KEY = 'dataset_manager'  # Session state key for the DatasetManager of this session.
+# Session state keys also written by register_dataset, for pages and helpers that read them directly.
+LOADED_DATA_KEY = 'loaded_data'  # The loaded, unfiltered DataFrame.
+TEXT_INDEX_KEY = 'loaded_text_index'  # TextIndex, read by filter_logic._general_text_mask.
+SPATIAL_INDEX_KEY = 'loaded_spatial_index'  # SpatialIndex, read by the Kart page.
+
+
+##### Helper Functions #####
+
+# --- Function: _dataset_identity ---
+# Identifies a loaded DataFrame: (dataset fingerprint, row count), set by load_and_prepare_data. st.cache_data returns
+# a new copy of the same data on every call, so object identity is only used for data without a fingerprint.
+def _dataset_identity(data):
+    dataset = data.attrs.get("dataset_fingerprint")
+    return (dataset, len(data)) if dataset is not None else id(data)
+
+
+##### Classes #####
+
+# --- Class: DatasetManager ---
+# Session-scoped holder of the loaded DataFrame, its derived indexes and the last filter result.
+# The filter result is keyed by filter_state_key (dataset fingerprint + canonical filter state), so every page that
+# shows the same filters reuses one filtered view instead of running apply_filters again after a page switch.
+# Callers must not modify the returned frames: they are shared between reruns and pages.
+class DatasetManager:
+    def __init__(self, data, text_index=None, spatial_index=None):
+        self.data = data  # Loaded, unfiltered DataFrame (original column names).
+        self.text_index = text_index  # TextIndex of data, or None.
+        self.spatial_index = spatial_index  # SpatialIndex of data, or None.
+        self._filtered = None  # (filter_state_key, apply_filters result) of the last filter state.
+
+    # --- Method: holds ---
+    # True if data is (a copy of) the DataFrame this manager was created for.
+    def holds(self, data):
+        return _dataset_identity(data) == _dataset_identity(self.data)
+
+    # --- Method: filtered ---
+    # Returns apply_filters(self.data) for the current widget values, reused while the filter state is unchanged.
+    # Data without a fingerprint has no filter state key and is filtered on every call.
+    def filtered(self):
+        key = filter_state_key(self.data)
+        if key is None:
+            return apply_filters(self.data)  # Unknown dataset; cannot cache safely.
+        if self._filtered is not None and self._filtered[0] == key:
+            return self._filtered[1]  # Same filters as on the last page/rerun.
+        result = apply_filters(self.data)
+        self._filtered = (key, result)  # Only the last result is kept, so memory stays one filtered view per session.
+        return result
+
+
+##### Functions #####
+
+# --- Function: register_dataset ---
+# Stores the loaded data and its indexes in this session's DatasetManager (kept, with its filter result, while the
+# same dataset is registered again) and returns the manager. Also sets the 'loaded_*' session state keys.
+# Called by Oversikt.py after loading.
+def register_dataset(data, text_index=None, spatial_index=None):
+    manager = st.session_state.get(DATASET_MANAGER_KEY)
+    if manager is None or not manager.holds(data):
+        manager = DatasetManager(data, text_index, spatial_index)  # New dataset: drop the old filter result.
+        st.session_state[DATASET_MANAGER_KEY] = manager
+    else:
+        manager.text_index, manager.spatial_index = text_index, spatial_index  # Same cached index objects.
+    st.session_state[LOADED_DATA_KEY] = manager.data
+    st.session_state[TEXT_INDEX_KEY] = manager.text_index
+    st.session_state[SPATIAL_INDEX_KEY] = manager.spatial_index
+    return manager
+
+
+# --- Function: get_dataset_manager ---
+# Returns this session's DatasetManager, or None before Oversikt.py has loaded data.
+def get_dataset_manager():
+    return st.session_state.get(DATASET_MANAGER_KEY)
+
+
+# --- Function: filtered_view ---
+# Returns the filtered data for 'data' (the loaded DataFrame): the DatasetManager's shared filter result when the
+# manager holds this dataset, otherwise apply_filters(data). Pages call this instead of apply_filters.
+def filtered_view(data):
+    manager = get_dataset_manager()
+    if manager is not None and manager.holds(data):
+        return manager.filtered()
+    return apply_filters(data)
@@ -0,0 +1,86 @@
+# global_utils/date_columns.py
+##### Imports #####
+import numpy as np  # Used for datetime64 bounds and int64 day/year arrays.
+import pandas as pd  # Used for Series/DataFrame operations.
+
+##### Constants #####
+# Value stored in the int64 day/year columns for missing dates (the integer value of NaT).
+MISSING_DATE_INT = np.iinfo(np.int64).min
+
+
+##### Functions #####
+
+# --- Function: date_day_column ---
+# Name of the int64 day column derived from date_col: days since 1970-01-01.
+def date_day_column(date_col):
+    return f"{date_col}Day"
+
+
+# --- Function: date_year_column ---
+# Name of the int64 year column derived from date_col: calendar year.
+def date_year_column(date_col):
+    return f"{date_col}Year"
+
+
+# --- Function: date_first_day_column ---
+# Name of the int64 column holding the earliest day (as date_day_column) of each group in grouped frames.
+def date_first_day_column(date_col):
+    return f"{date_col}FirstDay"
+
+
+# --- Function: date_last_day_column ---
+# Name of the int64 column holding the latest day (as date_day_column) of each group in grouped frames.
+def date_last_day_column(date_col):
+    return f"{date_col}LastDay"
+
+
+# --- Function: add_date_part_columns ---
+# Adds the int64 day and year columns for the datetime64 column date_col, in place. Missing dates get MISSING_DATE_INT.
+# Called once at load time, so filters and dashboards compare integers instead of parsing the dates again.
+def add_date_part_columns(df, date_col):
+    days = df[date_col].to_numpy(dtype="datetime64[D]")  # Truncate to whole days (NaT stays NaT).
+    missing = np.isnat(days)
+    years = days.astype("datetime64[Y]").astype(np.int64) + 1970  # datetime64[Y] counts years since 1970.
+    years[missing] = MISSING_DATE_INT
+    df[date_day_column(date_col)] = days.astype(np.int64)  # NaT becomes MISSING_DATE_INT.
+    df[date_year_column(date_col)] = years
+    return df
+
+
+# --- Function: as_datetime ---
+# Returns the date column as datetime64. Loaded data is already typed and returned as-is; other input
+# (e.g. test frames with date strings) is parsed with errors coerced to NaT.
+def as_datetime(series):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    return pd.to_datetime(series, errors="coerce")
+
+
+# --- Function: date_range_mask ---
+# Returns a boolean numpy mask for rows with a valid date from start_date to end_date (inclusive, whole days).
+# Uses the precomputed int64 day column when present, otherwise compares the datetime64 values against numpy
+# datetime64 bounds. Missing dates never match.
+def date_range_mask(data, date_col, start_date, end_date):
+    start_day = np.datetime64(start_date, "D")
+    end_day = np.datetime64(end_date, "D")
+    day_col = date_day_column(date_col)
+    if day_col in data.columns:
+        days = data[day_col].to_numpy()
+        return (days >= start_day.astype(np.int64)) & (days <= end_day.astype(np.int64))  # MISSING_DATE_INT is below any start.
+    values = as_datetime(data[date_col]).to_numpy(dtype="datetime64[ns]")
+    return (values >= start_day) & (values < end_day + np.timedelta64(1, "D"))  # NaT compares False.
+
+
+# --- Function: date_range_group_mask ---
+# Grouped version of date_range_mask: first_days/last_days are the int64 day range of each group (missing dates as
+# MISSING_DATE_INT, groups holding only missing or only valid dates). Returns the boolean numpy mask of the groups
+# whose rows all fall in the range, or None if a group has rows on both sides of a bound (the rows are needed then).
+def date_range_group_mask(first_days, last_days, start_date, end_date):
+    start_day = np.datetime64(start_date, "D").astype(np.int64)
+    end_day = np.datetime64(end_date, "D").astype(np.int64)
+    first_days, last_days = np.asarray(first_days), np.asarray(last_days)
+    inside = (first_days >= start_day) & (last_days <= end_day)
+    outside = (last_days < start_day) | (first_days > end_day)
+    if not (inside | outside).all():
+        return None # Some group straddles a bound.
+    return inside
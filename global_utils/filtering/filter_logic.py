@@ -1,121 +1,215 @@
 ##### Imports #####
 import streamlit as st # Import Streamlit for session state access
 import pandas as pd # Import pandas for DataFrame operations
+import numpy as np # Import numpy for combining boolean masks
 from .filter_constants import SPECIAL_STATUS_LABEL_TO_ORIGINAL_COL # Import constants from the dedicated file
+from global_utils.status_flags import status_flag_mask # Vectorized bool mask for status flag columns
+from global_utils.date_columns import ( # Date range masks on the precomputed day column / per-group day ranges
+    date_range_mask, date_day_column, date_first_day_column, date_last_day_column, date_range_group_mask
+)
+from global_utils.session_state_manager import PERSISTENT_FILTER_KEYS # All filter widget keys
+
+##### Constants #####
+MASK_CACHE_KEY = 'filter_mask_cache' # Session state key for the per-widget mask cache (see _cached_mask).
+CATEGORY_COL = "category" # Original column for Red List / Alien status.
+DATE_COL = "dateTimeCollected" # Original column name for date/time.
+# Columns read by every filter except the general text search and the date range. Any frame holding these columns
+# and the per-group day range (GROUP_FIRST_DAY_COL, GROUP_LAST_DAY_COL), e.g. the dashboard's grouped partial
+# aggregates, can be filtered with structured_filter_mask.
+STRUCTURED_FILTER_COLUMNS = [
+    "FamilieNavn", "OrdenNavn", "preferredPopularName", CATEGORY_COL
+] + list(SPECIAL_STATUS_LABEL_TO_ORIGINAL_COL.values())
+GROUP_FIRST_DAY_COL = date_first_day_column(DATE_COL) # Earliest day of each group in grouped frames.
+GROUP_LAST_DAY_COL = date_last_day_column(DATE_COL) # Latest day of each group in grouped frames.
 
 ##### Helper Functions #####
 
-# --- Function: _apply_multiselect_filter ---
-# Applies a filter to the DataFrame based on selected values from a multiselect widget.
-# Reads the selection from st.session_state using the provided filter_key.
-# Filters the specified original_col_name in the DataFrame.
-# Returns the filtered DataFrame.
-def _apply_multiselect_filter(filtered_data, filter_key, original_col_name):
+# --- Function: _cached_mask ---
+# Returns the boolean numpy mask (one value per row of data) for one filter, computing it with compute() only when
+# the filter's value or the dataset changed since the last call. One entry is kept per filter, so changing one
+# widget recomputes only that widget's mask. Data without a dataset fingerprint (see data_loading) is not cached.
+def _cached_mask(data, filter_name, filter_value, compute):
+    dataset = data.attrs.get("dataset_fingerprint") # Set by load_and_prepare_data.
+    if dataset is None:
+        return compute() # Unknown dataset; cannot cache safely.
+    cache = st.session_state.get(MASK_CACHE_KEY)
+    if cache is None or cache['dataset'] != (dataset, len(data)): # New dataset: drop all masks.
+        cache = {'dataset': (dataset, len(data)), 'masks': {}}
+        st.session_state[MASK_CACHE_KEY] = cache
+    cached = cache['masks'].get(filter_name)
+    if cached is not None and cached[0] == filter_value:
+        return cached[1] # Widget value unchanged: reuse the mask.
+    mask = compute()
+    cache['masks'][filter_name] = (filter_value, mask)
+    return mask
+
+# --- Function: _multiselect_mask ---
+# Returns the mask for a multiselect widget (rows whose original_col_name value is in the selection),
+# or None if nothing is selected or the column is missing (filter inactive).
+def _multiselect_mask(data, filter_key, original_col_name):
     # Check if the filter key exists in session state and has a non-empty list selected.
-    if filter_key in st.session_state and st.session_state[filter_key]:
-        selected_values = st.session_state[filter_key] # Retrieve the list of selected values.
-        # Apply the filter only if the target column exists in the DataFrame.
-        if original_col_name in filtered_data.columns:
-            # Use .isin() to filter rows where the column value is in the selected list.
-            filtered_data = filtered_data[filtered_data[original_col_name].isin(selected_values)] # Modify filtered_data in place with the result.
-    return filtered_data # Return the potentially filtered DataFrame.
+    selected_values = st.session_state.get(filter_key)
+    if not selected_values or original_col_name not in data.columns:
+        return None
+    # Use .isin() to mark rows where the column value is in the selected list.
+    return _cached_mask(
+        data, filter_key, tuple(selected_values),
+        lambda: data[original_col_name].isin(selected_values).to_numpy()
+    )
+
+# --- Function: _special_status_mask ---
+# Returns the mask for the special category widget: row must be flagged in AT LEAST ONE selected status column.
+def _special_status_mask(data, selected_labels):
+    combined_condition = np.zeros(len(data), dtype=bool) # Initialize a mask of False values.
+    for label in selected_labels: # Iterate through the selected labels.
+        original_col_special = SPECIAL_STATUS_LABEL_TO_ORIGINAL_COL.get(label) # Get the corresponding original column name.
+        # Check if the mapping exists and the column is present in the data.
+        if original_col_special and original_col_special in data.columns:
+            # OR logic ensures row is kept if *any* selected column is flagged.
+            combined_condition |= status_flag_mask(data, original_col_special).to_numpy()
+    return combined_condition
+
+# --- Function: _text_search_mask ---
+# Row-scan version of the general text search, used when no matching TextIndex is available.
+# Returns a boolean mask: True where every term is found (case-insensitive, literal substring) in ANY text column.
+def _text_search_mask(filtered_data, search_text):
+    # Select columns with string-like data (object dtype typically holds strings, category holds text loaded from Parquet).
+    string_columns = filtered_data.select_dtypes(include=['object', 'category']).columns
+    final_mask = pd.Series(True, index=filtered_data.index) # Start with a mask where all rows are True.
+    if string_columns.empty:
+        return final_mask # Nothing to search in; keep all rows.
+
+    # Apply each search term using AND logic (all terms must match).
+    for term in search_text.split():
+        term_mask = pd.Series(False, index=filtered_data.index) # True if term found in ANY string column for the row.
+        for col in string_columns:
+            term_mask |= filtered_data[col].astype(str).str.contains(term, case=False, regex=False) & filtered_data[col].notna()
+        final_mask &= term_mask # Row must match *all* terms.
+    return final_mask
+
+# --- Function: _general_text_mask ---
+# Returns the mask for the general text search. Uses the precomputed inverted index (built once per loaded file)
+# when it belongs to this data, otherwise scans the rows.
+def _general_text_mask(data, search_text):
+    text_index = st.session_state.get('loaded_text_index') # Set by Oversikt.py next to 'loaded_data'.
+    if text_index is not None and text_index.covers(data):
+        return data.index.isin(text_index.search(search_text)) # Sorted row labels matching ALL terms.
+    return _text_search_mask(data, search_text).to_numpy()
+
+# --- Function: _canonical_filter_value ---
+# Normalizes one filter widget value so equivalent selections compare equal (order of multiselect picks,
+# case/whitespace of the search text), as apply_filters treats them the same.
+def _canonical_filter_value(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(sorted(str(item) for item in value)) # Multiselect: order does not matter for .isin().
+    if isinstance(value, str):
+        return value.strip().lower() # Text search: apply_filters strips and lower-cases it.
+    return None if value is None else str(value) # Dates (ISO strings) or None.
+
+# --- Function: _date_filter_range ---
+# Returns (start_date, end_date) of the date range filter, or None while it is inactive (a date missing, or the
+# start date after the end date).
+def _date_filter_range():
+    start_date = st.session_state.get('filter_start_date') # Session state key for start date.
+    end_date = st.session_state.get('filter_end_date') # Session state key for end date.
+    if start_date is None or end_date is None or start_date > end_date:
+        return None
+    return start_date, end_date
+
+# --- Function: _structured_filter_masks ---
+# Returns the boolean masks of the active filters except the general text search (one per filter, None if inactive).
+def _structured_filter_masks(data):
+    masks = [] # Boolean masks of the active filters.
+
+    # --- Taxonomic Filters --- # Use helper for Familie, Orden, Art
+    masks.append(_multiselect_mask(data, 'filter_familie', "FamilieNavn")) # Familie filter.
+    masks.append(_multiselect_mask(data, 'filter_orden', "OrdenNavn")) # Orden filter.
+    masks.append(_multiselect_mask(data, 'filter_art', "preferredPopularName")) # Art filter.
+
+    # --- Status Filters --- # Filters related to species status.
+
+    # --- Red List Filter --- # Use helper.
+    masks.append(_multiselect_mask(data, 'filter_redlist_category', CATEGORY_COL)) # Red List filter.
+
+    # --- Special Category Filter --- # Custom logic required.
+    filter_key_special = 'filter_special_category' # Session state key.
+    selected_labels = st.session_state.get(filter_key_special) # Get selected display labels.
+    if selected_labels:
+        masks.append(_cached_mask(
+            data, filter_key_special, tuple(selected_labels), lambda: _special_status_mask(data, selected_labels)
+        ))
+
+    # --- Alien Species Filter --- # Use helper.
+    masks.append(_multiselect_mask(data, 'filter_alien_category', CATEGORY_COL)) # Alien Species filter.
+
+    # --- Date Range Filter --- # Filter based on selected start and end dates.
+    # Proceed only if the filter is active and the date column (or its day column) exists.
+    date_range = _date_filter_range()
+    has_date = DATE_COL in data.columns or date_day_column(DATE_COL) in data.columns
+    if date_range is not None and has_date:
+        start_date, end_date = date_range
+        masks.append(_cached_mask(
+            data, 'filter_date_range', (start_date, end_date),
+            lambda: date_range_mask(data, DATE_COL, start_date, end_date)
+        ))
+    return masks
 
 ##### Main Logic Function #####
 
-# --- Function: apply_filters --- 
+# --- Function: apply_filters ---
 # Filters the DataFrame based on values stored in st.session_state by the UI widgets.
 # Assumes 'data' is a pandas DataFrame and session state keys match those used in filter_ui.py.
+# Every active filter contributes one boolean mask over all rows of 'data' (cached per widget value);
+# the masks are ANDed and the DataFrame is sliced once at the end. Without active filters 'data' itself is returned
+# (no copy), so callers must treat the result as read-only.
 def apply_filters(data):
     # Return the original DataFrame immediately if it's empty.
     if data.empty:
         return data # No filtering needed on empty data.
 
-    filtered_data = data.copy() # Start with a copy to avoid modifying the original DataFrame.
-
-    # --- Apply Taxonomic Filters --- # Use helper for Familie, Orden, Art
-    filtered_data = _apply_multiselect_filter(filtered_data, 'filter_familie', "FamilieNavn") # Apply Familie filter.
-    filtered_data = _apply_multiselect_filter(filtered_data, 'filter_orden', "OrdenNavn") # Apply Orden filter.
-    filtered_data = _apply_multiselect_filter(filtered_data, 'filter_art', "preferredPopularName") # Apply Art filter.
-
-    # --- Apply Status Filters --- # Apply filters related to species status.
-    category_col = "category" # Original column for Red List / Alien status.
+    masks = _structured_filter_masks(data) # Taxonomy, status and date filters.
 
-    # --- Apply Red List Filter --- # Use helper.
-    filtered_data = _apply_multiselect_filter(filtered_data, 'filter_redlist_category', category_col) # Apply Red List filter.
-
-    # --- Apply Special Category Filter --- # Custom logic required.
-    filter_key_special = 'filter_special_category' # Session state key.
-    # Check if the filter key exists and has selections.
-    if filter_key_special in st.session_state and st.session_state[filter_key_special]:
-        selected_labels = st.session_state[filter_key_special] # Get selected display labels.
-        # Combine conditions: row must have 'Yes' in AT LEAST ONE selected special status column.
-        combined_condition = pd.Series(False, index=filtered_data.index) # Initialize a Series of False values.
-        for label in selected_labels: # Iterate through the selected labels.
-            original_col_special = SPECIAL_STATUS_LABEL_TO_ORIGINAL_COL.get(label) # Get the corresponding original column name.
-            # Check if the mapping exists and the column is present in the data.
-            if original_col_special and original_col_special in filtered_data.columns:
-                # Update the combined condition: OR logic ensures row is kept if *any* selected column is 'Yes'.
-                combined_condition = combined_condition | (filtered_data[original_col_special] == 'Yes') # Combine with previous conditions using logical OR.
-        filtered_data = filtered_data[combined_condition] # Apply the final combined condition mask.
-
-    # --- Apply Alien Species Filter --- # Use helper.
-    filtered_data = _apply_multiselect_filter(filtered_data, 'filter_alien_category', category_col) # Apply Alien Species filter.
-
-    # --- Apply Date Range Filter --- # Filter based on selected start and end dates.
-    date_col = "dateTimeCollected" # Original column name for date/time.
-    start_key = 'filter_start_date' # Session state key for start date.
-    end_key = 'filter_end_date'   # Session state key for end date.
-
-    # Get start and end dates from session state, defaulting to None if not present.
-    start_date = st.session_state.get(start_key)
-    end_date = st.session_state.get(end_key)
-
-    # Proceed only if both dates are selected (not None) and the date column exists.
-    if start_date is not None and end_date is not None and date_col in filtered_data.columns:
-        # Basic validation: Ensure start date is not after end date.
-        if start_date <= end_date:
-            # Convert the relevant column to datetime objects, specifying the expected format and coercing errors.
-            # This prevents the UserWarning and ensures correct parsing for DD.MM.YYYY format.
-            date_col_dt = pd.to_datetime(filtered_data[date_col], format='%d.%m.%Y %H:%M:%S', errors='coerce')
-
-            # Create a boolean mask for rows with valid dates within the selected range.
-            date_mask = (
-                date_col_dt.notna() & # Ensure the date is valid (not NaT).
-                (date_col_dt.dt.date >= start_date) & # Check if the date is on or after the start date.
-                (date_col_dt.dt.date <= end_date) # Check if the date is on or before the end date.
-            )
-            filtered_data = filtered_data[date_mask] # Apply the date range mask.
-        # else: # Optional: Could add a warning if start date is after end date, but omitted for minimal approach.
-            # st.sidebar.warning("Startdato kan ikke være etter sluttdato.")
-
-    # --- Apply General Text Search LAST --- # Apply the free-text search filter.
-    filter_key_text = 'filter_general_text' # Session state key for text search.
-    search_text = st.session_state.get(filter_key_text, "").strip().lower() # Get search text, default empty, strip whitespace, convert to lower.
-
-    # Proceed only if search text is provided.
+    # --- General Text Search --- # Free-text search filter.
+    search_text = st.session_state.get('filter_general_text', "").strip().lower() # Get search text, strip whitespace, lower-case.
     if search_text:
-        # Select columns with string-like data (object dtype typically holds strings).
-        string_columns = filtered_data.select_dtypes(include='object').columns
-
-        # Check if there are any string columns to search in.
-        if not string_columns.empty:
-            # Split search text into terms (words) for potentially more precise matching.
-            search_terms = search_text.split()
-
-            # Initialize final mask to include all rows initially.
-            final_mask = pd.Series(True, index=filtered_data.index) # Start with a mask where all rows are True.
-
-            # Apply each search term using AND logic (all terms must match).
-            for term in search_terms:
-                # Mask for the current term: True if term found (case-insensitive) in ANY string column for the row.
-                term_mask = filtered_data[string_columns].apply(
-                    lambda row: row.astype(str).str.contains(term, case=False, na=False).any(), # Check each cell in the row (converted to string).
-                    axis=1 # Apply function row-wise.
-                )
-                # Combine the current term's mask with the overall mask using logical AND.
-                final_mask &= term_mask # Row must match *all* terms.
-
-            # Apply the final combined mask to the DataFrame.
-            filtered_data = filtered_data[final_mask]
-
-    return filtered_data # Return the fully filtered DataFrame. 
\ No newline at end of file
+        masks.append(_cached_mask(data, 'filter_general_text', search_text, lambda: _general_text_mask(data, search_text)))
+
+    # --- Combine Masks and Slice Once ---
+    active_masks = [mask for mask in masks if mask is not None]
+    if not active_masks:
+        return data # No active filters; the loaded data itself (read-only for callers).
+    return data[np.logical_and.reduce(active_masks)] # Row must pass *all* active filters.
+
+# --- Function: structured_filter_mask ---
+# Returns the boolean numpy mask of the current filters over 'groups', a frame holding STRUCTURED_FILTER_COLUMNS
+# (those present in the loaded data) with one row per distinct combination of their values, plus the day range of
+# each group (GROUP_FIRST_DAY_COL, GROUP_LAST_DAY_COL) instead of the date columns.
+# Returns None while the general text search is active (it matches on columns such frames do not keep), and when the
+# date range splits a group (see date_range_group_mask).
+# 'groups' must not carry a dataset fingerprint, so the per-widget row-mask cache of the loaded data is left alone.
+def structured_filter_mask(groups):
+    if st.session_state.get('filter_general_text', "").strip():
+        return None # Text search needs the rows.
+    masks = _structured_filter_masks(groups) # Taxonomy and status filters (groups have no date column).
+    date_range = _date_filter_range()
+    if date_range is not None:
+        if GROUP_FIRST_DAY_COL not in groups.columns or GROUP_LAST_DAY_COL not in groups.columns:
+            return None # No day ranges to filter on.
+        masks.append(date_range_group_mask(groups[GROUP_FIRST_DAY_COL], groups[GROUP_LAST_DAY_COL], *date_range))
+        if masks[-1] is None:
+            return None # Partial overlap with some group: the rows are needed.
+    active_masks = [mask for mask in masks if mask is not None]
+    if not active_masks:
+        return np.ones(len(groups), dtype=bool) # No active filters.
+    return np.logical_and.reduce(active_masks)
+
+# --- Function: filter_state_key ---
+# Returns a small hashable key identifying apply_filters(data) for the current widget values:
+# (dataset fingerprint, canonical filter state). Equal keys mean equal filtered data, so caches can key on it
+# instead of hashing the filtered DataFrame. Returns None if data has no fingerprint (see data_loading).
+def filter_state_key(data):
+    dataset = data.attrs.get("dataset_fingerprint") # Set by load_and_prepare_data.
+    if dataset is None:
+        return None
+    filter_state = tuple((key, _canonical_filter_value(st.session_state.get(key))) for key in PERSISTENT_FILTER_KEYS)
+    return (dataset, len(data), filter_state)
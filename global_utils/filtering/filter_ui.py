@@ -1,25 +1,117 @@
 ##### Imports #####
 import streamlit as st # Import Streamlit for UI elements
-import pandas as pd # Import pandas for DataFrame operations
 from .filter_constants import REDLIST_CODES, ALIEN_CODES, SPECIAL_STATUS_LABEL_TO_ORIGINAL_COL # Import constants from the dedicated file. Relative import used.
+from global_utils.status_flags import status_flag_mask # Vectorized bool mask for status flag columns.
+from global_utils.date_columns import as_datetime # Returns the already-parsed date column without re-parsing.
+
+##### Constants #####
+FILTER_OPTIONS_MAX_ENTRIES = 4 # Datasets whose option lists are kept in the shared cache.
+CATEGORY_COL = "category" # Shared original column for Red List / Alien status.
+DATE_COL = "dateTimeCollected" # Original column name for date/time information.
+# Multiselect filters: session state key -> (original column, allowed values or None for all values).
+MULTISELECT_FILTERS = {
+    'filter_familie': ("FamilieNavn", None),
+    'filter_orden': ("OrdenNavn", None),
+    'filter_art': ("preferredPopularName", None),
+    'filter_redlist_category': (CATEGORY_COL, REDLIST_CODES),
+    'filter_alien_category': (CATEGORY_COL, ALIEN_CODES),
+}
 
 ##### Helper Functions #####
 
+# --- Function: _sorted_options ---
+# Returns the sorted distinct non-null values of data[original_col_name], limited to options_filter_list if given.
+def _sorted_options(data, original_col_name, options_filter_list=None):
+    unique_values = data[original_col_name].dropna().unique() # Get unique non-null values from the column.
+    # If a specific list is provided to filter the options (e.g., REDLIST_CODES), use it.
+    if options_filter_list is not None:
+        return sorted([val for val in unique_values if val in options_filter_list]) # Filter unique values against the provided list and sort.
+    return sorted(list(unique_values)) # Otherwise, use all unique values and sort.
+
+# --- Function: _value_combinations ---
+# Returns the distinct combinations of the multiselect filter columns present in data (family, order, species,
+# category): a co-occurrence table with one row per combination, usually one per species, instead of one per observation.
+def _value_combinations(data):
+    columns = list(dict.fromkeys(col for col, _ in MULTISELECT_FILTERS.values() if col in data.columns))
+    if not columns:
+        return None
+    return data[columns].drop_duplicates().reset_index(drop=True)
+
+# --- Function: build_filter_options ---
+# Computes everything the sidebar widgets need from the unfiltered data:
+#   'multiselect': filter key -> sorted option list, or None if the column is missing (see MULTISELECT_FILTERS).
+#   'combinations': co-occurrence table of the multiselect columns (see _value_combinations), for narrowed_options.
+#   'special': sorted labels of the special statuses with at least one flagged row.
+#   'date_range': (min date, max date) of the valid dates, None if there are none, or missing if the column is missing.
+def build_filter_options(data):
+    multiselect = {}
+    for filter_key, (original_col_name, options_filter_list) in MULTISELECT_FILTERS.items():
+        if original_col_name in data.columns:
+            multiselect[filter_key] = _sorted_options(data, original_col_name, options_filter_list)
+        else:
+            multiselect[filter_key] = None # Column missing.
+
+    # Special statuses: the column exists AND has at least one flagged row.
+    special = sorted(
+        label for label, original_col in SPECIAL_STATUS_LABEL_TO_ORIGINAL_COL.items()
+        if original_col in data.columns and status_flag_mask(data, original_col).any()
+    )
+
+    options = {'multiselect': multiselect, 'combinations': _value_combinations(data), 'special': special}
+    if DATE_COL in data.columns:
+        # Use the datetime column parsed at load time (other input is converted, coercing errors to NaT).
+        valid_dates = as_datetime(data[DATE_COL]).dropna() # Remove any rows where conversion failed (NaT).
+        options['date_range'] = (valid_dates.min().date(), valid_dates.max().date()) if not valid_dates.empty else None
+    return options
+
+# --- Function: load_filter_options ---
+# Returns build_filter_options(data), computed once per dataset (fingerprint from load_and_prepare_data) and shared
+# across reruns, pages and sessions, so building the sidebar does not scan the data. Data without a fingerprint is
+# not cached.
+def load_filter_options(data):
+    dataset = data.attrs.get("dataset_fingerprint") # Set by load_and_prepare_data.
+    if dataset is None:
+        return build_filter_options(data) # Unknown dataset; cannot cache safely.
+    return _cached_filter_options(dataset, len(data), data)
+
+@st.cache_resource(max_entries=FILTER_OPTIONS_MAX_ENTRIES) # Shared, never modified: no copy per rerun.
+def _cached_filter_options(dataset_fingerprint, row_count, _data): # _data is not hashed: the fingerprint identifies it.
+    return build_filter_options(_data)
+
+# --- Function: narrowed_options ---
+# Returns the options of the multiselect filter 'filter_key' that still occur together with the selections of the
+# other multiselect filters (e.g. only the orders and species of the selected families). Reads the co-occurrence
+# table only, never the observation rows. Selections on the same column (Red List / Alien both use 'category') do not
+# narrow each other, and values that are already selected are always kept so the selection stays valid.
+def narrowed_options(filter_options, filter_key):
+    options = filter_options['multiselect'][filter_key]
+    combinations = filter_options['combinations']
+    original_col_name = MULTISELECT_FILTERS[filter_key][0]
+    if options is None or combinations is None:
+        return options
+
+    # Combinations matching every other active multiselect filter.
+    mask = None
+    for other_key, (other_col_name, _) in MULTISELECT_FILTERS.items():
+        selected_values = st.session_state.get(other_key)
+        if other_col_name == original_col_name or not selected_values:
+            continue # Same column or filter inactive: no narrowing.
+        other_mask = combinations[other_col_name].isin(selected_values).to_numpy()
+        mask = other_mask if mask is None else mask & other_mask
+    if mask is None:
+        return options # No other filter active: all options.
+
+    present = set(combinations.loc[mask, original_col_name].dropna()) # Values co-occurring with the selections.
+    selected = set(st.session_state.get(filter_key) or [])
+    return [val for val in options if val in present or val in selected] # Keeps the sorted order.
+
 # --- Function: _display_multiselect --- 
-# Displays a multiselect widget if a column exists and has unique values.
+# Displays a multiselect widget with the precomputed 'options' (see build_filter_options).
 # Reduces repetition in the main display function.
-# Assumes 'data' is a pandas DataFrame.
-def _display_multiselect(data, original_col_name, filter_key, display_label, options_filter_list=None):
-    # Check if the primary column for options exists in the DataFrame.
-    if original_col_name in data.columns:
-        unique_values = data[original_col_name].dropna().unique() # Get unique non-null values from the column.
-        
-        # If a specific list is provided to filter the options (e.g., REDLIST_CODES), use it.
-        if options_filter_list is not None: 
-            options = sorted([val for val in unique_values if val in options_filter_list]) # Filter unique values against the provided list and sort.
-        else:
-            options = sorted(list(unique_values)) # Otherwise, use all unique values and sort.
-        
+# 'options' is None when the column is missing from the data.
+def _display_multiselect(options, original_col_name, filter_key, display_label):
+    # Check if the primary column for options exists in the DataFrame (None = missing).
+    if options is not None:
         # Display the multiselect widget only if there are options to show.
         if options:
             st.multiselect(
@@ -41,7 +133,8 @@ def _display_multiselect(data, original_col_name, filter_key, display_label, opt
 # Assumes 'data' is a pandas DataFrame containing filterable columns.
 # Stores selected filter values in st.session_state using specified keys.
 def display_filter_widgets(data):
-    
+    filter_options = load_filter_options(data) # Option lists, status availability and date bounds; cached per dataset.
+
     st.sidebar.header("Filtreringsvalg") # Add a header to the sidebar section.
 
     # --- General Text Search --- # Text input for general search across string columns.
@@ -55,57 +148,46 @@ def display_filter_widgets(data):
     # --- Taxonomy Expander --- # Group taxonomic filters in an expander.
     with st.sidebar.expander("Taksonomi", expanded=False): # Expander starts collapsed.
         # Use the helper function for Familie, Orden, and Art filters.
-        _display_multiselect(data, "FamilieNavn", 'filter_familie', "Familie") # Call helper for Familie.
-        _display_multiselect(data, "OrdenNavn", 'filter_orden', "Orden") # Call helper for Orden.
-        _display_multiselect(data, "preferredPopularName", 'filter_art', "Art") # Call helper for Art.
+        _display_multiselect(narrowed_options(filter_options, 'filter_familie'), "FamilieNavn", 'filter_familie', "Familie") # Call helper for Familie.
+        _display_multiselect(narrowed_options(filter_options, 'filter_orden'), "OrdenNavn", 'filter_orden', "Orden") # Call helper for Orden.
+        _display_multiselect(narrowed_options(filter_options, 'filter_art'), "preferredPopularName", 'filter_art', "Art") # Call helper for Art.
 
     # --- Status Expander --- # Group status-related filters.
     with st.sidebar.expander("Status", expanded=False): # Expander starts collapsed.
-        category_col = "category" # Define the shared original column name for Red List / Alien status.
-
-        # --- Red List Filter --- # Use helper, filtering options by REDLIST_CODES.
-        _display_multiselect(data, category_col, 'filter_redlist_category', "Rødlistekategori", options_filter_list=REDLIST_CODES)
+        # --- Red List Filter --- # Use helper; options limited to REDLIST_CODES.
+        _display_multiselect(narrowed_options(filter_options, 'filter_redlist_category'), CATEGORY_COL, 'filter_redlist_category', "Rødlistekategori")
 
         # --- Special Category Filter --- # Custom logic needed here as it checks multiple columns.
         filter_key_special = 'filter_special_category' # Session state key.
         display_label_special = "Arter av nasjonal forvaltningsstatus" # Display label.
-        options_special = [] # Initialize empty list to store available special status labels.
-        # Check which special status columns exist AND have at least one 'Yes' value.
-        for label, original_col in SPECIAL_STATUS_LABEL_TO_ORIGINAL_COL.items(): # Iterate through the mapping.
-            if original_col in data.columns and (data[original_col] == 'Yes').any(): # Check column exists and has 'Yes'.
-                options_special.append(label) # Add the user-friendly label if relevant data exists.
+        options_special = filter_options['special'] # Labels of the special statuses with at least one flagged row.
 
         # Display multiselect only if relevant special statuses were found.
         if options_special:
             st.multiselect(
                 display_label_special, # Widget label.
-                options=sorted(options_special), # Provide the sorted list of found statuses.
+                options=options_special, # Provide the sorted list of found statuses.
                 key=filter_key_special # Link to session state.
             )
         else:
             st.caption(f"Ingen relevante '{display_label_special}' funnet.") # Inform user if no special statuses found.
 
-        # --- Alien Species Filter --- # Use helper, filtering options by ALIEN_CODES.
-        _display_multiselect(data, category_col, 'filter_alien_category', "Fremmedartrisiko", options_filter_list=ALIEN_CODES)
+        # --- Alien Species Filter --- # Use helper; options limited to ALIEN_CODES.
+        _display_multiselect(narrowed_options(filter_options, 'filter_alien_category'), CATEGORY_COL, 'filter_alien_category', "Fremmedartrisiko")
 
     # --- Date Range Expander --- # Group date range filters.
     with st.sidebar.expander("Tidsperiode", expanded=False): # Expander starts collapsed.
-        date_col = "dateTimeCollected" # Original column name for date/time information.
+        date_col = DATE_COL # Original column name for date/time information.
         start_key = 'filter_start_date' # Session state key for start date.
         end_key = 'filter_end_date'   # Session state key for end date.
         start_label = "Startdato"    # Display label for start date input.
         end_label = "Sluttdato"      # Display label for end date input.
 
         # Check if the date column exists in the DataFrame.
-        if date_col in data.columns:
-            # Attempt to convert the column to datetime objects, coercing errors to NaT (Not a Time).
-            date_series = pd.to_datetime(data[date_col], errors='coerce') 
-            valid_dates = date_series.dropna() # Remove any rows where conversion failed (NaT).
-
-            # Proceed only if there are valid dates after conversion and dropping NaNs.
-            if not valid_dates.empty:
-                min_data_date = valid_dates.min().date() # Get the earliest date from the valid data.
-                max_data_date = valid_dates.max().date() # Get the latest date from the valid data.
+        if 'date_range' in filter_options:
+            # Proceed only if there are valid dates (min/max computed once per dataset in build_filter_options).
+            if filter_options['date_range'] is not None:
+                min_data_date, max_data_date = filter_options['date_range'] # Earliest and latest date in the data.
 
                 # --- Initialize Session State if Needed --- # Set default dates if not already in session state.
                 # Initialize state only if keys are completely absent or have value None.
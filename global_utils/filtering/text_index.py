@@ -0,0 +1,66 @@
+##### Imports #####
+import numpy as np  # Import numpy for sorted row-id arrays and set operations
+import pandas as pd  # Import pandas for DataFrame operations
+
+##### Classes #####
+
+# --- Class: TextIndex ---
+# Inverted index for the general text search: token -> sorted array of row labels.
+# Tokens are the lower-cased, whitespace-separated words of every text cell (object/category columns).
+# A search term (which never contains whitespace) matches a cell exactly when it is a substring of one of the
+# cell's tokens, so a term is resolved by scanning the token vocabulary instead of every row.
+class TextIndex:
+    def __init__(self, tokens, postings, row_labels):
+        self.tokens = pd.Series(tokens, dtype=object) # Sorted vocabulary of distinct tokens.
+        self.postings = postings # postings[i]: sorted, unique row labels containing tokens[i].
+        self.row_labels = row_labels # Index of the DataFrame the index was built from.
+
+    # --- Method: covers ---
+    # True if this index was built for a DataFrame with the same row labels as data (O(1) for a RangeIndex).
+    # Filtered subsets of that DataFrame keep the original labels, so the index can be applied to them too.
+    def covers(self, data):
+        return data.index.equals(self.row_labels)
+
+    # --- Method: rows_for_term ---
+    # Returns the sorted row labels where any text cell contains term (case-insensitive, literal substring).
+    def rows_for_term(self, term):
+        matching = np.flatnonzero(self.tokens.str.contains(term.lower(), regex=False).to_numpy()) # Scan vocabulary, not rows.
+        if len(matching) == 0:
+            return np.empty(0, dtype=self.row_labels.dtype)
+        if len(matching) == 1:
+            return self.postings[matching[0]]
+        return np.unique(np.concatenate([self.postings[i] for i in matching])) # Union of all matching tokens.
+
+    # --- Method: search ---
+    # Returns the sorted row labels matching ALL whitespace-separated terms in search_text (AND = set intersection).
+    def search(self, search_text):
+        result = None # No term processed yet.
+        for term in search_text.lower().split():
+            term_rows = self.rows_for_term(term)
+            result = term_rows if result is None else np.intersect1d(result, term_rows, assume_unique=True)
+            if len(result) == 0:
+                break # Intersection can only shrink; no need to resolve the remaining terms.
+        return result if result is not None else self.row_labels.to_numpy()
+
+
+##### Functions #####
+
+# --- Function: build_text_index ---
+# Builds a TextIndex over all object/category columns of df (the columns the text search looks at).
+# Each column is factorized first, so every distinct value is tokenized once, however many rows share it.
+# Missing values are not indexed.
+def build_text_index(df):
+    row_labels = df.index.to_numpy()
+    token_rows = {} # token -> list of row-label arrays (one per distinct cell value containing the token).
+    for col in df.select_dtypes(include=['object', 'category']).columns:
+        codes, uniques = pd.factorize(df[col]) # codes == -1 for missing values.
+        order = np.argsort(codes, kind='stable') # Row positions grouped by distinct value.
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1)) # Group boundaries per code.
+        for code, value in enumerate(uniques):
+            rows = row_labels[order[bounds[code]:bounds[code + 1]]]
+            for token in set(str(value).lower().split()):
+                token_rows.setdefault(token, []).append(rows)
+
+    tokens = sorted(token_rows) # Sorted vocabulary.
+    postings = [np.unique(np.concatenate(token_rows[token])) for token in tokens] # Sorted, de-duplicated row labels.
+    return TextIndex(tokens, postings, df.index)
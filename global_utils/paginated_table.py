@@ -0,0 +1,99 @@
+# global_utils/paginated_table.py
+##### Imports #####
+import math  # Used for the page count.
+
+import numpy as np  # Used for the row position arrays.
+import pandas as pd  # Used for sorting and slicing.
+import streamlit as st  # Used for the table widgets and the sort cache.
+
+from global_utils.column_mapping import get_display_name  # Used for mapping original column names to display names.
+
+##### Constants #####
+PAGE_SIZES = [50, 100, 250, 500]  # Rows per page offered to the user.
+DEFAULT_PAGE_SIZE = 100  # Initial rows per page.
+SORT_CACHE_KEY = 'table_sort_cache'  # Session state key for the sorted row positions (see _cached_sort_positions).
+NO_SORT = None  # Sort option: keep the data order.
+
+
+##### Helper Functions #####
+
+# --- Function: sort_positions ---
+# Returns 'rows' (positions in data) reordered by data[sort_col]: stable, missing values last.
+# Only the sort column is read; categorical columns sort by category order.
+def sort_positions(data, rows, sort_col, ascending=True):
+    if sort_col is NO_SORT:
+        return rows
+    values = pd.Series(data[sort_col].array.take(rows))  # Sort column of the table rows only.
+    order = values.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+    return rows[order]
+
+
+# --- Function: _cached_sort_positions ---
+# sort_positions, reused while the table's rows (identified by cache_key, e.g. filter_state_key) and the sort are
+# unchanged, so paging through a sorted table does not sort again. One entry is kept per table. No cache_key: no caching.
+def _cached_sort_positions(data, rows, sort_col, ascending, table_key, cache_key):
+    if cache_key is None:
+        return sort_positions(data, rows, sort_col, ascending)  # Unknown data; cannot cache safely.
+    state = (cache_key, len(rows), sort_col, ascending)
+    cache = st.session_state.setdefault(SORT_CACHE_KEY, {})
+    cached = cache.get(table_key)
+    if cached is not None and cached[0] == state:
+        return cached[1]  # Same rows and sort: reuse the order.
+    positions = sort_positions(data, rows, sort_col, ascending)
+    cache[table_key] = (state, positions)
+    return positions
+
+
+# --- Function: page_frame ---
+# Returns the rows at positions[start:start + page_size] of data with 'columns', renamed to display names.
+# Only the page is copied and renamed. Rows are taken before columns: iloc[rows, cols] in one call is much slower on large frames.
+def page_frame(data, positions, columns, start, page_size):
+    page = data.iloc[positions[start:start + page_size]][columns]
+    page.columns = [get_display_name(col) for col in columns]  # Renames the page slice only.
+    return page
+
+
+##### Functions #####
+
+# --- Function: display_paginated_table ---
+# Displays data (original column names) as a paginated table: only the current page is sent to the browser.
+# 'rows' selects the table rows (boolean mask or positions; None = all rows) without copying data. 'columns' is the
+# default column selection, in display order. Sorting and column selection run on data; renaming on the page only.
+# 'key' must be unique per table (widget keys). 'cache_key' identifies the rows for the sort cache
+# (e.g. filter_state_key of the unfiltered data plus a table name); None disables it.
+def display_paginated_table(data, columns, key, rows=None, cache_key=None, height=None):
+    if rows is None:
+        rows = np.arange(len(data))
+    elif rows.dtype == bool:
+        rows = np.flatnonzero(rows)  # Mask -> positions.
+
+    # --- Table Controls ---
+    kol1, kol2, kol3, kol4 = st.columns([3, 2, 1, 1])
+    with kol1:
+        valgte_kolonner = st.multiselect("Kolonner", columns, default=columns, format_func=get_display_name,
+                                         key=f"{key}_kolonner")
+    with kol2:
+        sorter_etter = st.selectbox("Sorter etter", [NO_SORT] + list(columns), key=f"{key}_sorter",
+                                    format_func=lambda col: "(ingen)" if col is NO_SORT else get_display_name(col))
+    with kol3:
+        synkende = st.checkbox("Synkende", key=f"{key}_synkende")
+    with kol4:
+        rader_per_side = st.selectbox("Rader per side", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE),
+                                      key=f"{key}_rader_per_side")
+
+    # --- Page Selection ---
+    antall_sider = max(1, math.ceil(len(rows) / rader_per_side))
+    side_key = f"{key}_side"
+    if st.session_state.get(side_key, 1) > antall_sider:  # Fewer rows than before (filters changed): last page.
+        st.session_state[side_key] = antall_sider
+    side = st.number_input("Side", min_value=1, max_value=antall_sider, step=1, key=side_key)
+
+    # --- Page Rows ---
+    positions = _cached_sort_positions(data, rows, sorter_etter, not synkende, key, cache_key)
+    start = (side - 1) * rader_per_side
+    st.dataframe(page_frame(data, positions, valgte_kolonner, start, rader_per_side),
+                 height=height, use_container_width=True)
+    st.caption(
+        f"Viser rad {min(start + 1, len(rows)):,}–{min(start + rader_per_side, len(rows)):,} av {len(rows):,} "
+        f"(side {side:,} av {antall_sider:,})."
+    )
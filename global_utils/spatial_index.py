@@ -0,0 +1,155 @@
+##### Imports #####
+import numpy as np  # Import numpy for the sorted grid arrays and vectorized geometry
+import pandas as pd  # Import pandas for DataFrame operations
+
+##### Constants #####
+LAT_COL = "latitude" # Original latitude column (WGS84 degrees).
+LON_COL = "longitude" # Original longitude column (WGS84 degrees).
+EARTH_RADIUS_M = 6_371_008.8 # Mean Earth radius, used for the projection and radius queries.
+POINTS_PER_CELL = 32 # Target number of points per grid cell (for evenly spread points).
+MIN_CELL_SIZE_M = 10.0 # Smallest grid cell, so a few points far apart do not create a huge grid.
+
+##### Classes #####
+
+# --- Class: SpatialIndex ---
+# Uniform grid over the observation coordinates, projected to metres (equirectangular around the mean latitude).
+# Points are sorted by cell key (cell row * n_cols + cell column), so the points of one grid row between two cell
+# columns are one contiguous slice, found with np.searchsorted. A query looks up one slice per grid row its bounding
+# box covers and checks only those candidate points exactly, instead of scanning every row.
+# Rows with a missing coordinate are not indexed. Queries return sorted row labels, like TextIndex.search.
+class SpatialIndex:
+    def __init__(self, keys, lon, lat, labels, origin, cell_size, n_cols, n_rows, row_labels):
+        self.keys = keys # Sorted cell keys, one per indexed point.
+        self.lon = lon # Longitude of each point, in key order.
+        self.lat = lat # Latitude of each point, in key order.
+        self.labels = labels # Row label of each point, in key order.
+        self.origin = origin # (x0, y0, cos of the projection latitude): projected minimum corner.
+        self.cell_size = cell_size # Grid cell size in metres.
+        self.n_cols = n_cols # Grid columns.
+        self.n_rows = n_rows # Grid rows.
+        self.row_labels = row_labels # Index of the DataFrame the index was built from.
+
+    # --- Method: covers ---
+    # True if this index was built for a DataFrame with the same row labels as data (O(1) for a RangeIndex).
+    def covers(self, data):
+        return data.index.equals(self.row_labels)
+
+    # --- Method: _cell ---
+    # Grid column/row of a coordinate, clipped to the grid. Same arithmetic as build_spatial_index (_grid_cells).
+    def _cell(self, lon, lat):
+        col, row = _grid_cells(np.array([lon]), np.array([lat]), self.origin, self.cell_size)
+        return int(np.clip(col[0], 0, self.n_cols - 1)), int(np.clip(row[0], 0, self.n_rows - 1))
+
+    # --- Method: _candidates ---
+    # Positions (in key order) of the points in the grid cells overlapping the bounding box. A superset of the
+    # points inside it; the callers filter the candidates exactly.
+    def _candidates(self, min_lon, min_lat, max_lon, max_lat):
+        if len(self.keys) == 0 or min_lon > max_lon or min_lat > max_lat:
+            return np.empty(0, dtype=np.int64)
+        col_lo, row_lo = self._cell(min_lon, min_lat)
+        col_hi, row_hi = self._cell(max_lon, max_lat)
+        grid_rows = np.arange(row_lo, row_hi + 1, dtype=np.int64)
+        starts = np.searchsorted(self.keys, grid_rows * self.n_cols + col_lo, side="left") # One slice per grid row.
+        ends = np.searchsorted(self.keys, grid_rows * self.n_cols + col_hi, side="right")
+        lengths = ends - starts
+        if lengths.sum() == 0:
+            return np.empty(0, dtype=np.int64)
+        # Concatenate the ranges starts[i]:ends[i] without a Python loop.
+        offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        return np.arange(lengths.sum(), dtype=np.int64) + offsets
+
+    # --- Method: _labels ---
+    # Sorted row labels of the points at 'positions' (key order).
+    def _labels(self, positions):
+        return np.sort(self.labels[positions])
+
+    # --- Method: bbox ---
+    # Row labels of the points inside the bounding box (degrees, bounds inclusive).
+    def bbox(self, min_lon, min_lat, max_lon, max_lat):
+        candidates = self._candidates(min_lon, min_lat, max_lon, max_lat)
+        lon, lat = self.lon[candidates], self.lat[candidates]
+        inside = (lon >= min_lon) & (lon <= max_lon) & (lat >= min_lat) & (lat <= max_lat)
+        return self._labels(candidates[inside])
+
+    # --- Method: radius ---
+    # Row labels of the points within radius_m metres (great-circle distance) of (lat, lon).
+    def radius(self, lat, lon, radius_m):
+        d_lat = np.degrees(radius_m / EARTH_RADIUS_M)
+        d_lon = np.degrees(radius_m / (EARTH_RADIUS_M * max(np.cos(np.radians(lat)), 1e-12)))
+        candidates = self._candidates(lon - d_lon, lat - d_lat, lon + d_lon, lat + d_lat)
+        phi1, phi2 = np.radians(lat), np.radians(self.lat[candidates])
+        d_phi, d_lambda = phi2 - phi1, np.radians(self.lon[candidates] - lon)
+        hav = np.sin(d_phi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(d_lambda / 2) ** 2 # Haversine.
+        distance = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(hav, 1.0)))
+        return self._labels(candidates[distance <= radius_m])
+
+    # --- Method: polygon ---
+    # Row labels of the points inside the polygon, given as a sequence of (lon, lat) vertices (closing the ring is
+    # optional). Even-odd rule (ray casting), vectorized over the candidate points; one pass per polygon edge.
+    def polygon(self, vertices):
+        ring = np.asarray(vertices, dtype=float)
+        candidates = self._candidates(ring[:, 0].min(), ring[:, 1].min(), ring[:, 0].max(), ring[:, 1].max())
+        x, y = self.lon[candidates], self.lat[candidates]
+        inside = np.zeros(len(candidates), dtype=bool)
+        for (x1, y1), (x2, y2) in zip(ring, np.roll(ring, -1, axis=0)):
+            if y1 == y2:
+                continue # Horizontal edges never cross the horizontal ray.
+            crosses = ((y1 > y) != (y2 > y)) & (x < (x2 - x1) * (y - y1) / (y2 - y1) + x1)
+            inside ^= crosses
+        return self._labels(candidates[inside])
+
+
+##### Helper Functions #####
+
+# --- Function: _project ---
+# Equirectangular projection to metres: x scaled by the cosine of the projection latitude.
+def _project(lon, lat, cos_lat):
+    return np.radians(lon) * cos_lat * EARTH_RADIUS_M, np.radians(lat) * EARTH_RADIUS_M
+
+# --- Function: _grid_cells ---
+# Grid column and row (int64, unclipped) of each coordinate. Used both to build and to query the index, so points on
+# a cell border land in the same cell in both.
+def _grid_cells(lon, lat, origin, cell_size):
+    x0, y0, cos_lat = origin
+    x, y = _project(lon, lat, cos_lat)
+    return np.floor((x - x0) / cell_size).astype(np.int64), np.floor((y - y0) / cell_size).astype(np.int64)
+
+
+##### Functions #####
+
+# --- Function: build_spatial_index ---
+# Builds a SpatialIndex over the latitude/longitude columns of df. The cell size gives about POINTS_PER_CELL points
+# per cell if the points were spread evenly over their bounding box (at least MIN_CELL_SIZE_M).
+def build_spatial_index(df, lat_col=LAT_COL, lon_col=LON_COL):
+    lat = pd.to_numeric(df[lat_col], errors="coerce").to_numpy(dtype=float)
+    lon = pd.to_numeric(df[lon_col], errors="coerce").to_numpy(dtype=float)
+    valid = ~(np.isnan(lat) | np.isnan(lon))
+    lat, lon, labels = lat[valid], lon[valid], df.index.to_numpy()[valid]
+
+    cos_lat = float(np.cos(np.radians(lat.mean()))) if len(lat) else 1.0
+    x, y = _project(lon, lat, cos_lat)
+    origin = (float(x.min()), float(y.min()), cos_lat) if len(x) else (0.0, 0.0, cos_lat)
+    width, height = (x.max() - origin[0], y.max() - origin[1]) if len(x) else (0.0, 0.0)
+    cell_size = max(float(np.sqrt(width * height * POINTS_PER_CELL / max(len(x), 1))), MIN_CELL_SIZE_M)
+
+    cols, rows = _grid_cells(lon, lat, origin, cell_size)
+    n_cols = int(cols.max()) + 1 if len(cols) else 1
+    n_rows = int(rows.max()) + 1 if len(rows) else 1
+    keys = rows * n_cols + cols
+    order = np.argsort(keys, kind="stable")
+    return SpatialIndex(
+        keys[order], lon[order], lat[order], labels[order], origin, cell_size, n_cols, n_rows, df.index
+    )
+
+
+# --- Function: select_rows ---
+# Returns the rows of data whose label is in 'labels' (sorted, e.g. a SpatialIndex query). data can be a filtered
+# subset of the indexed DataFrame: for a sorted index, matches are found by binary search instead of hashing every row.
+def select_rows(data, labels):
+    if not data.index.is_monotonic_increasing:
+        return data[data.index.isin(labels)]
+    index = data.index.to_numpy()
+    positions = np.searchsorted(index, labels) # Where each label is (or would be) in data.
+    in_range = positions < len(index)
+    positions, labels = positions[in_range], labels[in_range]
+    return data.iloc[positions[index[positions] == labels]] # Labels not in data (filtered out) are skipped.
@@ -0,0 +1,46 @@
+# global_utils/status_flags.py
+##### Imports #####
+import pandas as pd  # Used for Series/DataFrame operations.
+
+##### Constants #####
+# Status flag columns produced by the databehandling pipeline (criteria columns from the Excel metadata, renamed).
+# Stored as plain bool columns: True where the species has the status. Older files hold "Yes"/"No" strings instead.
+STATUS_FLAG_COLUMNS = [
+    "Ansvarsarter",
+    "Trua arter",
+    "Andre spesielt hensynskrevende arter",
+    "Spesielle okologiske former",
+    "Prioriterte arter",
+    "Fredete arter",
+    "NT",
+    "Fremmede arter",
+]
+TRUE_FLAG_STRINGS = ["YES", "TRUE"]  # Legacy string values read as True (case-insensitive). Anything else is False.
+
+
+##### Functions #####
+
+# --- Function: to_status_flag ---
+# Converts a flag column of any representation ("Yes"/"No", "True"/"False", bool, missing values) to a bool Series.
+def to_status_flag(values):
+    if values.dtype == bool:
+        return values  # Already compact; no conversion needed.
+    if pd.api.types.is_bool_dtype(values):  # Nullable boolean: missing counts as False.
+        return values.fillna(False).astype(bool)
+    return values.astype(str).str.strip().str.upper().isin(TRUE_FLAG_STRINGS)
+
+
+# --- Function: status_flag_mask ---
+# Returns the boolean row mask for one flag column. Bool columns (pipeline output, loaded data) are returned
+# as-is, so consumers get a vectorized mask without allocating strings. Other dtypes go through to_status_flag.
+def status_flag_mask(data, column):
+    return to_status_flag(data[column])
+
+
+# --- Function: convert_status_flag_columns ---
+# Converts every STATUS_FLAG_COLUMNS column present in df to bool, in place. Returns df.
+def convert_status_flag_columns(df):
+    for column in STATUS_FLAG_COLUMNS:
+        if column in df.columns:
+            df[column] = to_status_flag(df[column])
+    return df
@@ -0,0 +1,124 @@
+##### Imports #####
+import numpy as np  # Import numpy for the random coordinates and brute force references.
+import pandas as pd  # Import pandas for DataFrame creation.
+import pytest  # Import pytest for testing framework features.
+from pandas.testing import assert_frame_equal  # Import specific assertion for DataFrames.
+
+# --- Module under test ---
+from global_utils.spatial_index import EARTH_RADIUS_M, build_spatial_index, select_rows
+
+##### Constants for Testing #####
+N_CASES = 50 # Random queries per test.
+
+##### Fixtures #####
+
+# --- Fixture: points ---
+# Observation-like coordinates: a dense cluster plus scattered points over Norway, some with a missing coordinate,
+# on a sorted index that is not a RangeIndex.
+@pytest.fixture(params=["sorted", "unsorted"])
+def points(request):
+    rng = np.random.default_rng(42)
+    n_cluster, n_spread = 1500, 1500
+    lat = np.concatenate([rng.normal(63.4, 0.05, n_cluster), rng.uniform(58.0, 71.0, n_spread)])
+    lon = np.concatenate([rng.normal(10.4, 0.1, n_cluster), rng.uniform(5.0, 30.0, n_spread)])
+    lat[rng.choice(len(lat), 40, replace=False)] = np.nan
+    lon[rng.choice(len(lon), 40, replace=False)] = np.nan
+    labels = np.sort(rng.choice(100_000, len(lat), replace=False)) # Gaps between labels.
+    if request.param == "unsorted":
+        labels = rng.permutation(labels)
+    return pd.DataFrame({"latitude": lat, "longitude": lon}, index=pd.Index(labels))
+
+##### Helpers #####
+
+# --- Helper: brute force bounding box ---
+def _brute_bbox(data, min_lon, min_lat, max_lon, max_lat):
+    lat, lon = data["latitude"], data["longitude"]
+    inside = (lon >= min_lon) & (lon <= max_lon) & (lat >= min_lat) & (lat <= max_lat)
+    return np.sort(data.index[inside].to_numpy())
+
+# --- Helper: brute force radius (haversine) ---
+def _brute_radius(data, lat, lon, radius_m):
+    phi1, phi2 = np.radians(lat), np.radians(data["latitude"].to_numpy())
+    d_phi, d_lambda = phi2 - phi1, np.radians(data["longitude"].to_numpy() - lon)
+    hav = np.sin(d_phi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(d_lambda / 2) ** 2
+    distance = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(hav, 1.0)))
+    return np.sort(data.index[distance <= radius_m].to_numpy()) # NaN distances compare False.
+
+# --- Helper: brute force polygon (point by point ray casting) ---
+def _brute_polygon(data, vertices):
+    inside_labels = []
+    for label, y, x in zip(data.index, data["latitude"], data["longitude"]):
+        inside = False
+        for (x1, y1), (x2, y2) in zip(vertices, vertices[1:] + vertices[:1]):
+            if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+                inside = not inside
+        if inside:
+            inside_labels.append(label)
+    return np.sort(np.array(inside_labels, dtype=data.index.dtype))
+
+# --- Helper: random star-shaped (possibly concave) polygon ---
+def _random_polygon(rng):
+    center_lon, center_lat = rng.uniform(6.0, 28.0), rng.uniform(59.0, 70.0)
+    angles = np.sort(rng.uniform(0, 2 * np.pi, rng.integers(3, 12)))
+    radii = rng.uniform(0.05, 3.0, len(angles))
+    return [(float(center_lon + r * np.cos(a)), float(center_lat + r * np.sin(a))) for a, r in zip(angles, radii)]
+
+##### Test Cases #####
+
+# --- Test: bbox matches a brute force scan, including boxes partly or wholly outside the grid --- #
+def test_bbox_matches_brute_force(points):
+    index = build_spatial_index(points)
+    rng = np.random.default_rng(1)
+    boxes = [(-10.0, 40.0, 50.0, 80.0), (40.0, 75.0, 50.0, 80.0), (-20.0, 30.0, -10.0, 40.0), (10.0, 60.0, 5.0, 65.0)]
+    for _ in range(N_CASES):
+        lon1, lon2 = np.sort(rng.uniform(3.0, 32.0, 2))
+        lat1, lat2 = np.sort(rng.uniform(57.0, 72.0, 2))
+        boxes.append((lon1, lat1, lon2, lat2))
+    for box in boxes:
+        np.testing.assert_array_equal(index.bbox(*box), _brute_bbox(points, *box))
+
+# --- Test: radius matches a brute force haversine scan --- #
+def test_radius_matches_brute_force(points):
+    index = build_spatial_index(points)
+    rng = np.random.default_rng(2)
+    queries = [(63.4, 10.4, 5_000.0), (63.4, 10.4, 0.0), (80.0, 50.0, 10_000.0)] # Cluster centre, empty, off the grid.
+    queries += [(rng.uniform(57.0, 72.0), rng.uniform(3.0, 32.0), rng.uniform(100.0, 200_000.0)) for _ in range(N_CASES)]
+    for lat, lon, radius_m in queries:
+        np.testing.assert_array_equal(index.radius(lat, lon, radius_m), _brute_radius(points, lat, lon, radius_m))
+
+# --- Test: polygon matches a brute force point-in-polygon scan --- #
+def test_polygon_matches_brute_force(points):
+    index = build_spatial_index(points)
+    rng = np.random.default_rng(3)
+    polygons = [[(40.0, 75.0), (45.0, 75.0), (45.0, 80.0)]] # Outside the grid.
+    polygons += [_random_polygon(rng) for _ in range(N_CASES)]
+    for vertices in polygons:
+        np.testing.assert_array_equal(index.polygon(vertices), _brute_polygon(points, vertices))
+        closed = vertices + vertices[:1] # A closed ring gives the same result.
+        np.testing.assert_array_equal(index.polygon(closed), _brute_polygon(points, vertices))
+
+# --- Test: Rows with a missing coordinate are never returned --- #
+def test_missing_coordinates_not_indexed(points):
+    index = build_spatial_index(points)
+    missing = points.index[points[["latitude", "longitude"]].isna().any(axis=1)]
+    assert len(index.keys) == len(points) - len(missing)
+    assert not np.isin(index.bbox(-180.0, -90.0, 180.0, 90.0), missing).any()
+
+# --- Test: select_rows on the full data and on a filtered subset matches isin --- #
+def test_select_rows_matches_isin(points):
+    index = build_spatial_index(points)
+    rng = np.random.default_rng(4)
+    for _ in range(N_CASES):
+        subset = points[rng.random(len(points)) < rng.uniform(0.05, 1.0)] # Filtered rows, original order.
+        lon1, lon2 = np.sort(rng.uniform(3.0, 32.0, 2))
+        lat1, lat2 = np.sort(rng.uniform(57.0, 72.0, 2))
+        labels = index.bbox(lon1, lat1, lon2, lat2)
+        for data in (points, subset):
+            assert_frame_equal(select_rows(data, labels), data[data.index.isin(labels)])
+
+# --- Test: Empty data --- #
+def test_empty_index():
+    index = build_spatial_index(pd.DataFrame({"latitude": [np.nan], "longitude": [10.0]}))
+    assert len(index.bbox(-180.0, -90.0, 180.0, 90.0)) == 0
+    assert len(index.radius(63.0, 10.0, 1_000.0)) == 0
+    assert len(index.polygon([(0.0, 0.0), (20.0, 0.0), (20.0, 80.0)])) == 0
@@ -0,0 +1,50 @@
+# Sammenligner byggetid og payload (JSON sendt til nettleseren) for kartmodusene i punktkart (Plotly) og
+# webgl_kart (pydeck/deck.gl).
+# Kjøres fra prosjektroten: python -m mapper_streamlit.Kart.benchmark_kart_payload [antall_kopier ...]
+# Andøya-utvalget gjentas 'antall_kopier' ganger med litt spredte koordinater (så ikke alle punkter faller sammen).
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from global_utils.data_loading import load_and_prepare_data
+from mapper_streamlit.Kart.figur_1_kart_punkter import KART_MODUSER, STANDARD_ZOOM, payload_bytes, punktkart
+from mapper_streamlit.Kart.figur_2_kart_webgl import WEBGL_MODUSER, webgl_kart
+
+DATAFIL = Path(__file__).parents[2] / "databehandling/output/final/Andøya_fugl_taxonomy.csv"
+STANDARD_KOPIER = [1, 10, 80]  # 2 541, 25 410 og 203 280 rader.
+SPREDNING_GRADER = 0.01  # Standardavvik for støyen lagt på koordinatene i kopiene.
+
+
+# --- Function: gjentatt_data ---
+# Returnerer 'data' gjentatt 'antall_kopier' ganger, med normalfordelt støy på koordinatene i kopiene.
+def gjentatt_data(data, antall_kopier):
+    gjentatt = pd.concat([data] * antall_kopier, ignore_index=True)
+    if antall_kopier > 1:
+        rng = np.random.default_rng(0)
+        for kolonne in ("latitude", "longitude"):
+            gjentatt[kolonne] = gjentatt[kolonne] + rng.normal(0, SPREDNING_GRADER, len(gjentatt))
+    return gjentatt
+
+
+# --- Function: main ---
+def main(kopier):
+    data = load_and_prepare_data(DATAFIL)
+    print(f"{'Rader':>10} {'Motor':<8} {'Modus':<20} {'Tid (s)':>8} {'Payload (MB)':>13}")
+    for antall_kopier in kopier:
+        kart_data = gjentatt_data(data, antall_kopier)
+        for motor, moduser in (("Plotly", KART_MODUSER), ("pydeck", WEBGL_MODUSER)):
+            for modus in moduser:
+                start = time.perf_counter()
+                if motor == "Plotly":
+                    payload = payload_bytes(punktkart(kart_data, "Art", modus=modus, zoom=STANDARD_ZOOM))
+                else:
+                    payload = len(webgl_kart(kart_data, "Art", modus=modus, zoom=STANDARD_ZOOM).to_json().encode("utf-8"))
+                byggetid = time.perf_counter() - start  # Inkluderer serialiseringen.
+                print(f"{len(kart_data):>10,} {motor:<8} {modus:<20} {byggetid:>8.2f} {payload / 1e6:>13.2f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or STANDARD_KOPIER)
@@ -1,47 +1,188 @@
+import math
+import h3
+import numpy as np
+import pandas as pd
 import plotly.graph_objects as go
 import plotly as plotly
 
+# --- Visningsmoduser for kartet ---
+MODUS_PUNKTER = "Alle punkter"  # Ett markørpunkt per observasjon.
+MODUS_UTVALG = "Utvalg av punkter"  # Maks MAKS_PUNKTER tilfeldig valgte observasjoner.
+MODUS_HEKSAGON = "H3-heksagoner"  # Observasjoner telt per H3-celle.
+KART_MODUSER = [MODUS_PUNKTER, MODUS_UTVALG, MODUS_HEKSAGON]
 
-def punktkart(data_fra_kart, color_by):
-    # --- Beregner gjennomsnittlig breddegrad og lengdegrad for data ---
-    center_lat = data_fra_kart["latitude"].mean()
-    center_lon = data_fra_kart["longitude"].mean()
+MAKS_PUNKTER = 20_000  # Flere markører enn dette gjør nettleseren treg.
+STANDARD_ZOOM = 10  # Startzoom for kartet.
+KART_BREDDE_PIKSLER = 800  # Figurbredde (punktkart).
+KART_HOYDE_PIKSLER = 900  # Figurhøyde (punktkart og webgl_kart).
+HEKSAGON_PIKSLER = 12  # Ønsket kantlengde for en heksagon på skjermen, i piksler.
+TILFELDIG_FRO = 0  # Fast frø: samme utvalg ved hver rerun.
 
-    # --- Beregner farger for hver art i en dictionary ---
-    unique_species = data_fra_kart["preferredPopularName"].unique()
-    species_color_palette = plotly.colors.qualitative.Dark24
-    species_color_map = {species: species_color_palette[i % len(species_color_palette)] for i, species in enumerate(unique_species)}
+# --- H3-konstanter (gjennomsnittlig kantlengde ved oppløsning 0, og faktor per oppløsningstrinn) ---
+H3_KANT_METER_RES0 = 1_281_256
+H3_KANT_FAKTOR = math.sqrt(7)
+H3_MAKS_OPPLOSNING = 15
+WEB_MERCATOR_METER_PER_PIKSEL = 156_543.03  # Meter per piksel ved ekvator og zoom 0.
 
-    # --- Beregner farger for hver familie i en dictionary ---
-    unique_families = data_fra_kart["FamilieNavn"].unique()
-    family_color_palette = plotly.colors.qualitative.Plotly
-    family_color_map = {family: family_color_palette[i % len(family_color_palette)] for i, family in enumerate(unique_families)}
 
-    # --- Fargevalg basert på art eller familie ---
-    species_color_list = [species_color_map[species] for species in data_fra_kart["preferredPopularName"]]
-    family_color_list = [family_color_map[family] for family in data_fra_kart["FamilieNavn"]]
-    color_list = species_color_list if color_by == "Art" else family_color_list
+# ----------------------------------------
+# Hjelpefunksjoner
+# ----------------------------------------
+
+# --- Function: fargeindekser ---
+# Returnerer én palettindeks per rad: verdiene i 'verdier' får farger fra en palett med 'antall_farger' farger i
+# rekkefølgen de først forekommer (som unique()), gjentatt når paletten er brukt opp. Beregnes vektorisert fra
+# kategorikodene; markørene får indeksene og en diskret fargeskala (se diskret_fargeskala) i stedet for én
+# fargestreng per punkt, som Plotly validerer én og én.
+def fargeindekser(verdier, antall_farger):
+    koder, _ = pd.factorize(verdier, use_na_sentinel=False)  # Manglende verdier får egen kode, som i unique().
+    return (koder % antall_farger).astype(np.uint8)  # Plotly sender numpy-arrays binært: 1 byte per punkt.
+
+
+# --- Function: diskret_fargeskala ---
+# Returnerer (fargeskala, cmin, cmax) som tegner palettindeks i med palett[i].
+def diskret_fargeskala(palett):
+    antall = len(palett)
+    skala = []
+    for i, farge in enumerate(palett):
+        skala += [[i / antall, farge], [(i + 1) / antall, farge]]
+    return skala, -0.5, antall - 0.5  # Indeks i havner midt i sitt intervall.
+
+
+# --- Function: h3_opplosning_for_zoom ---
+# Returnerer H3-oppløsningen der en heksagon er omtrent HEKSAGON_PIKSLER piksler bred ved 'zoom' og 'breddegrad'.
+def h3_opplosning_for_zoom(zoom, breddegrad):
+    meter_per_piksel = WEB_MERCATOR_METER_PER_PIKSEL * math.cos(math.radians(breddegrad)) / 2**zoom
+    opplosning = math.log(H3_KANT_METER_RES0 / (HEKSAGON_PIKSLER * meter_per_piksel)) / math.log(H3_KANT_FAKTOR)
+    return min(max(round(opplosning), 0), H3_MAKS_OPPLOSNING)
+
+
+# --- Function: kartutsnitt ---
+# Returnerer (min_lon, min_lat, maks_lon, maks_lat) for kartet sentrert i (breddegrad, lengdegrad) ved 'zoom',
+# med 'bredde' x 'hoyde' piksler (Web Mercator; 256-pikslers fliser som i Plotly og deck.gl).
+def kartutsnitt(breddegrad, lengdegrad, zoom, bredde=KART_BREDDE_PIKSLER, hoyde=KART_HOYDE_PIKSLER):
+    grader_per_piksel = 360 / (256 * 2**zoom)  # Lengdegrader per piksel.
+    halv_bredde = bredde / 2 * grader_per_piksel
+    halv_hoyde = hoyde / 2 * grader_per_piksel * math.cos(math.radians(breddegrad))  # Breddegrader er kortere i Mercator.
+    return lengdegrad - halv_bredde, breddegrad - halv_hoyde, lengdegrad + halv_bredde, breddegrad + halv_hoyde
+
+
+# --- Function: kartsenter ---
+# Gjennomsnittlig (breddegrad, lengdegrad) for data; (0, 0) uten koordinater.
+def kartsenter(data_fra_kart):
+    center_lat, center_lon = data_fra_kart["latitude"].mean(), data_fra_kart["longitude"].mean()
+    return (0.0, 0.0) if pd.isna(center_lat) or pd.isna(center_lon) else (float(center_lat), float(center_lon))
+
+
+# --- Function: utvalg_posisjoner ---
+# Returnerer sorterte radposisjoner for maks 'maks_punkter' av 'antall' rader (alle hvis færre).
+def utvalg_posisjoner(antall, maks_punkter=MAKS_PUNKTER):
+    if antall <= maks_punkter:
+        return np.arange(antall)
+    rng = np.random.default_rng(TILFELDIG_FRO)
+    return np.sort(rng.choice(antall, maks_punkter, replace=False))
+
+
+# --- Function: h3_celler ---
+# Returnerer H3-cellen (streng) for hver rad. Cellen beregnes én gang per unike koordinatpar.
+def h3_celler(data_fra_kart, opplosning):
+    steder = data_fra_kart.groupby(["latitude", "longitude"], sort=False).ngroup().to_numpy()
+    _, forste_rad = np.unique(steder, return_index=True)  # Første rad for hvert koordinatpar, i gruppe-rekkefølge.
+    breddegrader = data_fra_kart["latitude"].to_numpy()[forste_rad]
+    lengdegrader = data_fra_kart["longitude"].to_numpy()[forste_rad]
+    celler = np.array([h3.latlng_to_cell(lat, lon, opplosning) for lat, lon in zip(breddegrader, lengdegrader)], dtype=object)
+    return celler[steder]
+
+
+# --- Function: heksagon_aggregat ---
+# Returnerer én rad per H3-celle med antall observasjoner og antall arter, sortert etter cellen.
+def heksagon_aggregat(data_fra_kart, opplosning):
+    celler = pd.Series(h3_celler(data_fra_kart, opplosning), index=data_fra_kart.index, name="h3_celle")
+    gruppert = data_fra_kart["preferredPopularName"].groupby(celler, observed=True)
+    return pd.DataFrame({"Antall_Observasjoner": gruppert.size(), "Antall_Arter": gruppert.nunique()}).reset_index()
+
+
+# --- Function: heksagon_geojson ---
+# Returnerer GeoJSON FeatureCollection med polygonet til hver celle (id = cellen).
+def heksagon_geojson(celler):
+    features = []
+    for celle in celler:
+        ring = [[lon, lat] for lat, lon in h3.cell_to_boundary(celle)]
+        ring.append(ring[0])  # Lukker polygonet.
+        features.append({"type": "Feature", "id": celle, "geometry": {"type": "Polygon", "coordinates": [ring]}})
+    return {"type": "FeatureCollection", "features": features}
+
+
+# --- Function: payload_bytes ---
+# Størrelsen på figuren slik den sendes til nettleseren (Plotly JSON).
+def payload_bytes(fig):
+    return len(fig.to_json().encode("utf-8"))
+
+
+# ----------------------------------------
+# Figur
+# ----------------------------------------
+
+def punktkart(data_fra_kart, color_by, modus=MODUS_PUNKTER, zoom=STANDARD_ZOOM, senter=None):
+    # --- Kartsenter: gitt (breddegrad, lengdegrad), ellers gjennomsnittet av data ---
+    center_lat, center_lon = senter if senter is not None else kartsenter(data_fra_kart)
 
     fig = go.Figure()
 
-    fig.add_trace(
-        go.Scattermap(
-            lon=data_fra_kart["longitude"],
-            lat=data_fra_kart["latitude"],
-            mode="markers",  # Type of marker
-            marker=dict(size=10, color=color_list, opacity=0.9),
+    if modus == MODUS_HEKSAGON:
+        # --- Teller observasjoner per H3-celle, med oppløsning tilpasset zoom ---
+        kart_data = data_fra_kart.dropna(subset=["latitude", "longitude"])
+        opplosning = h3_opplosning_for_zoom(zoom, center_lat)
+        aggregat = heksagon_aggregat(kart_data, opplosning)
+        fig.add_trace(
+            go.Choroplethmap(
+                geojson=heksagon_geojson(aggregat["h3_celle"]),
+                locations=aggregat["h3_celle"],
+                z=aggregat["Antall_Observasjoner"],
+                customdata=aggregat["Antall_Arter"],
+                colorscale="Viridis",
+                marker={"opacity": 0.6, "line": {"width": 0}},
+                colorbar={"title": "Observasjoner"},
+                hovertemplate="%{z} observasjoner<br>%{customdata} arter<extra></extra>",
+            )
+        )
+    else:
+        # --- Fargevalg basert på art eller familie (farger beregnes for alle rader, så utvalget får samme farger) ---
+        if color_by == "Art":
+            palett, fargekolonne = plotly.colors.qualitative.Dark24, "preferredPopularName"
+        else:
+            palett, fargekolonne = plotly.colors.qualitative.Plotly, "FamilieNavn"
+        color_list = fargeindekser(data_fra_kart[fargekolonne], len(palett))
+        fargeskala, cmin, cmax = diskret_fargeskala(palett)
+
+        # --- Begrenser antall punkter i utvalgsmodus ---
+        posisjoner = utvalg_posisjoner(len(data_fra_kart)) if modus == MODUS_UTVALG else np.arange(len(data_fra_kart))
+
+        fig.add_trace(
+            go.Scattermap(
+                lon=data_fra_kart["longitude"].to_numpy(dtype=np.float32)[posisjoner],  # float32: under 1 m avvik, halv payload.
+                lat=data_fra_kart["latitude"].to_numpy(dtype=np.float32)[posisjoner],
+                mode="markers",  # Type of marker
+                marker={
+                    "size": 10,
+                    "color": color_list[posisjoner],
+                    "colorscale": fargeskala,
+                    "cmin": cmin,
+                    "cmax": cmax,
+                    "opacity": 0.9,
+                },
+            )
         )
-    )
 
     fig.update_layout(
         showlegend=True,
-        height=900,
-        width=800,
+        height=KART_HOYDE_PIKSLER,
+        width=KART_BREDDE_PIKSLER,
         map_style="satellite",
-        map=dict(
-            center=dict(lat=center_lat, lon=center_lon),
-            zoom=int(10),
-        ),
+        map={
+            "center": {"lat": center_lat, "lon": center_lon},
+            "zoom": int(zoom),
+        },
     )
 
     return fig
@@ -0,0 +1,153 @@
+import json
+
+import numpy as np
+import plotly
+import pydeck as pdk
+from pydeck.bindings.json_tools import default_serialize
+
+from mapper_streamlit.Kart.figur_1_kart_punkter import (
+    HEKSAGON_PIKSLER,
+    KART_HOYDE_PIKSLER,
+    STANDARD_ZOOM,
+    WEB_MERCATOR_METER_PER_PIKSEL,
+    fargeindekser,
+    h3_opplosning_for_zoom,
+    heksagon_aggregat,
+    kartsenter,
+)
+
+# --- Visningsmoduser for WebGL-kartet (deck.gl via pydeck) ---
+WEBGL_MODUS_PUNKTER = "Punkter"  # ScatterplotLayer: ett punkt per observasjon, tegnet på GPU.
+WEBGL_MODUS_HEKSAGON = "Heksagoner"  # HexagonLayer: punktene telles i heksagoner i nettleseren (3D-søyler).
+WEBGL_MODUS_H3 = "H3-celler"  # H3HexagonLayer: observasjoner telt per H3-celle på serveren; liten payload.
+WEBGL_MODUSER = [WEBGL_MODUS_PUNKTER, WEBGL_MODUS_HEKSAGON, WEBGL_MODUS_H3]
+
+KOORDINAT_DESIMALER = 5  # ~1 m; færre tegn per koordinat i JSON.
+PUNKT_RADIUS_PIKSLER = 3  # Punktstørrelse på skjermen.
+H3_ALFA = 170  # Gjennomsiktighet for H3-cellene (0-255).
+WEBGL_BREDDE_PIKSLER = 1600  # Antatt største bredde; pydeck-kartet fyller hele sidebredden.
+
+
+# ----------------------------------------
+# Hjelpefunksjoner
+# ----------------------------------------
+
+# --- Class: KompaktDeck ---
+# pydeck.Deck som serialiseres uten innrykk. st.pydeck_chart sender Deck.to_json(); pydeck bruker indent=2, som
+# gjør JSON-en omtrent tre ganger større og tvinger Pythons trege JSON-koder. Uten innrykk brukes C-koderen.
+class KompaktDeck(pdk.Deck):
+    def to_json(self):
+        return json.dumps(self, sort_keys=True, default=default_serialize, separators=(",", ":"))
+
+
+# --- Function: rgb_palett ---
+# Returnerer paletten (hex- eller rgb-strenger) som [r, g, b]-lister for deck.gl.
+def rgb_palett(palett):
+    tupler, _ = plotly.colors.convert_colors_to_same_type(list(palett), colortype="tuple")  # 0-1; kopi (endres på stedet).
+    return [[round(kanal * 255) for kanal in farge] for farge in tupler]
+
+
+# --- Function: koordinatliste ---
+# Returnerer [[lon, lat], ...] for radposisjonene 'posisjoner' (float32, avrundet til KOORDINAT_DESIMALER).
+# tolist() på en numpy-array er mye raskere enn å lage én dict per rad (DataFrame-data i pydeck).
+def koordinatliste(lon, lat, posisjoner):
+    koordinater = np.column_stack([lon[posisjoner], lat[posisjoner]]).astype(np.float64)
+    return koordinater.round(KOORDINAT_DESIMALER).tolist()
+
+
+# --- Function: meter_per_piksel ---
+# Meter per skjermpiksel ved 'zoom' og 'breddegrad' (Web Mercator).
+def meter_per_piksel(zoom, breddegrad):
+    return WEB_MERCATOR_METER_PER_PIKSEL * np.cos(np.radians(breddegrad)) / 2**zoom
+
+
+# --- Function: punktlag ---
+# Returnerer én ScatterplotLayer per farge. Fargen følger palettindeksen (uint8, fra kategorikodene), så hvert
+# punkt sendes bare som [lon, lat]; fargen står én gang per lag i stedet for én gang per punkt.
+def punktlag(lon, lat, fargeindeks, palett):
+    rekkefolge = np.argsort(fargeindeks, kind="stable")  # Radposisjoner gruppert etter farge.
+    grenser = np.cumsum(np.bincount(fargeindeks, minlength=len(palett)))[:-1]
+    lag = []
+    for farge, posisjoner in zip(rgb_palett(palett), np.split(rekkefolge, grenser)):
+        if len(posisjoner) == 0:
+            continue
+        lag.append(
+            pdk.Layer(
+                "ScatterplotLayer",
+                data=koordinatliste(lon, lat, posisjoner),
+                get_position="-",  # Hver rad er [lon, lat].
+                get_fill_color=farge + [230],
+                radius_units="pixels",
+                get_radius=PUNKT_RADIUS_PIKSLER,
+                pickable=False,
+            )
+        )
+    return lag
+
+
+# --- Function: heksagonlag ---
+# HexagonLayer: deck.gl teller punktene i heksagoner i nettleseren (radius tilpasset zoom) og tegner 3D-søyler.
+def heksagonlag(lon, lat, zoom, breddegrad):
+    return pdk.Layer(
+        "HexagonLayer",
+        data=koordinatliste(lon, lat, np.arange(len(lon))),
+        get_position="-",
+        radius=float(HEKSAGON_PIKSLER * meter_per_piksel(zoom, breddegrad)),
+        elevation_scale=4,
+        extruded=True,
+        coverage=0.9,
+        pickable=True,
+    )
+
+
+# --- Function: h3lag ---
+# H3HexagonLayer: observasjoner og arter per H3-celle (oppløsning tilpasset zoom) beregnet på serveren.
+# Fargen går fra gul (få observasjoner) til rød (flest).
+def h3lag(data_fra_kart, zoom, breddegrad):
+    aggregat = heksagon_aggregat(data_fra_kart, h3_opplosning_for_zoom(zoom, breddegrad))
+    maks = max(int(aggregat["Antall_Observasjoner"].max()), 1) if len(aggregat) else 1
+    return pdk.Layer(
+        "H3HexagonLayer",
+        data=aggregat.to_dict(orient="records"),  # Én rad per celle, ikke per observasjon.
+        get_hexagon="h3_celle",
+        get_fill_color=f"[255, 255 * (1 - Antall_Observasjoner / {maks}), 0, {H3_ALFA}]",
+        extruded=False,
+        stroked=False,
+        pickable=True,
+    )
+
+
+# ----------------------------------------
+# Figur
+# ----------------------------------------
+
+# --- Function: webgl_kart ---
+# Returnerer et pydeck-kart (KompaktDeck) for st.pydeck_chart. Samme data, fargevalg og zoom som punktkart.
+def webgl_kart(data_fra_kart, color_by, modus=WEBGL_MODUS_PUNKTER, zoom=STANDARD_ZOOM, senter=None):
+    kart_data = data_fra_kart.dropna(subset=["latitude", "longitude"])
+    center_lat, center_lon = senter if senter is not None else kartsenter(kart_data)
+    lon = kart_data["longitude"].to_numpy(dtype=np.float32)
+    lat = kart_data["latitude"].to_numpy(dtype=np.float32)
+
+    if modus == WEBGL_MODUS_H3:
+        lag = [h3lag(kart_data, zoom, center_lat)]
+        tooltip = {"text": "{Antall_Observasjoner} observasjoner\n{Antall_Arter} arter"}
+    elif modus == WEBGL_MODUS_HEKSAGON:
+        lag = [heksagonlag(lon, lat, zoom, center_lat)]
+        tooltip = {"text": "{elevationValue} observasjoner"}
+    else:
+        if color_by == "Art":
+            palett, fargekolonne = plotly.colors.qualitative.Dark24, "preferredPopularName"
+        else:
+            palett, fargekolonne = plotly.colors.qualitative.Plotly, "FamilieNavn"
+        lag = punktlag(lon, lat, fargeindekser(kart_data[fargekolonne], len(palett)), palett)
+        tooltip = False  # Ingen plukking av enkeltpunkter: holder GPU-en ledig for tegning.
+
+    return KompaktDeck(
+        layers=lag,
+        initial_view_state=pdk.ViewState(
+            latitude=center_lat, longitude=center_lon, zoom=zoom, pitch=40 if modus == WEBGL_MODUS_HEKSAGON else 0
+        ),
+        tooltip=tooltip,
+        height=KART_HOYDE_PIKSLER,
+    )
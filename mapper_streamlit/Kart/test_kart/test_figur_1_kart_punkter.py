@@ -0,0 +1,93 @@
+##### Imports #####
+import numpy as np  # Import numpy for array comparisons.
+import pandas as pd  # Import pandas for DataFrame creation.
+import plotly  # Import plotly for the colour palettes.
+import pytest  # Import pytest for testing framework features.
+
+# --- Module under test ---
+from mapper_streamlit.Kart.figur_1_kart_punkter import (
+    MODUS_HEKSAGON,
+    MODUS_PUNKTER,
+    MODUS_UTVALG,
+    diskret_fargeskala,
+    fargeindekser,
+    h3_opplosning_for_zoom,
+    heksagon_aggregat,
+    kartsenter,
+    kartutsnitt,
+    punktkart,
+    utvalg_posisjoner,
+)
+
+##### Fixtures #####
+
+# --- Fixture: kart_data ---
+# Observations at three places (two of them close together), with a missing species and a categorical family column.
+@pytest.fixture
+def kart_data():
+    return pd.DataFrame({
+        "latitude":             [69.30, 69.30, 69.3001, 69.20, 69.20, 69.30],
+        "longitude":            [16.10, 16.10, 16.1001, 16.00, 16.00, 16.10],
+        "preferredPopularName": ['Art A', 'Art B', 'Art A', None,   'Art C', 'Art A'],
+        "FamilieNavn":          pd.Categorical(['Fam X', 'Fam Y', 'Fam X', 'Fam Z', 'Fam Y', 'Fam X']),
+    })
+
+##### Test Cases #####
+
+# --- Test: Vectorized colours equal the per-value dictionary lookup they replace --- #
+@pytest.mark.parametrize("kolonne", ["preferredPopularName", "FamilieNavn"])
+def test_fargeindekser_match_dictionary_lookup(kart_data, kolonne):
+    palett = plotly.colors.qualitative.Plotly[:2] # Short palette: colours repeat.
+    farge_map = {verdi: palett[i % len(palett)] for i, verdi in enumerate(kart_data[kolonne].unique())}
+    forventet = [farge_map[verdi] for verdi in kart_data[kolonne]]
+    assert [palett[i] for i in fargeindekser(kart_data[kolonne], len(palett))] == forventet
+
+# --- Test: The discrete colour scale draws index i in palette colour i --- #
+def test_diskret_fargeskala():
+    palett = plotly.colors.qualitative.Dark24
+    skala, cmin, cmax = diskret_fargeskala(palett)
+    for i, farge in enumerate(palett):
+        posisjon = (i - cmin) / (cmax - cmin) # Normalized position of index i.
+        assert [f for start, f in skala if start <= posisjon][-1] == farge
+
+# --- Test: Decimation caps the number of points --- #
+def test_utvalg_posisjoner():
+    assert np.array_equal(utvalg_posisjoner(5, maks_punkter=10), np.arange(5))
+    posisjoner = utvalg_posisjoner(1000, maks_punkter=100)
+    assert len(posisjoner) == 100 and len(np.unique(posisjoner)) == 100
+    assert np.array_equal(posisjoner, np.sort(posisjoner))
+    assert np.array_equal(posisjoner, utvalg_posisjoner(1000, maks_punkter=100)) # Same sample on every rerun.
+
+# --- Test: Finer H3 resolution when zooming in --- #
+def test_h3_opplosning_for_zoom():
+    opplosninger = [h3_opplosning_for_zoom(zoom, 69.3) for zoom in range(4, 17)]
+    assert opplosninger == sorted(opplosninger)
+    assert opplosninger[0] < opplosninger[-1] <= 15
+
+# --- Test: The viewport is centred, and shrinks by half per zoom level --- #
+def test_kartutsnitt():
+    min_lon, min_lat, maks_lon, maks_lat = kartutsnitt(69.3, 16.1, 10)
+    assert min_lon < 16.1 < maks_lon and min_lat < 69.3 < maks_lat
+    assert (maks_lon + min_lon) / 2 == pytest.approx(16.1) and (maks_lat + min_lat) / 2 == pytest.approx(69.3)
+    nermere = kartutsnitt(69.3, 16.1, 11)
+    assert nermere[2] - nermere[0] == pytest.approx((maks_lon - min_lon) / 2)
+
+# --- Test: Map centre is the mean coordinate; (0, 0) without coordinates --- #
+def test_kartsenter(kart_data):
+    assert kartsenter(kart_data) == pytest.approx((kart_data["latitude"].mean(), kart_data["longitude"].mean()))
+    assert kartsenter(kart_data.iloc[:0]) == (0.0, 0.0)
+
+# --- Test: Hexagon counts --- #
+def test_heksagon_aggregat(kart_data):
+    aggregat = heksagon_aggregat(kart_data, 7) # Cells ~1.4 km: the two close places share a cell.
+    assert aggregat["Antall_Observasjoner"].sum() == len(kart_data)
+    assert sorted(aggregat["Antall_Observasjoner"]) == [2, 4]
+    assert sorted(aggregat["Antall_Arter"]) == [1, 2] # The missing species is not counted.
+
+# --- Test: Figure per mode --- #
+def test_punktkart_moduser(kart_data):
+    assert len(punktkart(kart_data, "Art", modus=MODUS_PUNKTER).data[0].lat) == len(kart_data)
+    assert len(punktkart(kart_data, "Familie", modus=MODUS_UTVALG).data[0].lat) == len(kart_data) # Under the cap.
+    heksagoner = punktkart(kart_data, "Art", modus=MODUS_HEKSAGON, zoom=10).data[0]
+    assert sum(heksagoner.z) == len(kart_data)
+    assert len(heksagoner.geojson["features"]) == len(heksagoner.locations)
@@ -0,0 +1,52 @@
+##### Imports #####
+import json  # Import json to read the serialized deck.
+
+import pandas as pd  # Import pandas for DataFrame creation.
+import plotly  # Import plotly for the colour palettes.
+
+# --- Module under test ---
+from mapper_streamlit.Kart.figur_2_kart_webgl import (
+    WEBGL_MODUS_H3,
+    WEBGL_MODUS_HEKSAGON,
+    WEBGL_MODUS_PUNKTER,
+    rgb_palett,
+    webgl_kart,
+)
+
+##### Test Data #####
+KART_DATA = pd.DataFrame({
+    "latitude":             [69.30, 69.30, 69.3001, 69.20, None],
+    "longitude":            [16.10, 16.10, 16.1001, 16.00, 16.00],
+    "preferredPopularName": ['Art A', 'Art B', 'Art A', 'Art C', 'Art A'],
+    "FamilieNavn":          ['Fam X', 'Fam Y', 'Fam X', 'Fam Z', 'Fam X'],
+})
+
+##### Test Cases #####
+
+# --- Test: One scatter layer per colour, points as [lon, lat] --- #
+def test_webgl_kart_punkter():
+    spec = json.loads(webgl_kart(KART_DATA, "Art", modus=WEBGL_MODUS_PUNKTER).to_json())
+    lag = spec["layers"]
+    assert [l["@@type"] for l in lag] == ["ScatterplotLayer"] * 3 # Art A, Art B, Art C.
+    assert sum(len(l["data"]) for l in lag) == 4 # The row without latitude is dropped.
+    assert lag[0]["data"] == [[16.1, 69.3], [16.1001, 69.3001]] # Art A.
+    assert lag[0]["getFillColor"][:3] == rgb_palett(plotly.colors.qualitative.Dark24)[0]
+
+# --- Test: The serialized deck is compact --- #
+def test_webgl_kart_kompakt_json():
+    tekst = webgl_kart(KART_DATA, "Familie").to_json()
+    assert "\n" not in tekst and ": " not in tekst
+
+# --- Test: Hexagon modes --- #
+def test_webgl_kart_heksagoner():
+    heksagoner = json.loads(webgl_kart(KART_DATA, "Art", modus=WEBGL_MODUS_HEKSAGON).to_json())["layers"][0]
+    assert heksagoner["@@type"] == "HexagonLayer" and len(heksagoner["data"]) == 4
+    h3_celler = json.loads(webgl_kart(KART_DATA, "Art", modus=WEBGL_MODUS_H3, zoom=7).to_json())["layers"][0]
+    assert h3_celler["@@type"] == "H3HexagonLayer"
+    assert sorted(celle["Antall_Observasjoner"] for celle in h3_celler["data"]) == [1, 3]
+
+# --- Test: Palette conversion leaves plotly's palette untouched --- #
+def test_rgb_palett_endrer_ikke_paletten():
+    palett = list(plotly.colors.qualitative.Plotly)
+    assert rgb_palett(plotly.colors.qualitative.Plotly)[0] == [99, 110, 250] # '#636EFA'.
+    assert plotly.colors.qualitative.Plotly == palett
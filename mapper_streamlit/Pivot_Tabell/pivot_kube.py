@@ -0,0 +1,169 @@
+##### Imports #####
+import time  # Used to time the cube build.
+
+import numpy as np  # Used for the month/year arrays.
+import pandas as pd  # Used for the cube and the pivots.
+import streamlit as st  # Used for caching the cube.
+
+from global_utils.date_columns import (  # Day/year columns from load time.
+    MISSING_DATE_INT,
+    date_day_column,
+    date_year_column,
+)
+
+##### Constants #####
+DATE_COL = "dateTimeCollected"  # Original date/time column.
+YEAR_COL = date_year_column(DATE_COL)  # int64 year column added by load_and_prepare_data.
+MONTH_COL = f"{DATE_COL}Month"  # Month (1-12), derived from the day column when the cube is built.
+INDIVIDUAL_COUNT_COL = "individualCount"  # Original individual count column.
+
+# Dimensions stored in the cube: taxonomy (coarse to fine), municipality, year, month and Red List/Alien status.
+KUBE_DIMENSIONS = [
+    "OrdenNavn",
+    "FamilieNavn",
+    "preferredPopularName",
+    "municipality",
+    YEAR_COL,
+    MONTH_COL,
+    "category",
+]
+# Further columns that can be pivoted on. They are not in the cube, so pivots using them run on the raw rows.
+RAW_ONLY_DIMENSIONS = ["county", "collector", "locality", "taxonGroupName", "behavior", "sex"]
+# Measures: both are additive, so any roll-up of the cube is a plain sum of its cells.
+MEASURES = ["Antall_Observasjoner", "Sum_Individer"]
+
+KUBE_CACHE_MAX_ENTRIES = 4  # Datasets whose cube is kept.
+
+
+##### Classes #####
+
+# --- Class: PivotKube ---
+# Pre-aggregated cube of the loaded data: one cell per distinct combination of KUBE_DIMENSIONS, with the number of
+# observations and the sum of individuals. Roll-ups (fewer dimensions), drill-downs (more dimensions, or a slice on
+# one value) and pivots over any KUBE_DIMENSIONS are sums over the cells and never touch the raw rows.
+class PivotKube:
+    def __init__(self, cells, source_rows, build_seconds):
+        self.cells = cells  # KUBE_DIMENSIONS (those present in the data) + MEASURES.
+        self.dimensions = [col for col in KUBE_DIMENSIONS if col in cells.columns]
+        self.source_rows = source_rows  # Rows of the data the cube was built from.
+        self.build_seconds = build_seconds  # Wall time of build_pivot_kube.
+        self.memory_bytes = int(cells.memory_usage(deep=True).sum())  # Footprint of the cells.
+
+    # --- Method: covers ---
+    # True if every dimension used (rows, columns and slices) is stored in the cube.
+    def covers(self, dimensions):
+        return set(dimensions) <= set(self.dimensions)
+
+    # --- Method: rollup ---
+    # Returns the measures summed over every dimension not in 'dimensions', for the cells matching 'selections'
+    # ({dimension: [values]}; empty selections keep all cells). One row per combination, missing values kept.
+    def rollup(self, dimensions, selections=None):
+        cells = self.cells[_selection_mask(self.cells, selections)]
+        if not dimensions:
+            return cells[MEASURES].sum().to_frame().T  # Grand total.
+        return cells.groupby(list(dimensions), observed=True, dropna=False)[MEASURES].sum().reset_index()
+
+
+##### Helper Functions #####
+
+# --- Function: _period_columns ---
+# Returns the year and month of each row as nullable Int64 Series (missing dates are <NA>).
+# Uses the int64 day/year columns from load time when present, otherwise the datetime64 column.
+def _period_columns(data):
+    day_col = date_day_column(DATE_COL)
+    if day_col in data.columns:
+        days = data[day_col].to_numpy()
+        valid = days != MISSING_DATE_INT
+        dates = np.where(valid, days, 0).astype("datetime64[D]")
+    else:
+        dates = pd.to_datetime(data[DATE_COL], errors="coerce").to_numpy(dtype="datetime64[D]")
+        valid = ~np.isnat(dates)
+    years = dates.astype("datetime64[Y]").astype(np.int64) + 1970
+    months = dates.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    year = pd.Series(pd.array(years, dtype="Int64"), index=data.index).where(valid)
+    month = pd.Series(pd.array(months, dtype="Int64"), index=data.index).where(valid)
+    return year, month
+
+
+# --- Function: _selection_mask ---
+# Returns the boolean mask of rows whose value is in the selected values for every dimension in 'selections'.
+def _selection_mask(frame, selections):
+    mask = np.ones(len(frame), dtype=bool)
+    for dimension, values in (selections or {}).items():
+        if values:
+            mask &= frame[dimension].isin(values).to_numpy()
+    return mask
+
+
+##### Functions #####
+
+# --- Function: build_pivot_kube ---
+# Builds the PivotKube of 'data' (loaded data, original column names) in one grouped pass over the rows.
+def build_pivot_kube(data):
+    start = time.perf_counter()
+    year, month = _period_columns(data)
+    frame = pd.DataFrame(
+        {col: data[col] for col in KUBE_DIMENSIONS if col in data.columns and col not in (YEAR_COL, MONTH_COL)}
+    )
+    frame[YEAR_COL] = year
+    frame[MONTH_COL] = month
+    frame["Sum_Individer"] = pd.to_numeric(data[INDIVIDUAL_COUNT_COL], errors="coerce").fillna(0)
+    dimensions = [col for col in KUBE_DIMENSIONS if col in frame.columns]
+    grouped = frame.groupby(dimensions, observed=True, dropna=False, sort=False)["Sum_Individer"]
+    cells = grouped.agg(["size", "sum"]).reset_index()
+    cells.columns = dimensions + MEASURES  # size -> Antall_Observasjoner, sum -> Sum_Individer.
+    return PivotKube(cells, len(data), time.perf_counter() - start)
+
+
+# --- Function: load_pivot_kube ---
+# Returns the PivotKube of the loaded data, built once per dataset (fingerprint from load_and_prepare_data).
+# Data without a fingerprint gets a fresh, uncached cube.
+def load_pivot_kube(data):
+    dataset = data.attrs.get("dataset_fingerprint")
+    if dataset is None:
+        return build_pivot_kube(data)
+    return _cached_pivot_kube(dataset, len(data), data)
+
+
+@st.cache_resource(max_entries=KUBE_CACHE_MAX_ENTRIES)  # Shared across reruns and sessions; never modified.
+def _cached_pivot_kube(dataset_fingerprint, row_count, _data):  # _data is not hashed: the fingerprint identifies it.
+    return build_pivot_kube(_data)
+
+
+# --- Function: raw_rollup ---
+# Same result as PivotKube.rollup, computed from the raw rows. Fallback for dimensions outside the cube.
+def raw_rollup(data, dimensions, selections=None):
+    year, month = _period_columns(data)  # Same year/month as in the cube.
+    periods = {YEAR_COL: year, MONTH_COL: month}
+    needed = list(dict.fromkeys(list(dimensions) + list(selections or {})))
+    frame = pd.DataFrame({col: periods[col] if col in periods else data[col] for col in needed})  # Only the columns used.
+    frame["Sum_Individer"] = pd.to_numeric(data[INDIVIDUAL_COUNT_COL], errors="coerce").fillna(0)
+    frame = frame[_selection_mask(frame, selections)]
+    if not dimensions:
+        return pd.DataFrame({"Antall_Observasjoner": [len(frame)], "Sum_Individer": [frame["Sum_Individer"].sum()]})
+    grouped = frame.groupby(list(dimensions), observed=True, dropna=False)["Sum_Individer"]
+    result = grouped.agg(["size", "sum"]).reset_index()
+    result.columns = list(dimensions) + MEASURES
+    return result
+
+
+# --- Function: pivot_table ---
+# Returns (pivot DataFrame, source) for 'measure' with 'rows' as index and 'columns' as columns (0 where empty).
+# Uses the cube whenever it stores every dimension involved (source "kube"), otherwise the raw rows ("rådata").
+def pivot_table(kube, data, rows, columns, measure, selections=None):
+    selections = {dimension: values for dimension, values in (selections or {}).items() if values}
+    dimensions = list(dict.fromkeys(list(rows) + list(columns)))  # A dimension used twice is grouped once.
+    if kube is not None and kube.covers(dimensions + list(selections)):
+        long_table, source = kube.rollup(dimensions, selections), "kube"
+    else:
+        long_table, source = raw_rollup(data, dimensions, selections), "rådata"
+
+    if not rows and not columns:
+        return long_table[[measure]], source
+    table = long_table.pivot_table(
+        index=list(rows) or None, columns=list(columns) or None, values=measure,
+        aggfunc="sum", fill_value=0, observed=True, dropna=False,
+    )
+    if isinstance(table, pd.Series):
+        table = table.to_frame(measure)
+    return table, source
@@ -0,0 +1,82 @@
+##### Imports #####
+import pandas as pd  # Import pandas for DataFrame creation.
+import pytest  # Import pytest for testing framework features.
+from pandas.testing import assert_frame_equal  # Import specific assertion for DataFrames.
+
+from global_utils.date_columns import add_date_part_columns  # Adds the day/year columns, as load_and_prepare_data does.
+
+# --- Module under test ---
+from mapper_streamlit.Pivot_Tabell.pivot_kube import MONTH_COL, YEAR_COL, build_pivot_kube, pivot_table, raw_rollup
+
+##### Fixtures #####
+
+# --- Fixture: loaded_data ---
+# Loaded-style data: parsed dates with day/year columns, a missing date, missing names and a missing count.
+@pytest.fixture
+def loaded_data():
+    data = pd.DataFrame({
+        "OrdenNavn":            ['Ord 1', 'Ord 1', 'Ord 1', 'Ord 2', 'Ord 2', None,    'Ord 1'],
+        "FamilieNavn":          ['Fam X', 'Fam X', 'Fam Y', 'Fam Z', 'Fam Z', None,    'Fam Y'],
+        "preferredPopularName": ['Art A', 'Art A', 'Art B', 'Art C', 'Art D', None,    'Art B'],
+        "municipality":         ['Andøy', 'Andøy', 'Andøy', 'Bø',    'Bø',    'Andøy', 'Bø'],
+        "category":             ['CR', 'CR', 'LC', 'LC', 'NT', 'LC', 'LC'],
+        "collector":            ['Obs 1', 'Obs 2', 'Obs 1', 'Obs 1', 'Obs 2', 'Obs 3', 'Obs 2'],
+        "individualCount":      pd.array([5, 3, None, 7, 2, 1, 4], dtype="Int64"),
+        "dateTimeCollected":    pd.to_datetime([
+            '2022-05-01 08:00', '2022-05-20 09:30', '2023-06-02 10:00', '2023-06-02 11:00',
+            None, '2021-01-01 00:00', '2023-07-15 07:45'
+        ]),
+    })
+    return add_date_part_columns(data, "dateTimeCollected")
+
+##### Test Cases #####
+
+# --- Test: Cube roll-ups equal the same roll-ups of the raw rows --- #
+@pytest.mark.parametrize("dimensions, selections", [
+    ([], None),
+    (["OrdenNavn"], None),
+    (["OrdenNavn", YEAR_COL], None),
+    (["municipality", MONTH_COL], {"category": ["LC"]}),
+    (["FamilieNavn"], {YEAR_COL: [2023], "OrdenNavn": ["Ord 1"]}),
+])
+def test_kube_rollup_matches_raw_rollup(loaded_data, dimensions, selections):
+    kube = build_pivot_kube(loaded_data)
+    assert len(kube.cells) < len(loaded_data) # Rows with the same dimension values share a cell.
+    expected = raw_rollup(loaded_data, dimensions, selections)
+    result = kube.rollup(dimensions, selections)
+    sort_by = dimensions or None
+    if sort_by:
+        expected = expected.sort_values(sort_by, na_position='last').reset_index(drop=True)
+        result = result.sort_values(sort_by, na_position='last').reset_index(drop=True)
+    assert_frame_equal(result, expected, check_dtype=False, check_categorical=False)
+
+# --- Test: Year and month come from the date; missing dates stay missing --- #
+def test_kube_period_columns(loaded_data):
+    kube = build_pivot_kube(loaded_data)
+    years = kube.rollup([YEAR_COL]).set_index(YEAR_COL)["Antall_Observasjoner"]
+    assert years[2022] == 2 and years[2023] == 3 and years[2021] == 1
+    assert years[years.index.isna()].sum() == 1 # The row without a date.
+    months = kube.rollup([MONTH_COL]).set_index(MONTH_COL)["Sum_Individer"]
+    assert months[5] == 8 and months[6] == 7 # Missing individual count counts as 0.
+
+# --- Test: pivot_table uses the cube when it stores every dimension, else the raw rows --- #
+def test_pivot_table_source(loaded_data):
+    kube = build_pivot_kube(loaded_data)
+    table, source = pivot_table(kube, loaded_data, ["OrdenNavn"], [YEAR_COL], "Sum_Individer")
+    assert source == "kube"
+    assert table.loc["Ord 1", 2022] == 8 and table.loc["Ord 2", 2022] == 0 # Empty combinations are 0.
+
+    raw_table, source = pivot_table(kube, loaded_data, ["collector"], [YEAR_COL], "Antall_Observasjoner")
+    assert source == "rådata" # 'collector' is not a cube dimension.
+    assert raw_table.loc["Obs 1", 2023] == 2
+
+    total, source = pivot_table(kube, loaded_data, [], [], "Antall_Observasjoner")
+    assert source == "kube" and total["Antall_Observasjoner"].iloc[0] == len(loaded_data)
+
+# --- Test: Build statistics --- #
+def test_kube_build_statistics(loaded_data):
+    kube = build_pivot_kube(loaded_data)
+    assert kube.source_rows == len(loaded_data)
+    assert kube.build_seconds >= 0
+    assert kube.memory_bytes > 0
+    assert kube.covers(["OrdenNavn", MONTH_COL]) and not kube.covers(["collector"])
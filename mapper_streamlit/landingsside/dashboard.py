@@ -10,15 +10,13 @@ from .utils_dashboard.formatering_md_tekst import (
     format_top_agg_md,
     format_top_frequency_md
 )
-# Calculation Functions
-from .utils_dashboard.calculations.calculate_basic_metrics import calculate_basic_metrics
-from .utils_dashboard.calculations.calculate_redlists_alien_forvaltning_stats import calculate_all_status_counts
-from .utils_dashboard.calculations.calculate_top_lists import calculate_all_top_lists
+# Calculation Functions (run through the dashboard cache, keyed on dataset fingerprint + filter state)
+from .utils_dashboard.calculations.dashboard_cache import run_dashboard_calculation, load_partial_aggregates
+from global_utils.filtering.filter_logic import structured_filter_mask # Current filters over the partial aggregates.
 # Display Functions
 from .utils_dashboard.display_UI.display_kartleggings_info import display_main_metrics_grid
 from .utils_dashboard.display_UI.display_rødliste_fremmedarter_arter_av_forvaltningsinteresse import display_all_status_sections
 # Figure Functions
-from .figures_dashboard.obs_periode_calculations import calculate_yearly_metrics # Import yearly metrics calculation.
 from .figures_dashboard.obs_periode_figur import create_observation_period_figure # Import figure creation.
 # Import for renaming
 from global_utils.column_mapping import get_display_name # For renaming columns to display names.
@@ -41,7 +39,9 @@ def display_dashboard(data,
                         original_alien_flag_col: str = "Fremmede arter kategori", # Placeholder: e.g., "Fremmede arter"
                         original_special_status_cols_list: list = [ # Placeholder list of original names
                             "Prioriterte Arter", "Andre Spes. Hensyn.", "Ansvarsarter", "Spes. Økol. Former"
-                            ]
+                            ],
+                        cache_key=None, # filter_state_key() of the unfiltered data; None disables caching.
+                        loaded_data=None # Unfiltered data 'data' was filtered from; enables the partial aggregates.
                         ):
     # --- Initialize Session State for Top 10 Visibility --- 
     if 'show_dashboard_top_lists' not in st.session_state:
@@ -52,36 +52,74 @@ def display_dashboard(data,
         return
 
     # --- Perform All Calculations (using original column names) ---
-    basic_metrics = calculate_basic_metrics(
-        data,
-        individual_count_col=original_individual_count_col,
-        art_col=original_art_col,
-        family_col=original_family_col,
-        observer_col=original_observer_col,
-        event_date_col=original_event_date_col
-    )
-    status_counts = calculate_all_status_counts(
-        data,
-        category_col=original_category_col,
-        alien_flag_col=original_alien_flag_col,
-        original_special_status_cols=original_special_status_cols_list
-    )
-    # Calculate all top lists. These will have original column names in the resulting DFs.
-    raw_top_lists = calculate_all_top_lists(
-        data, top_n=10,
-        art_col=original_art_col,
-        family_col=original_family_col,
-        observer_col=original_observer_col,
-        individual_count_col=original_individual_count_col,
-        category_col=original_category_col,
-        original_special_status_cols=original_special_status_cols_list
-    )
+    # Incremental path: the partial aggregates of the loaded data (built once per dataset) are filtered with the
+    # current filter state and the results are computed from the selected groups. Used unless the general text
+    # search is active or the date range splits a (species, observer, year, ...) group; the row count check guards
+    # against 'data' coming from another filter state.
+    partials = None
+    if loaded_data is not None:
+        partials = load_partial_aggregates(
+            loaded_data,
+            art_col=original_art_col,
+            family_col=original_family_col,
+            observer_col=original_observer_col,
+            individual_count_col=original_individual_count_col,
+            event_date_col=original_event_date_col,
+            category_col=original_category_col,
+            alien_flag_col=original_alien_flag_col,
+            original_special_status_cols=original_special_status_cols_list
+        )
+    group_mask = structured_filter_mask(partials.groups) if partials is not None else None
+    if group_mask is not None and partials.observation_count(group_mask) == len(data):
+        basic_metrics = partials.basic_metrics(group_mask)
+        status_buckets = partials.status_buckets(group_mask)
+        status_counts = partials.status_counts(status_buckets)
+        raw_top_lists = partials.top_lists(data, group_mask, status_buckets, top_n=10)
+        yearly_metrics_data = partials.yearly_metrics(group_mask)
+    else:
+        # Full path over the filtered rows, cached on cache_key (computed once per rerun by the caller), so the
+        # filtered frame is never hashed.
+        basic_metrics = run_dashboard_calculation(
+            cache_key, "basic_metrics", data,
+            individual_count_col=original_individual_count_col,
+            art_col=original_art_col,
+            family_col=original_family_col,
+            observer_col=original_observer_col,
+            event_date_col=original_event_date_col
+        )
+        # One grouped (status bucket, species) aggregation; the status counts and the status top lists are both read from it.
+        status_buckets = run_dashboard_calculation(
+            cache_key, "status_buckets", data,
+            category_col=original_category_col,
+            original_special_status_cols=original_special_status_cols_list,
+            alien_flag_col=original_alien_flag_col,
+            art_col=original_art_col,
+            individual_count_col=original_individual_count_col
+        )
+        status_counts = run_dashboard_calculation(
+            cache_key, "status_counts", data,
+            category_col=original_category_col,
+            alien_flag_col=original_alien_flag_col,
+            original_special_status_cols=original_special_status_cols_list,
+            status_buckets=status_buckets
+        )
+        # Calculate all top lists. These will have original column names in the resulting DFs.
+        raw_top_lists = run_dashboard_calculation(
+            cache_key, "top_lists", data, top_n=10,
+            art_col=original_art_col,
+            family_col=original_family_col,
+            observer_col=original_observer_col,
+            individual_count_col=original_individual_count_col,
+            category_col=original_category_col,
+            original_special_status_cols=original_special_status_cols_list,
+            status_buckets=status_buckets
+        )
 
-    yearly_metrics_data = calculate_yearly_metrics(
-        data, 
-        date_col_name=original_event_date_col, 
-        individuals_col_name=original_individual_count_col
-    )
+        yearly_metrics_data = run_dashboard_calculation(
+            cache_key, "yearly_metrics", data,
+            date_col_name=original_event_date_col, 
+            individuals_col_name=original_individual_count_col
+        )
 
     # --- Prepare Top Lists for Display (Rename Columns) ---
     # The formatting functions expect display names, so we rename columns here.
@@ -1,7 +1,7 @@
 # ##### Imports #####
 import pandas as pd  # Import pandas for data manipulation.
 import logging      # Import logging module.
-import streamlit as st # Import Streamlit for caching.
+from global_utils.date_columns import MISSING_DATE_INT, date_year_column # Precomputed int64 year column from load time.
 
 # --- Setup Logging ---
 # Get a logger instance for this module.
@@ -9,7 +9,6 @@ logger = logging.getLogger(__name__)
 
 # ##### Calculation Function #####
 
-@st.cache_data
 def calculate_yearly_metrics(data, date_col_name: str, individuals_col_name: str):
     # --- Function: calculate_yearly_metrics ---
     # Calculates yearly sums of observations and individuals, and the average individuals per observation.
@@ -40,16 +39,26 @@ def calculate_yearly_metrics(data, date_col_name: str, individuals_col_name: str
             return pd.DataFrame(columns=output_columns)  # Return empty df.
 
         # --- Data Preparation ---
-        df = data.copy()  # Create a copy.
-        # Convert date column to datetime objects.
-        # Removing the strict format string allows pandas to infer the format or handle already-datetime objects.
-        # errors='coerce' will turn unparseable dates into NaT.
-        df[date_col_name] = pd.to_datetime(
-            df[date_col_name], 
-            errors='coerce' 
-            # format='%d.%m.%Y %H:%M:%S' # Strict format string removed for flexibility
-        )
-        df.dropna(subset=[date_col_name], inplace=True)  # Drop rows where date conversion resulted in NaT.
+        year_col_name = date_year_column(date_col_name) # int64 year column added by load_and_prepare_data.
+        if year_col_name in data.columns:
+            # Use the year computed once at load time: no copy of the frame and no date parsing.
+            valid_rows = data[year_col_name] != MISSING_DATE_INT # Rows with a valid date.
+            df = pd.DataFrame({
+                'Year': data.loc[valid_rows, year_col_name],
+                individuals_col_name: data.loc[valid_rows, individuals_col_name],
+            })
+        else:
+            df = data[[date_col_name, individuals_col_name]].copy()  # Copy only the needed columns.
+            # Convert date column to datetime objects.
+            # Removing the strict format string allows pandas to infer the format or handle already-datetime objects.
+            # errors='coerce' will turn unparseable dates into NaT.
+            df[date_col_name] = pd.to_datetime(
+                df[date_col_name], 
+                errors='coerce' 
+                # format='%d.%m.%Y %H:%M:%S' # Strict format string removed for flexibility
+            )
+            df.dropna(subset=[date_col_name], inplace=True)  # Drop rows where date conversion resulted in NaT.
+            df['Year'] = df[date_col_name].dt.year  # Extract year.
 
         # Handle empty DataFrame after date conversion/dropna
         if df.empty:
@@ -58,8 +67,6 @@ def calculate_yearly_metrics(data, date_col_name: str, individuals_col_name: str
                          "Returning empty yearly metrics.")
             return pd.DataFrame(columns=output_columns)  # Return empty df.
 
-        df['Year'] = df[date_col_name].dt.year  # Extract year.
-
         # --- Aggregation ---
         # Group by year and aggregate using the provided individuals column name.
         yearly_summary = df.groupby('Year').agg(
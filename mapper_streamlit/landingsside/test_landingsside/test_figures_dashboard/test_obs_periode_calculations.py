@@ -7,6 +7,7 @@ from pandas.testing import assert_frame_equal # Import specific assertion for Da
 # --- Module under test ---
 # Use absolute import from the project source directory
 from mapper_streamlit.landingsside.figures_dashboard.obs_periode_calculations import calculate_yearly_metrics # Import the function to be tested.
+from global_utils.date_columns import add_date_part_columns # Adds the int64 day/year columns as the data loader does.
 
 ##### Constants #####
 DATE_COL = "Innsamlingsdato/-tid" # Define renamed date column constant.
@@ -169,4 +170,19 @@ def test_calculate_yearly_metrics_zero_individuals(data_with_zero_individuals):
 
     # Assert: Check if the average is correctly calculated as 0.0.
     assert_frame_equal(result_df, expected_df, check_dtype=False) # Assert equality.
-    assert result_df.loc[result_df['Year'] == 2022, 'Avg_Individuals_Per_Observation'].iloc[0] == 0.0 # Explicit check for 0.0 average. 
\ No newline at end of file
+    assert result_df.loc[result_df['Year'] == 2022, 'Avg_Individuals_Per_Observation'].iloc[0] == 0.0 # Explicit check for 0.0 average. 
+# --- Test: Precomputed Year Column Gives The Same Result --- #
+def test_calculate_yearly_metrics_uses_year_column(data_with_invalid_dates):
+    # Arrange: Parse the dates and add the int64 day/year columns, as load_and_prepare_data does.
+    typed_df = data_with_invalid_dates.copy()
+    typed_df[DATE_COL] = pd.to_datetime(typed_df[DATE_COL], errors='coerce')
+    add_date_part_columns(typed_df, DATE_COL)
+    typed_df[DATE_COL] = 'not parsed again' # The date column itself must not be needed.
+
+    # Act: Call the function with and without the year column.
+    result_df = calculate_yearly_metrics(typed_df, date_col_name=DATE_COL, individuals_col_name=IND_COL)
+    expected_df = calculate_yearly_metrics(data_with_invalid_dates, date_col_name=DATE_COL, individuals_col_name=IND_COL)
+
+    # Assert: Same yearly sums; invalid dates are skipped.
+    assert_frame_equal(result_df, expected_df, check_dtype=False)
+    assert result_df['Sum_Individuals'].tolist() == [5, 20]
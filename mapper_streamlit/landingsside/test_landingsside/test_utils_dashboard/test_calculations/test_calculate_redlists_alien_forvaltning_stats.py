@@ -223,4 +223,21 @@ def test_calculate_all_status_counts_alien_both_criteria():
         original_special_status_cols=TEST_ORIGINAL_SPECIAL_STATUS_COLS
     )
     assert result['alien_total'] == 3
-    assert result['alien_breakdown'] == {'SE': 1, 'HI': 1, 'PH': 0, 'LO': 0} 
\ No newline at end of file
+    assert result['alien_breakdown'] == {'SE': 1, 'HI': 1, 'PH': 0, 'LO': 0} 
+# --- Test: Bool Flag Columns Give The Same Counts As 'Yes'/'No' --- #
+def test_calculate_all_status_counts_bool_flags(status_data):
+    # Arrange: Convert the flag columns to bool, as the pipeline output and data loader provide them.
+    bool_data = status_data.copy()
+    for col in [ALIEN_FLAG_COL] + TEST_ORIGINAL_SPECIAL_STATUS_COLS:
+        bool_data[col] = bool_data[col] == 'Yes'
+    kwargs = {"category_col": CAT_COL, "alien_flag_col": ALIEN_FLAG_COL,
+              "original_special_status_cols": TEST_ORIGINAL_SPECIAL_STATUS_COLS}
+
+    # Act
+    result = calculate_all_status_counts(bool_data, **kwargs)
+    expected = calculate_all_status_counts(status_data, **kwargs)
+
+    # Assert
+    assert result['alien_total'] == expected['alien_total'] == 5
+    assert result['special_status_breakdown'] == expected['special_status_breakdown']
+    assert result['special_status_total'] == 11
@@ -0,0 +1,85 @@
+##### Imports #####
+import pandas as pd  # Import pandas for DataFrame creation.
+import pytest  # Import pytest for testing framework features.
+
+# --- Module under test ---
+from mapper_streamlit.landingsside.utils_dashboard.calculations.calculate_status_buckets import (
+    ALIEN_FLAG_ONLY_BUCKET,
+    aggregate_status_buckets,
+    bucket_totals,
+    special_status_bucket,
+    top_species_per_bucket,
+)
+
+##### Constants for Testing #####
+TEST_ART_COL = "Art"
+TEST_IND_COL = "Antall Individer"
+TEST_CATEGORY_COL = "Kategori"
+TEST_ALIEN_FLAG_COL = "Fremmede arter"
+TEST_SPECIAL_STATUS_COLS = ["Prioriterte Arter", "Ansvarsarter"]
+
+##### Fixtures #####
+
+# --- Fixture: bucket_data ---
+# Rows in several buckets at once (category + status flags), a missing species and a non-numeric count.
+@pytest.fixture
+def bucket_data():
+    data = {
+        TEST_ART_COL:        ['Art A', 'Art A', 'Art B', None,  'Art C', 'Art D'],
+        TEST_IND_COL:        [2,       'x',     5,       1,     4,       3],
+        TEST_CATEGORY_COL:   ['CR',    'CR',    'SE',    'CR',  'LC',    'NT'],
+        TEST_ALIEN_FLAG_COL: [False,   False,   True,    False, True,    False],
+        "Prioriterte Arter": [True,    False,   False,   False, True,    True],
+        "Ansvarsarter":      [True,    True,    False,   False, False,   False],
+    }
+    return pd.DataFrame(data)
+
+##### Test Cases #####
+
+# --- Test: One row per (bucket, species) with counts and sums --- #
+def test_aggregate_status_buckets_groups_by_bucket_and_species(bucket_data):
+    result = aggregate_status_buckets(
+        bucket_data, TEST_CATEGORY_COL, TEST_SPECIAL_STATUS_COLS,
+        alien_flag_col=TEST_ALIEN_FLAG_COL, art_col=TEST_ART_COL, individual_count_col=TEST_IND_COL
+    )
+    assert result.loc[('CR', 'Art A')].tolist() == [2, 2] # 'x' counts as 0 individuals.
+    assert result.loc[(special_status_bucket('Ansvarsarter'), 'Art A')].tolist() == [2, 2]
+    assert result.loc[(special_status_bucket('Prioriterte Arter'), 'Art D')].tolist() == [1, 3]
+    assert result.loc[(ALIEN_FLAG_ONLY_BUCKET, 'Art C')].tolist() == [1, 4] # Flagged, category LC.
+    assert (ALIEN_FLAG_ONLY_BUCKET, 'Art B') not in result.index # Category SE already counts as alien.
+
+# --- Test: Totals include rows without species; empty buckets are absent --- #
+def test_bucket_totals(bucket_data):
+    totals = bucket_totals(aggregate_status_buckets(bucket_data, TEST_CATEGORY_COL, TEST_SPECIAL_STATUS_COLS, art_col=TEST_ART_COL))
+    assert totals['CR'] == 3
+    assert totals[special_status_bucket('Prioriterte Arter')] == 3
+    assert 'EN' not in totals.index
+
+# --- Test: Top species per bucket --- #
+def test_top_species_per_bucket(bucket_data):
+    buckets = aggregate_status_buckets(
+        bucket_data, TEST_CATEGORY_COL, TEST_SPECIAL_STATUS_COLS, art_col=TEST_ART_COL, individual_count_col=TEST_IND_COL
+    )
+    prioriterte = special_status_bucket('Prioriterte Arter')
+    result = top_species_per_bucket(buckets, ['CR', prioriterte, 'EN'], TEST_ART_COL, top_n=2)
+    assert result['CR'][TEST_ART_COL].tolist() == ['Art A'] # The row without species is not listed.
+    assert result[prioriterte][TEST_ART_COL].tolist() == ['Art C', 'Art D'] # Equal counts: more individuals first.
+    assert result['EN'].empty
+    assert list(result['EN'].columns) == [TEST_ART_COL, 'Antall_Observasjoner', 'Sum_Individer']
+
+# --- Test: Special status columns named like a category or the alien flag-only bucket get buckets of their own --- #
+def test_special_status_buckets_do_not_merge_with_category_buckets(bucket_data):
+    data = bucket_data.rename(columns={"Prioriterte Arter": 'CR', "Ansvarsarter": ALIEN_FLAG_ONLY_BUCKET})
+    totals = bucket_totals(aggregate_status_buckets(
+        data, TEST_CATEGORY_COL, ['CR', ALIEN_FLAG_ONLY_BUCKET], alien_flag_col=TEST_ALIEN_FLAG_COL, art_col=TEST_ART_COL
+    ))
+    assert totals['CR'] == 3 # Category CR only.
+    assert totals[special_status_bucket('CR')] == 3 # Flagged in the status column 'CR'.
+    assert totals[ALIEN_FLAG_ONLY_BUCKET] == 1 # Flagged alien, category LC.
+    assert totals[special_status_bucket(ALIEN_FLAG_ONLY_BUCKET)] == 2
+
+# --- Test: Missing category column --- #
+def test_aggregate_status_buckets_missing_category_column(bucket_data):
+    with pytest.raises(KeyError) as excinfo:
+        aggregate_status_buckets(bucket_data.drop(columns=[TEST_CATEGORY_COL]), TEST_CATEGORY_COL, TEST_SPECIAL_STATUS_COLS)
+    assert TEST_CATEGORY_COL in str(excinfo.value)
@@ -0,0 +1,30 @@
+##### Imports #####
+# --- Module under test ---
+from mapper_streamlit.landingsside.utils_dashboard.calculations import dashboard_cache
+
+##### Helpers #####
+
+# --- Class: Unhashable ---
+# Stands in for the status buckets DataFrame: st.cache_data fails if it tries to hash (pickle) it.
+class Unhashable:
+    def __reduce__(self):
+        raise TypeError("status buckets must not be hashed")
+
+
+##### Test Cases #####
+
+# --- Test: Status buckets are passed to the calculation without being hashed, and cache hits skip the calculation --- #
+def test_status_buckets_not_hashed(monkeypatch):
+    calls = []
+    def probe(data, status_buckets=None, **column_args): # Records the buckets it receives.
+        calls.append(status_buckets)
+        return len(calls)
+    monkeypatch.setitem(dashboard_cache.DASHBOARD_CALCULATIONS, "probe", probe)
+    buckets = Unhashable()
+    try:
+        first = dashboard_cache.run_dashboard_calculation(("test", 1), "probe", None, status_buckets=buckets, top_n=1)
+        second = dashboard_cache.run_dashboard_calculation(("test", 1), "probe", None, status_buckets=buckets, top_n=1)
+    finally:
+        dashboard_cache._cached_calculation.clear()
+    assert first == second == 1 # Second call is a cache hit.
+    assert calls == [buckets]
@@ -0,0 +1,199 @@
+##### Imports #####
+import numpy as np  # Import numpy for the generated test data.
+import pandas as pd  # Import pandas for DataFrame creation.
+import pytest  # Import pytest for testing framework features.
+from pandas.testing import assert_frame_equal  # Import specific assertion for DataFrames.
+
+from global_utils.date_columns import (  # Date helpers, as used by load_and_prepare_data and the date filter.
+    add_date_part_columns,
+    date_range_group_mask,
+    date_range_mask,
+)
+from global_utils.filtering.filter_logic import GROUP_FIRST_DAY_COL, GROUP_LAST_DAY_COL
+from mapper_streamlit.landingsside.figures_dashboard.obs_periode_calculations import calculate_yearly_metrics
+from mapper_streamlit.landingsside.utils_dashboard.calculations.calculate_basic_metrics import calculate_basic_metrics
+from mapper_streamlit.landingsside.utils_dashboard.calculations.calculate_redlists_alien_forvaltning_stats import (
+    calculate_all_status_counts,
+)
+from mapper_streamlit.landingsside.utils_dashboard.calculations.calculate_top_lists import calculate_all_top_lists
+
+# --- Modules under test / reference calculations ---
+from mapper_streamlit.landingsside.utils_dashboard.calculations.partial_aggregates import build_partial_aggregates
+
+##### Constants for Testing #####
+# Column names of loaded data (the partial aggregates group by the columns the filters read).
+TEST_SPECIAL_STATUS_COLS = ["Prioriterte arter", "Ansvarsarter"]
+TEST_COLUMN_ARGS = {
+    "art_col": "preferredPopularName",
+    "family_col": "FamilieNavn",
+    "observer_col": "collector",
+    "individual_count_col": "individualCount",
+    "event_date_col": "dateTimeCollected",
+    "category_col": "category",
+    "alien_flag_col": "Fremmede arter",
+    "original_special_status_cols": TEST_SPECIAL_STATUS_COLS,
+}
+
+##### Fixtures #####
+
+# --- Fixture: loaded_data ---
+# Loaded-style data: parsed dates with day/year columns, bool status flags, repeated (species, day, observer) rows.
+@pytest.fixture
+def loaded_data():
+    data = pd.DataFrame({
+        "preferredPopularName": ['Art A', 'Art A', 'Art B', 'Art A', 'Art C', None,    'Art B', 'Art D'],
+        "FamilieNavn":          ['Fam X', 'Fam X', 'Fam Y', 'Fam X', 'Fam Y', None,    'Fam Y', 'Fam Z'],
+        "OrdenNavn":            ['Ord 1', 'Ord 1', 'Ord 1', 'Ord 1', 'Ord 2', None,    'Ord 1', 'Ord 2'],
+        "collector":            ['Obs 1', 'Obs 1', 'Obs 2', 'Obs 2', 'Obs 1', 'Obs 3', 'Obs 2', 'Obs 1'],
+        "individualCount":      pd.array([5, 3, None, 7, 2, 1, 4, 9], dtype="Int64"),
+        "dateTimeCollected":    pd.to_datetime([
+            '2022-05-01 08:00', '2022-05-01 09:30', '2023-06-02 10:00', '2023-06-02 11:00',
+            None, '2021-01-01 00:00', '2023-06-02 12:00', '2023-07-15 07:45'
+        ]),
+        "category":             ['CR', 'CR', 'SE', 'CR', 'LC', 'NT', 'SE', 'LC'],
+        "Fremmede arter":       [False, False, True, False, False, False, True, True],
+        "Prioriterte arter":    [True, True, False, True, False, False, False, True],
+        "Ansvarsarter":         [False, False, False, False, True, False, False, False],
+    })
+    return add_date_part_columns(data, "dateTimeCollected")
+
+# --- Fixture: many_rows ---
+# Loaded-style data with many rows per (species, observer, year): dates spread over every day of two years.
+@pytest.fixture
+def many_rows():
+    rng = np.random.default_rng(0)
+    n_rows = 3000
+    species = rng.choice(['Art A', 'Art B', 'Art C', 'Art D'], n_rows)
+    data = pd.DataFrame({
+        "preferredPopularName": species,
+        "FamilieNavn": pd.Series(species).map({'Art A': 'Fam X', 'Art B': 'Fam X', 'Art C': 'Fam Y', 'Art D': 'Fam Z'}),
+        "OrdenNavn": 'Ord 1',
+        "collector": rng.choice(['Obs 1', 'Obs 2', 'Obs 3'], n_rows),
+        "individualCount": pd.array(rng.integers(1, 20, n_rows), dtype="Int64"),
+        "dateTimeCollected": pd.Timestamp('2022-01-01') + pd.to_timedelta(rng.integers(0, 730, n_rows), unit='D'),
+        "category": pd.Series(species).map({'Art A': 'CR', 'Art B': 'LC', 'Art C': 'SE', 'Art D': 'LC'}),
+        "Fremmede arter": species == 'Art C',
+        "Prioriterte arter": species == 'Art A',
+        "Ansvarsarter": False,
+    })
+    return add_date_part_columns(data, "dateTimeCollected")
+
+# --- Helper: full-path results for a subset of rows ---
+def _full_results(data, top_n=3):
+    args = TEST_COLUMN_ARGS
+    return (
+        calculate_basic_metrics(data, individual_count_col=args["individual_count_col"], art_col=args["art_col"],
+                                family_col=args["family_col"], observer_col=args["observer_col"],
+                                event_date_col=args["event_date_col"]),
+        calculate_all_status_counts(data, category_col=args["category_col"], alien_flag_col=args["alien_flag_col"],
+                                    original_special_status_cols=TEST_SPECIAL_STATUS_COLS),
+        calculate_all_top_lists(data, art_col=args["art_col"], family_col=args["family_col"],
+                                observer_col=args["observer_col"], individual_count_col=args["individual_count_col"],
+                                category_col=args["category_col"], original_special_status_cols=TEST_SPECIAL_STATUS_COLS,
+                                top_n=top_n),
+        calculate_yearly_metrics(data, args["event_date_col"], args["individual_count_col"]),
+    )
+
+##### Test Cases #####
+
+# --- Test: Results from the partial aggregates equal the full calculations --- #
+@pytest.mark.parametrize("species", [None, ['Art A'], ['Art B', 'Art D']])
+def test_partial_aggregates_match_full_calculations(loaded_data, species):
+    partials = build_partial_aggregates(loaded_data, **TEST_COLUMN_ARGS)
+    assert len(partials.groups) < len(loaded_data) # Rows with the same key share a group.
+
+    if species is None:
+        group_mask = pd.Series(True, index=partials.groups.index).to_numpy() # No filter: every group.
+        filtered = loaded_data
+    else:
+        group_mask = partials.groups["preferredPopularName"].isin(species).to_numpy()
+        filtered = loaded_data[loaded_data["preferredPopularName"].isin(species)]
+
+    basic, status_counts, top_lists, yearly = _full_results(filtered)
+    status_buckets = partials.status_buckets(group_mask)
+
+    assert partials.observation_count(group_mask) == len(filtered)
+    assert partials.basic_metrics(group_mask) == basic
+    assert partials.status_counts(status_buckets) == status_counts
+    assert_frame_equal(partials.yearly_metrics(group_mask), yearly, check_dtype=False)
+
+    partial_top_lists = partials.top_lists(filtered, group_mask, status_buckets, top_n=3)
+    for key in ("top_species_freq", "top_families_freq", "top_observers_freq", "top_individual_obs"):
+        assert_frame_equal(partial_top_lists[key], top_lists[key], check_dtype=False, check_categorical=False)
+    for key in ("top_redlist_species_agg", "top_alien_species_agg", "top_special_species_agg"):
+        for bucket, expected in top_lists[key].items():
+            assert partial_top_lists[key][bucket].values.tolist() == expected.values.tolist()
+
+# --- Test: Data without the load-time day/year columns --- #
+def test_build_partial_aggregates_needs_date_part_columns(loaded_data):
+    data = loaded_data.drop(columns=["dateTimeCollectedDay", "dateTimeCollectedYear"])
+    assert build_partial_aggregates(data, **TEST_COLUMN_ARGS) is None
+
+# --- Test: Groups are per (species, observer, year), not per day --- #
+def test_partial_aggregates_group_count_well_below_row_count(many_rows):
+    partials = build_partial_aggregates(many_rows, **TEST_COLUMN_ARGS)
+    assert len(partials.groups) <= 4 * 3 * 2 # Species x observers x years.
+    assert len(partials.groups) * 50 < len(many_rows)
+
+# --- Test: A date range covering whole years keeps or drops whole groups, with the same results as the rows --- #
+def test_partial_aggregates_whole_year_date_range(many_rows):
+    partials = build_partial_aggregates(many_rows, **TEST_COLUMN_ARGS)
+    groups = partials.groups
+    group_mask = date_range_group_mask(groups[GROUP_FIRST_DAY_COL], groups[GROUP_LAST_DAY_COL], '2023-01-01', '2023-12-31')
+    filtered = many_rows[date_range_mask(many_rows, "dateTimeCollected", '2023-01-01', '2023-12-31')]
+
+    basic, status_counts, top_lists, yearly = _full_results(filtered)
+    assert partials.observation_count(group_mask) == len(filtered)
+    assert partials.basic_metrics(group_mask) == basic
+    status_buckets = partials.status_buckets(group_mask)
+    assert partials.status_counts(status_buckets) == status_counts
+    assert_frame_equal(partials.yearly_metrics(group_mask), yearly, check_dtype=False)
+    partial_top_lists = partials.top_lists(filtered, group_mask, status_buckets, top_n=3)
+    for key in ("top_species_freq", "top_families_freq", "top_observers_freq"):
+        assert_frame_equal(partial_top_lists[key], top_lists[key], check_dtype=False, check_categorical=False)
+
+# --- Test: A date range splitting a group cannot be answered from the groups --- #
+def test_partial_aggregates_date_range_splitting_groups(many_rows):
+    groups = build_partial_aggregates(many_rows, **TEST_COLUMN_ARGS).groups
+    assert date_range_group_mask(groups[GROUP_FIRST_DAY_COL], groups[GROUP_LAST_DAY_COL], '2022-03-01', '2023-06-02') is None
+
+# --- Test: Rows without a date are in groups of their own, dropped by any date range --- #
+def test_partial_aggregates_date_range_drops_missing_dates(loaded_data):
+    partials = build_partial_aggregates(loaded_data, **TEST_COLUMN_ARGS)
+    groups = partials.groups
+    group_mask = date_range_group_mask(groups[GROUP_FIRST_DAY_COL], groups[GROUP_LAST_DAY_COL], '2000-01-01', '2030-12-31')
+    assert partials.observation_count(group_mask) == loaded_data["dateTimeCollected"].notna().sum()
+
+# --- Test: Tied individual counts rank in row order in both paths --- #
+@pytest.mark.parametrize("species, expected_labels", [
+    (None, [3, 7, 0]), # More filtered rows than top_n.
+    (['Art A'], [3, 0, 1]), # As many filtered rows as top_n.
+    (['Art B', 'Art C'], [2, 4, 6]), # All tied.
+])
+def test_partial_aggregates_top_individuals_ties(loaded_data, species, expected_labels):
+    data = loaded_data.assign(individualCount=pd.array([4, 4, 4, 7, 4, 1, 4, 7], dtype="Int64"))
+    partials = build_partial_aggregates(data, **TEST_COLUMN_ARGS)
+    if species is None:
+        group_mask = pd.Series(True, index=partials.groups.index).to_numpy()
+        filtered = data
+    else:
+        group_mask = partials.groups["preferredPopularName"].isin(species).to_numpy()
+        filtered = data[data["preferredPopularName"].isin(species)]
+
+    expected = _full_results(filtered)[2]["top_individual_obs"]
+    result = partials.top_lists(filtered, group_mask, partials.status_buckets(group_mask), top_n=3)["top_individual_obs"]
+    assert expected.index.tolist() == expected_labels
+    assert_frame_equal(result, expected)
+
+# --- Test: Tied individual counts rank in row order when top_n covers every filtered row --- #
+def test_partial_aggregates_top_individuals_ties_all_rows(many_rows):
+    partials = build_partial_aggregates(many_rows, **TEST_COLUMN_ARGS)
+    group_mask = (partials.groups["preferredPopularName"] == 'Art A').to_numpy()
+    filtered = many_rows[many_rows["preferredPopularName"] == 'Art A']
+    top_n = len(filtered) # DataFrame.nlargest sorts unstably in this case.
+
+    expected = _full_results(filtered, top_n=top_n)[2]["top_individual_obs"]
+    result = partials.top_lists(filtered, group_mask, partials.status_buckets(group_mask), top_n=top_n)
+    counts = filtered["individualCount"].to_numpy(dtype=int)
+    assert expected.index.tolist() == filtered.index[np.lexsort((np.arange(len(filtered)), -counts))].tolist()
+    assert_frame_equal(result["top_individual_obs"], expected)
@@ -1,6 +1,6 @@
 # ##### Imports #####
 import pandas as pd # Import pandas for data manipulation.
-import streamlit as st # Import Streamlit for caching.
+from global_utils.date_columns import as_datetime # Returns the already-parsed date column without re-parsing.
 
 # ##### Calculation Functions #####
 
@@ -8,7 +8,6 @@ import streamlit as st # Import Streamlit for caching.
 # Calculates basic summary statistics from the observation data.
 # Takes a pandas DataFrame 'data' and original column names.
 # Returns a dictionary containing total records, individuals, unique counts, and date range.
-@st.cache_data
 def calculate_basic_metrics(data,
                             individual_count_col: str, # Original column name for individual counts
                             art_col: str,             # Original column name for species
@@ -25,13 +24,8 @@ def calculate_basic_metrics(data,
     unique_observers = data[observer_col].nunique()  # Count unique observer names using original column.
 
     # Date Range
-    # Convert to datetime, coercing errors to NaT (Not a Time).
-    # REMOVED the strict format string to handle various input formats or pre-parsed dates.
-    valid_dates = pd.to_datetime(
-        data[event_date_col], 
-        errors='coerce' 
-        # format='%d.%m.%Y %H:%M:%S' # REMOVED strict format
-    ).dropna()
+    # Loaded data is already datetime64 (parsed once at load time); other input is converted, coercing errors to NaT.
+    valid_dates = as_datetime(data[event_date_col]).dropna()
     min_date = valid_dates.min() if not valid_dates.empty else None  # Get earliest date if available.
     max_date = valid_dates.max() if not valid_dates.empty else None  # Get latest date if available.
 
@@ -1,60 +1,50 @@
 # ##### Imports #####
-import pandas as pd # Import pandas for data manipulation.
-import streamlit as st # Import Streamlit for caching.
-
-# ##### Constants #####
-REDLIST_CATEGORIES = ['CR', 'EN', 'VU', 'NT', 'DD'] # Define redlist categories. Modifying affects counts.
-ALIEN_CATEGORIES_LIST = ['SE', 'HI', 'PH', 'LO'] # Define specific alien risk categories.
-# SPECIAL_STATUS_COLS removed, will be passed as a parameter list of original names
+from .calculate_status_buckets import ( # Shared (bucket, species) aggregation and the category constants.
+    REDLIST_CATEGORIES, ALIEN_CATEGORIES_LIST, ALIEN_FLAG_ONLY_BUCKET, aggregate_status_buckets, bucket_totals,
+    special_status_bucket
+)
 
 # ##### Calculation Functions #####
 
 # --- Function: calculate_all_status_counts ---
 # Calculates counts for Red List, Alien Species, and other special status categories.
-# Takes a pandas DataFrame 'data' and relevant original column names.
+# Takes a pandas DataFrame 'data', relevant original column names and optional 'status_buckets'
+# (aggregate_status_buckets for the same data, including the alien flag column).
 # Returns a dictionary containing various status counts.
-@st.cache_data
 def calculate_all_status_counts(data,
                                 category_col: str,           # Original column name for Red List/Alien Risk category
-                                alien_flag_col: str,         # Original column name for the 'Yes' flag for alien species
-                                original_special_status_cols: list # List of original column names for special statuses
+                                alien_flag_col: str,         # Original column name for the alien species flag
+                                original_special_status_cols: list, # List of original column names for special statuses
+                                status_buckets=None          # Precomputed aggregate_status_buckets result (with alien_flag_col), if any
                                 ):
-    # --- Red List Counts ---
-    # Assumes standard category codes exist in the original category column.
-    # category_col is now a parameter (original name)
-    # Count rows matching any redlist categories (Total).
-    redlisted_total_count = data[category_col].isin(REDLIST_CATEGORIES).sum()
+    # All counts are read from one grouped aggregation of the status buckets (rows per bucket), shared with the
+    # top lists when the caller passes it in (see dashboard.py).
+    if status_buckets is None:
+        status_buckets = aggregate_status_buckets(
+            data, category_col, original_special_status_cols, alien_flag_col=alien_flag_col
+        )
+    totals = bucket_totals(status_buckets) # Rows per bucket; buckets without rows are absent.
 
-    # Calculate count for each specific red list category.
-    redlist_counts_individual = {} # Initialize dictionary to store counts per category.
-    for category_value in REDLIST_CATEGORIES: # Iterate through the defined categories.
-        # Count rows where the category column exactly matches the current category_value.
-        redlist_counts_individual[category_value] = (data[category_col] == category_value).sum()
+    # --- Red List Counts ---
+    # Count for each specific red list category, and the total over all of them.
+    redlist_counts_individual = {category_value: int(totals.get(category_value, 0)) for category_value in REDLIST_CATEGORIES}
+    redlisted_total_count = sum(redlist_counts_individual.values())
 
     # --- Alien Species Counts ---
-    # alien_flag_col is now a parameter (original name for 'Fremmede arter' type column)
-
-    is_alien_category = data[category_col].isin(ALIEN_CATEGORIES_LIST)  # Check category column for risk codes.
-    is_alien_yes = data[alien_flag_col].astype(str).str.upper() == 'YES'  # Check dedicated alien flag column (original name), ensure robust comparison.
-    alien_total_count = (is_alien_category | is_alien_yes).sum()  # Total alien count (either condition is true).
-
-    # Calculate counts for each breakdown risk category
-    alien_counts_individual = {} # Dictionary to store breakdown counts.
-    for category_value in ALIEN_CATEGORIES_LIST: # Iterate through risk categories.
-        alien_counts_individual[category_value] = (data[category_col] == category_value).sum() # Count matches in category column.
+    # Total alien count: category is an alien risk code OR the dedicated alien flag is set. Flagged rows with
+    # another category are counted once, in ALIEN_FLAG_ONLY_BUCKET.
+    alien_counts_individual = {category_value: int(totals.get(category_value, 0)) for category_value in ALIEN_CATEGORIES_LIST}
+    alien_total_count = sum(alien_counts_individual.values()) + int(totals.get(ALIEN_FLAG_ONLY_BUCKET, 0))
 
     # --- Other Special Status Counts ---
-    special_status_counts = {} # Dictionary to store counts for other statuses.
-    for original_status_col_name in original_special_status_cols: # Iterate through the original status column names.
-        # Count 'Yes' (case-insensitive) in the respective original status column.
-        # Ensure the column is treated as string for robust 'Yes' check
-        if original_status_col_name in data.columns:
-            special_status_counts[original_status_col_name] = (data[original_status_col_name].astype(str).str.upper() == 'YES').sum()
-        else:
-            special_status_counts[original_status_col_name] = 0 # If column somehow missing, count as 0
+    # Flagged rows per original status column (0 if the column is missing).
+    special_status_counts = {
+        original_status_col_name: int(totals.get(special_status_bucket(original_status_col_name), 0))
+        for original_status_col_name in original_special_status_cols
+    }
 
     # Calculate Total for Special Status Section Title
-    # Sum the individual 'Yes' counts calculated above.
+    # Sum the individual flag counts calculated above.
     total_special_status_count = sum(special_status_counts.values())
 
     counts = { # Package results into a dictionary.
@@ -0,0 +1,106 @@
+# ##### Imports #####
+from __future__ import annotations  # Annotations are not evaluated: "str | None" also works on Python 3.9.
+
+import numpy as np  # Import numpy for row positions of each bucket.
+import pandas as pd  # Import pandas for the grouped aggregation.
+
+from global_utils.status_flags import status_flag_mask  # Vectorized bool mask for status flag columns.
+
+# ##### Constants #####
+REDLIST_CATEGORIES = ['CR', 'EN', 'VU', 'NT', 'DD'] # Define redlist categories. Modifying affects counts and top lists.
+ALIEN_CATEGORIES_LIST = ['SE', 'HI', 'PH', 'LO'] # Define specific alien risk categories.
+CATEGORY_BUCKETS = REDLIST_CATEGORIES + ALIEN_CATEGORIES_LIST # Buckets keyed by the value of the category column.
+# Rows flagged in the alien flag column whose category is not an alien category. Only used for the alien total
+# (category in ALIEN_CATEGORIES_LIST OR flagged), so that total can be read from the buckets without double counting.
+ALIEN_FLAG_ONLY_BUCKET = "_alien_flag_only"
+# Prefix of the special status buckets (see special_status_bucket), so a status column named like a category value or
+# ALIEN_FLAG_ONLY_BUCKET does not share that bucket.
+SPECIAL_STATUS_BUCKET_PREFIX = "status:"
+BUCKET_COL = "Status_Bucket" # Name of the bucket level in the aggregated index.
+AGG_COLUMNS = ['Antall_Observasjoner', 'Sum_Individer'] # Aggregated columns, also the top-N sort order.
+
+# ##### Calculation Functions #####
+
+# --- Function: special_status_bucket ---
+# Bucket name of the special status column original_status_col_name in aggregate_status_buckets.
+def special_status_bucket(original_status_col_name: str):
+    return SPECIAL_STATUS_BUCKET_PREFIX + original_status_col_name
+
+# --- Function: aggregate_status_buckets ---
+# Aggregates all status buckets in one grouped pass: every red-list category, every alien category, every special
+# status column (plus ALIEN_FLAG_ONLY_BUCKET when alien_flag_col is given). Category buckets are named by the
+# category value, special status buckets by special_status_bucket(column name).
+# A row belongs to its category bucket and to each status column it is flagged in. Those (row, bucket) pairs are
+# stacked into one long frame and grouped once by (bucket, species).
+# Returns a DataFrame indexed by (BUCKET_COL, art_col) - or BUCKET_COL only when art_col is None - with the
+# columns 'Antall_Observasjoner' (rows) and 'Sum_Individer' (sum of the numeric individual count, missing = 0).
+# Rows with a missing species are kept (NaN species), so bucket totals count every row.
+# With observation_count_col, each row of data stands for that many observations (e.g. grouped partial aggregates)
+# and 'Antall_Observasjoner' sums it instead of counting rows.
+# Special status columns missing from data are skipped (empty bucket). A missing category/alien flag column raises KeyError.
+def aggregate_status_buckets(data,
+                             category_col: str,                        # Original column name for Red List/Alien Risk category
+                             original_special_status_cols: list,       # List of original column names for special statuses
+                             alien_flag_col: str | None = None,        # Original column name for the alien species flag
+                             art_col: str | None = None,               # Original column name for species
+                             individual_count_col: str | None = None,  # Original column name for individual counts
+                             observation_count_col: str | None = None  # Column with the observations each row stands for (pre-aggregated data)
+                             ):
+    category = data[category_col]
+    in_category_bucket = category.isin(CATEGORY_BUCKETS).to_numpy()
+    row_parts = [np.flatnonzero(in_category_bucket)] # Row positions per bucket.
+    bucket_parts = [category.to_numpy(dtype=object)[row_parts[0]]] # Category value is the bucket name.
+
+    if alien_flag_col is not None:
+        flag_only = status_flag_mask(data, alien_flag_col).to_numpy() & ~category.isin(ALIEN_CATEGORIES_LIST).to_numpy()
+        row_parts.append(np.flatnonzero(flag_only))
+        bucket_parts.append(np.full(len(row_parts[-1]), ALIEN_FLAG_ONLY_BUCKET, dtype=object))
+
+    for original_status_col_name in original_special_status_cols: # A row can be flagged in several status columns.
+        if original_status_col_name in data.columns:
+            row_parts.append(np.flatnonzero(status_flag_mask(data, original_status_col_name).to_numpy()))
+            bucket_parts.append(np.full(len(row_parts[-1]), special_status_bucket(original_status_col_name), dtype=object))
+
+    rows = np.concatenate(row_parts)
+    long_data = pd.DataFrame({BUCKET_COL: np.concatenate(bucket_parts)}) # One row per (row, bucket) pair.
+    group_keys = [BUCKET_COL]
+    if art_col is not None:
+        long_data[art_col] = data[art_col].array.take(rows) # .array keeps categorical species columns categorical.
+        group_keys.append(art_col)
+    if individual_count_col is not None:
+        individuals = pd.to_numeric(data[individual_count_col], errors='coerce').fillna(0)
+        long_data['Sum_Individer'] = individuals.array.take(rows)
+    else:
+        long_data['Sum_Individer'] = 0 # No individual counts requested.
+
+    if observation_count_col is not None:
+        long_data['Antall_Observasjoner'] = data[observation_count_col].array.take(rows)
+    else:
+        long_data['Antall_Observasjoner'] = 1 # One observation per row.
+
+    grouped = long_data.groupby(group_keys, observed=True, dropna=False, sort=False)
+    return grouped[AGG_COLUMNS].sum()
+
+# --- Function: bucket_totals ---
+# Returns the number of rows per bucket (species summed) from aggregate_status_buckets. Buckets without rows are absent.
+def bucket_totals(status_buckets):
+    return status_buckets['Antall_Observasjoner'].groupby(level=BUCKET_COL, sort=False).sum()
+
+# --- Function: top_species_per_bucket ---
+# Returns {bucket: top-N species DataFrame} for the requested buckets from aggregate_status_buckets (with art_col).
+# Each DataFrame has the columns [art_col, 'Antall_Observasjoner', 'Sum_Individer'], ordered by count, then sum
+# (descending). nlargest only partially sorts each bucket. Buckets without species rows get an empty DataFrame.
+# Request all buckets in one call: the aggregate is split into buckets once per call.
+def top_species_per_bucket(status_buckets, buckets, art_col: str, top_n=10):
+    index = status_buckets.index
+    listed = index.get_level_values(BUCKET_COL).isin(buckets) & index.get_level_values(art_col).notna() # Rows without a species are not listed.
+    per_bucket = dict(iter(status_buckets[listed].groupby(level=BUCKET_COL, sort=False)))
+    empty = pd.DataFrame(columns=[art_col] + AGG_COLUMNS) # Built once; constructing empty frames is not free.
+    top_species = {}
+    for bucket in buckets:
+        group = per_bucket.get(bucket)
+        if group is None:
+            top_species[bucket] = empty.copy()
+        else:
+            top_species[bucket] = group.droplevel(BUCKET_COL).nlargest(top_n, AGG_COLUMNS).reset_index()
+    return top_species
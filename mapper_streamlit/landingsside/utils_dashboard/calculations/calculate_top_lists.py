@@ -1,12 +1,9 @@
 # ##### Imports #####
+import numpy as np # Import numpy for the stable sort of the individual counts.
 import pandas as pd # Import pandas for data manipulation and aggregation.
-import streamlit as st # Import Streamlit for caching.
-
-# ##### Constants #####
-# These are duplicated from status counts but useful here for iterating
-REDLIST_CATEGORIES = ['CR', 'EN', 'VU', 'NT', 'DD'] # Define redlist categories.
-ALIEN_CATEGORIES_LIST = ['SE', 'HI', 'PH', 'LO'] # Define specific alien risk categories.
-# SPECIAL_STATUS_COLS and CATEGORY_COL removed, will be passed as parameters
+from .calculate_status_buckets import ( # Shared (bucket, species) aggregation and the category constants.
+    REDLIST_CATEGORIES, ALIEN_CATEGORIES_LIST, aggregate_status_buckets, special_status_bucket, top_species_per_bucket
+)
 
 # ##### Calculation Functions #####
 
@@ -22,11 +19,26 @@ def _prepare_data_for_top_lists(data, original_individual_count_col: str):
     data_copy['Antall Individer Num'] = pd.to_numeric(data_copy[original_individual_count_col], errors='coerce').fillna(0)
     return data_copy # Return the modified copy.
 
+# --- Function: top_rows_by_individuals ---
+# Returns the top_n rows of 'data' (prepared by _prepare_data_for_top_lists) with the largest numeric individual
+# count, largest first. Ties keep the row order of 'data', also when it has top_n rows or fewer (DataFrame.nlargest
+# falls back to an unstable sort there), so the dashboard's partial aggregates can produce the same list.
+def top_rows_by_individuals(data, top_n):
+    order = np.argsort(-data['Antall Individer Num'].to_numpy(dtype=float), kind='stable')
+    return data.iloc[order[:top_n]]
+
+# --- Function: _observed_counts ---
+# value_counts() for one column, without the zero counts that categorical columns report for categories
+# absent from the (filtered) data.
+def _observed_counts(column):
+    counts = column.value_counts() # Counts per value, sorted descending.
+    return counts[counts > 0] # Drop unobserved categories.
+
 # --- Function: calculate_all_top_lists ---
 # Calculates various Top N lists based on frequency and individual counts.
-# Takes a pandas DataFrame 'data', original column names, and optional 'top_n' integer.
+# Takes a pandas DataFrame 'data', original column names, optional 'top_n' integer and optional 'status_buckets'
+# (aggregate_status_buckets for the same data, with art_col and individual counts).
 # Returns a dictionary containing all calculated top list DataFrames (with original column names).
-@st.cache_data
 def calculate_all_top_lists(data, # Non-default parameters first
                             art_col: str,                  # Original column name for species
                             family_col: str,               # Original column name for family
@@ -34,7 +46,8 @@ def calculate_all_top_lists(data, # Non-default parameters first
                             individual_count_col: str,   # Original column name for individual counts
                             category_col: str,             # Original column name for Red List/Alien Risk category
                             original_special_status_cols: list, # List of original column names for special statuses
-                            top_n=10                       # Default parameter at the end
+                            top_n=10,                      # Default parameters at the end
+                            status_buckets=None            # Precomputed aggregate_status_buckets result (with art_col), if any
                             ):
     if data.empty: # Handle empty input DataFrame early.
         # Return a dictionary with empty DataFrames/structures matching expected output keys
@@ -54,63 +67,38 @@ def calculate_all_top_lists(data, # Non-default parameters first
 
     # --- Basic Frequency Top Lists ---
     # Top Species by Frequency (Simple Count)
-    top_species = data[art_col].value_counts().nlargest(top_n).reset_index() # Calculate top N species by count.
+    top_species = _observed_counts(data[art_col]).nlargest(top_n).reset_index() # Calculate top N species by count.
     top_species.columns = [art_col, 'Antall_Observasjoner'] # Rename columns (art_col is original, second is generic count name).
 
     # Top Families by Frequency (Simple Count)
-    top_families = data[family_col].value_counts().nlargest(top_n).reset_index() # Calculate top N families by count.
+    top_families = _observed_counts(data[family_col]).nlargest(top_n).reset_index() # Calculate top N families by count.
     top_families.columns = [family_col, 'Antall_Observasjoner'] # Rename columns.
 
     # Top Observers by Frequency (Simple Count)
-    top_observers = data[observer_col].value_counts().nlargest(top_n).reset_index() # Calculate top N observers.
+    top_observers = _observed_counts(data[observer_col]).nlargest(top_n).reset_index() # Calculate top N observers.
     top_observers.columns = [observer_col, "Antall_Observasjoner"] # Rename columns.
 
     # --- Top Observations by Individual Count ---
     # Get the top N rows based on the numeric individual count.
-    top_individual_obs = data.nlargest(top_n, 'Antall Individer Num') # Uses the processing column.
+    top_individual_obs = top_rows_by_individuals(data, top_n) # Uses the processing column.
 
     # --- Category-Specific Top Lists (Frequency & Sum Individuals) ---
-    # Red List Species Aggregated per Category
-    top_redlist_species_by_cat = {} # Dict to store DataFrames for each category.
-    for category_value in REDLIST_CATEGORIES: # Loop through CR, EN, etc.
-        category_data = data[data[category_col] == category_value] # Filter data for this category using original category_col.
-        if not category_data.empty:
-            agg_df = category_data.groupby(art_col).agg(
-                Antall_Observasjoner=(art_col, 'size'), # Count observations per species.
-                Sum_Individer=('Antall Individer Num', 'sum') # Sum individuals per species.
-            ).reset_index() # Reset index to make art_col a column.
-            agg_df_sorted = agg_df.sort_values(by=['Antall_Observasjoner', 'Sum_Individer'], ascending=[False, False])
-            top_redlist_species_by_cat[category_value] = agg_df_sorted.head(top_n)
-        else:
-            top_redlist_species_by_cat[category_value] = pd.DataFrame(columns=[art_col, 'Antall_Observasjoner', 'Sum_Individer'])
-
-    # Alien Species Aggregated per Category
-    top_alien_species_by_cat = {} # Dict to store DataFrames for each category.
-    for category_value in ALIEN_CATEGORIES_LIST: # Loop through SE, HI, etc.
-        category_data = data[data[category_col] == category_value] # Filter data for this risk category.
-        if not category_data.empty:
-            agg_df = category_data.groupby(art_col).agg(
-                Antall_Observasjoner=(art_col, 'size'), # Frequency.
-                Sum_Individer=('Antall Individer Num', 'sum') # Sum of individuals.
-            ).reset_index()
-            agg_df_sorted = agg_df.sort_values(by=['Antall_Observasjoner', 'Sum_Individer'], ascending=[False, False])
-            top_alien_species_by_cat[category_value] = agg_df_sorted.head(top_n)
-        else:
-            top_alien_species_by_cat[category_value] = pd.DataFrame(columns=[art_col, 'Antall_Observasjoner', 'Sum_Individer'])
-
-    # Special Status Species Aggregated per Column
-    top_special_species_by_col = {} # Dict to store DataFrames for each status.
-    for original_status_col_name in original_special_status_cols: # Loop through the original status column names.
-        status_data = data[data[original_status_col_name].astype(str).str.upper() == 'YES'] # Filter data where this status is 'Yes'.
-        if not status_data.empty:
-            agg_df = status_data.groupby(art_col).agg(
-                Antall_Observasjoner=(art_col, 'size'), # Frequency.
-                Sum_Individer=('Antall Individer Num', 'sum') # Sum of individuals.
-            ).reset_index()
-            agg_df_sorted = agg_df.sort_values(by=['Antall_Observasjoner', 'Sum_Individer'], ascending=[False, False])
-            top_special_species_by_col[original_status_col_name] = agg_df_sorted.head(top_n)
-        else:
-            top_special_species_by_col[original_status_col_name] = pd.DataFrame(columns=[art_col, 'Antall_Observasjoner', 'Sum_Individer'])
+    # All red-list, alien and special status buckets come from one grouped aggregation by (bucket, species),
+    # shared with the status counts when the caller passes it in (see dashboard.py).
+    if status_buckets is None:
+        status_buckets = aggregate_status_buckets(
+            data, category_col, original_special_status_cols,
+            art_col=art_col, individual_count_col='Antall Individer Num'
+        )
+    special_buckets = [special_status_bucket(col) for col in original_special_status_cols]
+    top_species_by_bucket = top_species_per_bucket(
+        status_buckets, REDLIST_CATEGORIES + ALIEN_CATEGORIES_LIST + special_buckets, art_col, top_n
+    )
+    top_redlist_species_by_cat = {cat: top_species_by_bucket[cat] for cat in REDLIST_CATEGORIES} # Per red-list category.
+    top_alien_species_by_cat = {cat: top_species_by_bucket[cat] for cat in ALIEN_CATEGORIES_LIST} # Per alien risk category.
+    top_special_species_by_col = { # Per status column.
+        col: top_species_by_bucket[special_status_bucket(col)] for col in original_special_status_cols
+    }
 
     top_lists_result = { # Package results into a dictionary.
         "top_species_freq": top_species, # DF columns: [art_col, 'Antall_Observasjoner']
@@ -0,0 +1,59 @@
+# ##### Imports #####
+import streamlit as st  # Import Streamlit for caching.
+
+from ...figures_dashboard.obs_periode_calculations import calculate_yearly_metrics
+from .calculate_basic_metrics import calculate_basic_metrics
+from .calculate_redlists_alien_forvaltning_stats import calculate_all_status_counts
+from .calculate_status_buckets import aggregate_status_buckets
+from .calculate_top_lists import calculate_all_top_lists
+from .partial_aggregates import build_partial_aggregates
+
+# ##### Constants #####
+# Dashboard calculations by name. The name is part of the cache key, so each calculation has its own entries.
+DASHBOARD_CALCULATIONS = {
+    "basic_metrics": calculate_basic_metrics,
+    "status_buckets": aggregate_status_buckets,
+    "status_counts": calculate_all_status_counts,
+    "top_lists": calculate_all_top_lists,
+    "yearly_metrics": calculate_yearly_metrics,
+}
+DASHBOARD_CACHE_MAX_ENTRIES = 64 # Results kept per calculation (one per recent dataset/filter combination).
+PARTIAL_AGGREGATES_MAX_ENTRIES = 4 # Datasets whose partial aggregates are kept.
+
+# ##### Cache Functions #####
+
+# --- Function: _cached_calculation ---
+# Runs one dashboard calculation, cached on (cache_key, calculation_name, column arguments).
+# The leading underscore on _data and _status_buckets tells st.cache_data not to hash those DataFrames: cache_key
+# already identifies the filtered data, and the status buckets are derived from it.
+@st.cache_data(max_entries=DASHBOARD_CACHE_MAX_ENTRIES)
+def _cached_calculation(cache_key, calculation_name: str, _data, _status_buckets=None, **column_args):
+    if _status_buckets is not None:
+        column_args["status_buckets"] = _status_buckets
+    return DASHBOARD_CALCULATIONS[calculation_name](_data, **column_args)
+
+# --- Function: run_dashboard_calculation ---
+# Returns DASHBOARD_CALCULATIONS[calculation_name](data, **column_args).
+# With a cache_key (see filter_logic.filter_state_key: dataset fingerprint + canonical filter state), results are
+# cached on that key and the filtered DataFrame is never hashed. Without one, the calculation runs uncached.
+# A status_buckets argument (aggregate_status_buckets result of the same data) is passed on unhashed as well.
+def run_dashboard_calculation(cache_key, calculation_name: str, data, **column_args):
+    if cache_key is None:
+        return DASHBOARD_CALCULATIONS[calculation_name](data, **column_args) # No identity for this data; don't cache.
+    status_buckets = column_args.pop("status_buckets", None) # Derived from data: identified by cache_key too.
+    return _cached_calculation(cache_key, calculation_name, data, _status_buckets=status_buckets, **column_args)
+
+# --- Function: _cached_partial_aggregates ---
+# Builds the PartialAggregates of one loaded dataset, kept as a shared resource (not copied per rerun).
+@st.cache_resource(max_entries=PARTIAL_AGGREGATES_MAX_ENTRIES)
+def _cached_partial_aggregates(dataset_fingerprint, row_count, _data, **column_args):
+    return build_partial_aggregates(_data, **column_args)
+
+# --- Function: load_partial_aggregates ---
+# Returns the PartialAggregates (see partial_aggregates.py) of the loaded, unfiltered data, built once per dataset
+# fingerprint and column arguments. Returns None for data without a fingerprint (not from load_and_prepare_data).
+def load_partial_aggregates(loaded_data, **column_args):
+    dataset = loaded_data.attrs.get("dataset_fingerprint") # Set by load_and_prepare_data.
+    if dataset is None:
+        return None
+    return _cached_partial_aggregates(dataset, len(loaded_data), loaded_data, **column_args)
@@ -0,0 +1,210 @@
+# ##### Imports #####
+import numpy as np  # Import numpy for the row -> group arrays.
+import pandas as pd  # Import pandas for the grouped partial aggregates.
+
+from global_utils.date_columns import (  # Date helpers from load time.
+    MISSING_DATE_INT,
+    as_datetime,
+    date_day_column,
+    date_year_column,
+)
+from global_utils.filtering.filter_logic import (  # Columns the non-text filters read.
+    GROUP_FIRST_DAY_COL,
+    GROUP_LAST_DAY_COL,
+    STRUCTURED_FILTER_COLUMNS,
+)
+
+from .calculate_redlists_alien_forvaltning_stats import calculate_all_status_counts
+from .calculate_status_buckets import (  # Shared (bucket, species) aggregation.
+    ALIEN_CATEGORIES_LIST,
+    REDLIST_CATEGORIES,
+    aggregate_status_buckets,
+    special_status_bucket,
+    top_species_per_bucket,
+)
+from .calculate_top_lists import _prepare_data_for_top_lists
+
+# ##### Constants #####
+# Aggregate columns of PartialAggregates.groups (next to the key columns).
+OBSERVATIONS_COL = "_observations" # Rows in the group.
+INDIVIDUALS_COL = "_individuals" # Sum of the numeric individual count (missing = 0).
+FIRST_DATE_COL = "_first_date" # Earliest date/time in the group.
+LAST_DATE_COL = "_last_date" # Latest date/time in the group.
+YEARLY_OUTPUT_COLUMNS = ['Year', 'Sum_Observations', 'Sum_Individuals', 'Avg_Individuals_Per_Observation'] # As calculate_yearly_metrics.
+
+# ##### Classes #####
+
+# --- Class: PartialAggregates ---
+# Partial aggregates of one loaded dataset for the dashboard: one row per distinct combination of the columns the
+# filters read (STRUCTURED_FILTER_COLUMNS, i.e. species, taxonomy, category and status flags) and the columns the
+# dashboard groups by (observer, alien flag, year), with the number of observations, the individual sum and the
+# date/day range of each combination.
+# The taxonomy and status filters keep or drop whole groups, and so does a date range that does not split a group
+# (e.g. whole years), so filter_logic.structured_filter_mask evaluated on 'groups' selects exactly the filtered rows,
+# and the dashboard results are computed from the (much smaller) selected groups instead of the filtered rows.
+# The methods return the same structures as the calculate_* functions used by dashboard.py.
+class PartialAggregates:
+    def __init__(self, groups, row_groups, individual_order, row_labels, column_args):
+        self.groups = groups # Key columns + aggregates (OBSERVATIONS_COL ... LAST_DATE_COL, GROUP_*_DAY_COL).
+        self.row_groups = row_groups # row_groups[i]: position in 'groups' of loaded row i.
+        self.individual_order = individual_order # Loaded row positions, largest individual count first, ties by position.
+        self.row_labels = row_labels # Index of the loaded DataFrame.
+        self.column_args = column_args # Original column names (see build_partial_aggregates).
+
+    # --- Method: observation_count ---
+    # Number of loaded rows in the selected groups (equals len(apply_filters(data)) for the same filter state).
+    def observation_count(self, group_mask):
+        return int(self.groups.loc[group_mask, OBSERVATIONS_COL].sum())
+
+    # --- Method: basic_metrics ---
+    # Same result as calculate_basic_metrics on the filtered rows.
+    def basic_metrics(self, group_mask):
+        selected = self.groups[group_mask]
+        min_date = selected[FIRST_DATE_COL].min() # NaT if no valid dates.
+        max_date = selected[LAST_DATE_COL].max()
+        return {
+            "total_records": int(selected[OBSERVATIONS_COL].sum()),
+            "total_individuals": int(selected[INDIVIDUALS_COL].sum()),
+            "unique_species": selected[self.column_args["art_col"]].nunique(),
+            "unique_families": selected[self.column_args["family_col"]].nunique(),
+            "unique_observers": selected[self.column_args["observer_col"]].nunique(),
+            "min_date": None if pd.isna(min_date) else min_date,
+            "max_date": None if pd.isna(max_date) else max_date,
+        }
+
+    # --- Method: status_buckets ---
+    # aggregate_status_buckets for the filtered rows, computed from the selected groups.
+    def status_buckets(self, group_mask):
+        return aggregate_status_buckets(
+            self.groups[group_mask],
+            self.column_args["category_col"],
+            self.column_args["original_special_status_cols"],
+            alien_flag_col=self.column_args["alien_flag_col"],
+            art_col=self.column_args["art_col"],
+            individual_count_col=INDIVIDUALS_COL,
+            observation_count_col=OBSERVATIONS_COL,
+        )
+
+    # --- Method: status_counts ---
+    # Same result as calculate_all_status_counts, from status_buckets().
+    def status_counts(self, status_buckets):
+        return calculate_all_status_counts(
+            self.groups,
+            category_col=self.column_args["category_col"],
+            alien_flag_col=self.column_args["alien_flag_col"],
+            original_special_status_cols=self.column_args["original_special_status_cols"],
+            status_buckets=status_buckets,
+        )
+
+    # --- Method: top_lists ---
+    # Same result as calculate_all_top_lists on 'data' (the filtered rows, needed for the top individual
+    # observations only), with the frequency lists taken from the selected groups.
+    def top_lists(self, data, group_mask, status_buckets, top_n=10):
+        selected = self.groups[group_mask]
+        art_col = self.column_args["art_col"]
+        frequency_lists = {}
+        for key, col in (("top_species_freq", art_col),
+                         ("top_families_freq", self.column_args["family_col"]),
+                         ("top_observers_freq", self.column_args["observer_col"])):
+            # Observations per value, built and sorted like value_counts() (all categories in category order for
+            # categoricals, else first appearance; groups are ordered by their first row), so ties rank as in
+            # calculate_all_top_lists. Unobserved categories are dropped after sorting, as there.
+            is_categorical = isinstance(selected[col].dtype, pd.CategoricalDtype)
+            counts = selected.groupby(col, observed=not is_categorical, sort=is_categorical)[OBSERVATIONS_COL].sum()
+            counts = counts.sort_values(ascending=False)
+            top = counts[counts > 0].nlargest(top_n).reset_index()
+            top.columns = [col, 'Antall_Observasjoner']
+            frequency_lists[key] = top
+
+        # Top rows by individual count: walk the precomputed order and keep the first top_n rows in a selected group.
+        # Same rows and order as top_rows_by_individuals on the filtered rows (filtering keeps the row order).
+        in_selection = group_mask[self.row_groups[self.individual_order]]
+        top_labels = self.row_labels[self.individual_order[in_selection][:top_n]]
+        top_individual_obs = _prepare_data_for_top_lists(data.loc[top_labels], self.column_args["individual_count_col"])
+
+        special_cols = self.column_args["original_special_status_cols"]
+        special_buckets = [special_status_bucket(col) for col in special_cols]
+        top_species_by_bucket = top_species_per_bucket(
+            status_buckets, REDLIST_CATEGORIES + ALIEN_CATEGORIES_LIST + special_buckets, art_col, top_n
+        )
+        return {
+            **frequency_lists,
+            "top_individual_obs": top_individual_obs,
+            "top_redlist_species_agg": {cat: top_species_by_bucket[cat] for cat in REDLIST_CATEGORIES},
+            "top_alien_species_agg": {cat: top_species_by_bucket[cat] for cat in ALIEN_CATEGORIES_LIST},
+            "top_special_species_agg": {col: top_species_by_bucket[special_status_bucket(col)] for col in special_cols},
+        }
+
+    # --- Method: yearly_metrics ---
+    # Same result as calculate_yearly_metrics on the filtered rows.
+    def yearly_metrics(self, group_mask):
+        selected = self.groups[group_mask]
+        year_col = date_year_column(self.column_args["event_date_col"])
+        selected = selected[selected[year_col] != MISSING_DATE_INT] # Rows with a valid date.
+        if selected.empty:
+            return pd.DataFrame(columns=YEARLY_OUTPUT_COLUMNS)
+        yearly_summary = selected.groupby(year_col)[[OBSERVATIONS_COL, INDIVIDUALS_COL]].sum().reset_index()
+        yearly_summary.columns = YEARLY_OUTPUT_COLUMNS[:3]
+        yearly_summary['Avg_Individuals_Per_Observation'] = (
+            yearly_summary['Sum_Individuals'] / yearly_summary['Sum_Observations']
+        ).fillna(0)
+        return yearly_summary
+
+
+# ##### Functions #####
+
+# --- Function: build_partial_aggregates ---
+# Builds the PartialAggregates of the loaded (unfiltered) data, once per dataset.
+# Needs the int64 day/year columns added by load_and_prepare_data; returns None without them.
+# Rows are grouped by year, not by day, so the groups stay few; the day range of each group lets the date filter
+# keep or drop whole groups (see filter_logic.structured_filter_mask).
+def build_partial_aggregates(data,
+                             art_col: str,
+                             family_col: str,
+                             observer_col: str,
+                             individual_count_col: str,
+                             event_date_col: str,
+                             category_col: str,
+                             alien_flag_col: str,
+                             original_special_status_cols: list
+                             ):
+    column_args = {
+        "art_col": art_col, "family_col": family_col, "observer_col": observer_col,
+        "individual_count_col": individual_count_col, "event_date_col": event_date_col,
+        "category_col": category_col, "alien_flag_col": alien_flag_col,
+        "original_special_status_cols": original_special_status_cols,
+    }
+    day_col, year_col = date_day_column(event_date_col), date_year_column(event_date_col)
+    if not {day_col, year_col} <= set(data.columns) or not set(STRUCTURED_FILTER_COLUMNS) & set(data.columns):
+        return None # Not loaded through load_and_prepare_data.
+
+    # Group keys: filter columns first, then the dashboard's own grouping columns (duplicates removed). The year key
+    # keeps rows with and without a date in separate groups.
+    candidate_keys = STRUCTURED_FILTER_COLUMNS + [
+        art_col, family_col, observer_col, category_col, alien_flag_col, year_col
+    ] + list(original_special_status_cols)
+    keys = [col for col in dict.fromkeys(candidate_keys) if col in data.columns]
+
+    row_groups = data.groupby(keys, observed=True, dropna=False, sort=False).ngroup().to_numpy()
+    _, first_rows = np.unique(row_groups, return_index=True) # First row of each group, in group order.
+
+    individuals = pd.to_numeric(data[individual_count_col], errors='coerce').fillna(0)
+    values = pd.DataFrame({
+        OBSERVATIONS_COL: np.ones(len(data), dtype=np.int64),
+        INDIVIDUALS_COL: individuals.to_numpy(),
+        FIRST_DATE_COL: as_datetime(data[event_date_col]).to_numpy(),
+        LAST_DATE_COL: as_datetime(data[event_date_col]).to_numpy(),
+        GROUP_FIRST_DAY_COL: data[day_col].to_numpy(),
+        GROUP_LAST_DAY_COL: data[day_col].to_numpy(),
+    })
+    aggregates = values.groupby(row_groups).agg({
+        OBSERVATIONS_COL: 'sum', INDIVIDUALS_COL: 'sum', FIRST_DATE_COL: 'min', LAST_DATE_COL: 'max',
+        GROUP_FIRST_DAY_COL: 'min', GROUP_LAST_DAY_COL: 'max',
+    })
+
+    groups = pd.concat([data[keys].iloc[first_rows].reset_index(drop=True), aggregates.reset_index(drop=True)], axis=1)
+    groups.attrs = {} # No dataset fingerprint: the filter mask cache must not mistake 'groups' for the loaded data.
+
+    # Same order as top_rows_by_individuals: largest count first, ties in row order.
+    individual_order = np.argsort(-individuals.to_numpy(dtype=float), kind='stable')
+    return PartialAggregates(groups, row_groups, individual_order, data.index, column_args)
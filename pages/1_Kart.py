@@ -1,11 +1,29 @@
 import streamlit as st
 from global_utils.column_mapping import get_display_name  # Used for mapping original column names to display names.
 from global_utils.filtering.filter_ui import display_filter_widgets
-from global_utils.filtering.filter_logic import apply_filters
+from global_utils.dataset_manager import filtered_view
 from global_utils.session_state_manager import initialize_and_persist_filters
 from global_utils.data_loading import load_and_prepare_data  # Imports the new centralized data loading function.
 from global_utils.filtering.filter_constants import ALIEN_CODES  # Imports constants for alien species filtering.
-from mapper_streamlit.Kart.figur_1_kart_punkter import punktkart
+from global_utils.spatial_index import select_rows  # Rows of the filtered data returned by a spatial index query.
+from mapper_streamlit.Kart.figur_1_kart_punkter import (
+    KART_BREDDE_PIKSLER,
+    KART_MODUSER,
+    MAKS_PUNKTER,
+    MODUS_HEKSAGON,
+    MODUS_PUNKTER,
+    STANDARD_ZOOM,
+    kartsenter,
+    kartutsnitt,
+    punktkart,
+)
+from mapper_streamlit.Kart.figur_2_kart_webgl import (
+    WEBGL_BREDDE_PIKSLER,
+    WEBGL_MODUS_H3,
+    WEBGL_MODUS_PUNKTER,
+    WEBGL_MODUSER,
+    webgl_kart,
+)
 
 # ----------------------------------------
 # "Prepp"
@@ -23,7 +41,7 @@ initialize_and_persist_filters()
 display_filter_widgets(innlastet_data)  # Displays filter widgets
 
 # Henter filtrerte data fra session state
-kart_data_filtrert = apply_filters(innlastet_data)
+kart_data_filtrert = filtered_view(innlastet_data)  # Gjenbruker filterresultatet fra forrige side hvis filtrene er like.
 
 # ----------------------------------------
 # Kart med punkter
@@ -31,4 +49,37 @@ kart_data_filtrert = apply_filters(innlastet_data)
 st.title("Kart")
 options = ["Art", "Familie"]
 color_by = selection = st.pills("Farge etter", options, default="Art", selection_mode="single")
-st.plotly_chart(punktkart(kart_data_filtrert, color_by))
+
+# Kartmotor: Plotly (satellittbakgrunn) eller WebGL via pydeck/deck.gl (tegner millioner av punkter på GPU-en).
+KARTMOTORER = ["Plotly", "WebGL (pydeck)"]
+stort_utvalg = len(kart_data_filtrert) > MAKS_PUNKTER
+kartmotor = st.radio("Kartmotor", KARTMOTORER, index=1 if stort_utvalg else 0, horizontal=True)
+
+# Store datasett tegnes som H3-heksagoner som standard; alle punkter gjør nettleseren treg.
+if kartmotor == "Plotly":
+    moduser, standard_modus = KART_MODUSER, MODUS_HEKSAGON if stort_utvalg else MODUS_PUNKTER
+else:
+    moduser, standard_modus = WEBGL_MODUSER, WEBGL_MODUS_H3 if stort_utvalg else WEBGL_MODUS_PUNKTER
+modus = st.radio("Visning", moduser, index=moduser.index(standard_modus), horizontal=True)
+zoom = st.slider("Zoom", min_value=4, max_value=16, value=STANDARD_ZOOM)  # Heksagonstørrelsen følger denne zoomen.
+
+# Kartutsnitt: med romlig indeks (bygget i Oversikt, se global_utils/spatial_index.py) hentes bare punktene innenfor
+# utsnittet rundt kartsenteret ved valgt zoom, uten å gå gjennom alle rader.
+senter = kartsenter(kart_data_filtrert)
+romlig_indeks = st.session_state.get("loaded_spatial_index")
+kart_data = kart_data_filtrert
+har_indeks = romlig_indeks is not None and romlig_indeks.covers(innlastet_data)
+bare_utsnitt = har_indeks and st.checkbox("Bare punkter i kartutsnittet", value=stort_utvalg)  # Vises bare med indeks.
+if bare_utsnitt:
+    bredde = KART_BREDDE_PIKSLER if kartmotor == "Plotly" else WEBGL_BREDDE_PIKSLER
+    utsnitt = kartutsnitt(*senter, zoom, bredde=bredde)
+    kart_data = select_rows(kart_data_filtrert, romlig_indeks.bbox(*utsnitt))
+
+st.caption(
+    f"{len(kart_data):,} av {len(kart_data_filtrert):,} observasjoner vises. Utvalg viser maks {MAKS_PUNKTER:,} "
+    "tilfeldige punkter; heksagonene og utsnittet følger zoom-nivået over (ikke zoom i selve kartet)."
+)
+if kartmotor == "Plotly":
+    st.plotly_chart(punktkart(kart_data, color_by, modus=modus, zoom=zoom, senter=senter))
+else:
+    st.pydeck_chart(webgl_kart(kart_data, color_by, modus=modus, zoom=zoom, senter=senter), height=900)
@@ -1,7 +1,7 @@
 ##### Imports #####
 import streamlit as st # Import the Streamlit library
 from global_utils.filtering.filter_ui import display_filter_widgets # Import the UI widget function
-from global_utils.filtering.filter_logic import apply_filters # Import the filter application function
+from global_utils.dataset_manager import filtered_view # Import the (shared, cached) filter application function
 import pandas as pd # Import pandas for creating empty DataFrame
 from global_utils.session_state_manager import initialize_and_persist_filters # Import the persistence function
 
@@ -22,7 +22,7 @@ st.write("Innhold for Kart-siden kommer her.") # Add some placeholder text
 # --- Display Filters (if data is available) ---
 
 display_filter_widgets(kart_data) # Call the function to show sidebar filters
-filtered_kart_data = apply_filters(kart_data) # Apply the filters
+filtered_kart_data = filtered_view(kart_data) # Apply the filters (reuses the result from other pages if unchanged)
     # Now you can use filtered_kart_data to display maps, charts etc.
 st.dataframe(filtered_kart_data) # Display the entire filtered DataFrame
 
@@ -1,6 +1,64 @@
 ##### Imports #####
 import streamlit as st # Import the Streamlit library
+from global_utils.column_mapping import get_display_name # Used for mapping original column names to display names.
+from global_utils.session_state_manager import initialize_and_persist_filters # Import the persistence function
+from mapper_streamlit.Pivot_Tabell.pivot_kube import ( # Pre-aggregated cube and pivots
+    MEASURES,
+    RAW_ONLY_DIMENSIONS,
+    YEAR_COL,
+    load_pivot_kube,
+    pivot_table,
+)
+
+##### Initialize/Persist Session State #####
+initialize_and_persist_filters() # Ensure filter state persists across pages
 
 ##### Main Page Content #####
 st.title("Pivot Tabell") # Set the title of the page
-st.write("Innhold for Pivot Tabell-siden kommer her.") # Add some placeholder text
+
+# --- Attempt to retrieve data from session state ---
+innlastet_data = st.session_state.get("loaded_data")
+if innlastet_data is None or innlastet_data.empty:
+    st.warning("Data ikke lastet inn. Gå til Oversikt-siden og last inn data først.") # Show warning if data not found
+    st.stop()
+
+# --- Aggregation Cube ---
+# Built once per loaded dataset (cached); all pivots on cube dimensions are sums over its cells.
+kube = load_pivot_kube(innlastet_data)
+st.caption(
+    f"Kube: {len(kube.cells):,} celler fra {kube.source_rows:,} observasjoner, "
+    f"bygget på {kube.build_seconds:.2f} s, {kube.memory_bytes / 1e6:.2f} MB i minnet "
+    f"(rådata: {innlastet_data.memory_usage(deep=True).sum() / 1e6:.1f} MB)."
+)
+
+# --- Pivot Controls ---
+dimensjoner = kube.dimensions + [col for col in RAW_ONLY_DIMENSIONS if col in innlastet_data.columns]
+kol1, kol2, kol3 = st.columns(3)
+with kol1:
+    rader = st.multiselect("Rader", dimensjoner, default=["OrdenNavn"], format_func=get_display_name)
+with kol2:
+    kolonner = st.multiselect(
+        "Kolonner", [col for col in dimensjoner if col not in rader], default=[YEAR_COL], format_func=get_display_name
+    )
+with kol3:
+    maal = st.radio("Verdi", MEASURES, format_func=get_display_name, horizontal=True)
+
+# --- Drill-down: restrict the pivot to selected values of the cube dimensions ---
+utvalg = {}
+with st.expander("Utvalg (drill ned)"):
+    for dimensjon in kube.dimensions:
+        verdier = kube.cells[dimensjon].dropna().unique().tolist() # Distinct values, from the cube.
+        utvalg[dimensjon] = st.multiselect(get_display_name(dimensjon), sorted(verdier), key=f"pivot_utvalg_{dimensjon}")
+
+# --- Pivot Table ---
+tabell, kilde = pivot_table(kube, innlastet_data, rader, kolonner, maal, utvalg)
+tabell = tabell.rename_axis(index=[get_display_name(n) if n else n for n in tabell.index.names])
+if kolonner:
+    tabell.columns = tabell.columns.set_names([get_display_name(n) for n in tabell.columns.names])
+else:
+    tabell.columns = [get_display_name(col) for col in tabell.columns] # Single measure column.
+st.dataframe(tabell, use_container_width=True)
+if kilde == "kube":
+    st.caption("Beregnet fra kuben.")
+else:
+    st.caption("Beregnet fra rådata: minst én valgt dimensjon finnes ikke i kuben.")